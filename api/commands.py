@@ -2,6 +2,10 @@ import base64
 import json
 import logging
 import secrets
+import statistics
+import subprocess
+import sys
+import time
 from typing import Optional
 
 import click
@@ -10,17 +14,21 @@ from werkzeug.exceptions import NotFound
 
 from configs import dify_config
 from constants.languages import languages
+from core.model_runtime.model_providers import model_provider_factory
+from core.rag.datasource.keyword.jieba.keyword_postings import KeywordPostings
 from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.models.document import Document
+from core.tools.tool_manager import ToolManager
 from events.app_event import app_was_created
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
+from extensions.ext_storage import storage
 from libs.helper import email as email_validate
 from libs.password import hash_password, password_pattern, valid_password
 from libs.rsa import generate_key_pair
 from models.account import Tenant
-from models.dataset import Dataset, DatasetCollectionBinding, DocumentSegment
+from models.dataset import Dataset, DatasetCollectionBinding, DatasetKeywordTable, DocumentSegment
 from models.dataset import Document as DatasetDocument
 from models.model import Account, App, AppAnnotationSetting, AppMode, Conversation, MessageAnnotation
 from models.provider import Provider, ProviderModel
@@ -662,6 +670,144 @@ where sites.id is null limit 1000"""
     click.echo(click.style("Fix for missing app-related sites completed successfully!", fg="green"))
 
 
+@click.command("keyword-table-migrate", help="Migrate dataset keyword tables to incrementally stored postings.")
+def keyword_table_migrate():
+    """
+    Convert the keyword table blob of every dataset into keyword postings.
+    """
+    click.echo(click.style("Starting keyword table migration.", fg="green"))
+    migrated_count = 0
+    skipped_count = 0
+    last_id = None
+    while True:
+        query = db.session.query(DatasetKeywordTable).filter(DatasetKeywordTable.data_source_type != "postings")
+        if last_id:
+            query = query.filter(DatasetKeywordTable.id > last_id)
+        dataset_keyword_tables = query.order_by(DatasetKeywordTable.id).limit(50).all()
+        if not dataset_keyword_tables:
+            break
+        last_id = dataset_keyword_tables[-1].id
+
+        for dataset_keyword_table in dataset_keyword_tables:
+            dataset_id = dataset_keyword_table.dataset_id
+            try:
+                dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
+                if not dataset:
+                    skipped_count += 1
+                    click.echo("Dataset not found: {}".format(dataset_id))
+                    continue
+
+                # block keyword table writers while the table is converted
+                with redis_client.lock("keyword_indexing_lock_{}".format(dataset_id), timeout=600):
+                    db.session.refresh(dataset_keyword_table)
+                    data_source_type = dataset_keyword_table.data_source_type
+                    keyword_table_dict = dataset_keyword_table.keyword_table_dict
+                    keyword_table = keyword_table_dict["__data__"]["table"] if keyword_table_dict else {}
+
+                    node_keywords = {}
+                    for keyword, node_ids in keyword_table.items():
+                        for node_id in node_ids:
+                            node_keywords.setdefault(node_id, []).append(keyword)
+                    KeywordPostings(dataset_id).add(node_keywords)
+
+                    dataset_keyword_table.data_source_type = "postings"
+                    dataset_keyword_table.keyword_table = ""
+                    db.session.commit()
+
+                    if data_source_type != "database":
+                        storage.delete("keyword_files/" + dataset.tenant_id + "/" + dataset_id + ".txt")
+
+                migrated_count += 1
+                click.echo(f"Migrated keyword table of dataset {dataset_id} with {len(keyword_table)} keywords.")
+            except Exception as e:
+                db.session.rollback()
+                click.echo(
+                    click.style(
+                        "Error migrating keyword table of dataset {}: {} {}".format(
+                            dataset_id, e.__class__.__name__, str(e)
+                        ),
+                        fg="red",
+                    )
+                )
+                continue
+
+    click.echo(
+        click.style(
+            f"Migration complete. Migrated {migrated_count} keyword tables. Skipped {skipped_count} keyword tables.",
+            fg="green",
+        )
+    )
+
+
+@click.command("build-provider-manifests", help="Build the manifests of the builtin model and tool providers.")
+def build_provider_manifests():
+    """
+    Write the manifests listing the builtin model and tool providers, so the providers are listed without
+    importing their modules. A manifest is ignored once the provider files change, rebuild it after an upgrade.
+    """
+    for name, manifest, build in (
+        ("model", model_provider_factory.get_manifest(), model_provider_factory.build_manifest),
+        ("tool", ToolManager.get_builtin_providers_manifest(), ToolManager.build_builtin_providers_manifest),
+    ):
+        start_at = time.perf_counter()
+        providers = build()
+        manifest.save(providers)
+        click.echo(
+            click.style(
+                f"Built the manifest of {len(providers)} {name} providers in {time.perf_counter() - start_at:.2f}s: "
+                f"{manifest.path}",
+                fg="green",
+            )
+        )
+
+
+STARTUP_BENCHMARK_SUBSYSTEMS = {
+    "model providers": (
+        "from core.model_runtime.model_providers import model_provider_factory",
+        "model_provider_factory.get_providers(); model_provider_factory.get_provider_instance('openai')",
+    ),
+    "builtin tools": (
+        "from core.tools.tool_manager import ToolManager",
+        "ToolManager.get_tool_label('current_time'); ToolManager.get_builtin_provider('time')",
+    ),
+    "models": ("import models", "pass"),
+    "services": ("import services.app_service", "pass"),
+    "controllers": ("import controllers.console", "pass"),
+}
+
+
+@click.command("startup-benchmark", help="Measure the import time of the subsystems of the API.")
+@click.option("--rounds", default=3, help="Fresh interpreters started per subsystem, default is 3.")
+def startup_benchmark(rounds: int):
+    """
+    Import each subsystem in fresh interpreters and report the median import time and the time of its first use,
+    e.g. listing the providers. The time of a subsystem includes the modules it imports.
+    """
+    script = (
+        "import time; start_at = time.perf_counter(); {import_statement}; imported_at = time.perf_counter(); "
+        "{use_statement}; print(imported_at - start_at, time.perf_counter() - imported_at)"
+    )
+    click.echo(f"{'subsystem':<20}{'import':>10}{'first use':>12}")
+    for subsystem, (import_statement, use_statement) in STARTUP_BENCHMARK_SUBSYSTEMS.items():
+        timings = []
+        for _ in range(rounds):
+            result = subprocess.run(
+                [sys.executable, "-c", script.format(import_statement=import_statement, use_statement=use_statement)],
+                cwd=current_app.root_path,
+                capture_output=True,
+                text=True,
+            )
+            if result.returncode != 0:
+                click.echo(click.style(f"Failed to import {subsystem}: {result.stderr.strip()}", fg="red"))
+                break
+            timings.append([float(value) for value in result.stdout.split()[-2:]])
+
+        if timings:
+            import_seconds = statistics.median(timing[0] for timing in timings)
+            use_seconds = statistics.median(timing[1] for timing in timings)
+            click.echo(f"{subsystem:<20}{import_seconds:>9.2f}s{use_seconds:>11.2f}s")
+
+
 def register_commands(app):
     app.cli.add_command(reset_password)
     app.cli.add_command(reset_email)
@@ -672,3 +818,6 @@ def register_commands(app):
     app.cli.add_command(create_tenant)
     app.cli.add_command(upgrade_db)
     app.cli.add_command(fix_app_site_missing)
+    app.cli.add_command(keyword_table_migrate)
+    app.cli.add_command(build_provider_manifests)
+    app.cli.add_command(startup_benchmark)
@@ -1,6 +1,15 @@
-from typing import Annotated, Optional
-
-from pydantic import AliasChoices, Field, HttpUrl, NegativeInt, NonNegativeInt, PositiveInt, computed_field
+from typing import Annotated, Literal, Optional
+
+from pydantic import (
+    AliasChoices,
+    Field,
+    HttpUrl,
+    NegativeInt,
+    NonNegativeFloat,
+    NonNegativeInt,
+    PositiveInt,
+    computed_field,
+)
 from pydantic_settings import BaseSettings
 
 from configs.feature.hosted_service import HostedServiceConfig
@@ -38,6 +47,17 @@ class AppExecutionConfig(BaseSettings):
         default=0,
     )
 
+    APP_QUEUE_EVENT_DEEP_CHECK_ENABLED: bool = Field(
+        description="Enable deep check of every app queue event for SQLAlchemy model instances, for debugging."
+        " By default only the event fields whose types may hold model instances are checked",
+        default=False,
+    )
+
+    PROMPT_MESSAGE_TOKENS_CACHE_CAPACITY: PositiveInt = Field(
+        description="Maximum number of prompt message token counts cached in each process for pruning histories",
+        default=20000,
+    )
+
 
 class CodeExecutionSandboxConfig(BaseSettings):
     """
@@ -354,6 +374,37 @@ class WorkflowConfig(BaseSettings):
         default=5,
     )
 
+    WORKFLOW_MAX_ITERATION_PARALLEL_NUMS: PositiveInt = Field(
+        description="Maximum number of items run at the same time by an iteration node in parallel mode",
+        default=10,
+    )
+
+    WORKFLOW_PARALLEL_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of parallel branches running at the same time in a process, for all workflows",
+        default=100,
+    )
+
+    WORKFLOW_PARALLEL_MAX_WORKERS_PER_TENANT: PositiveInt = Field(
+        description="Maximum number of parallel branches of a tenant running at the same time in a process",
+        default=30,
+    )
+
+    WORKFLOW_PARALLEL_MAX_WORKERS_PER_RUN: PositiveInt = Field(
+        description="Maximum number of parallel branches of a workflow run running at the same time",
+        default=10,
+    )
+
+    WORKFLOW_PARALLEL_MAX_QUEUED_BRANCHES_PER_RUN: PositiveInt = Field(
+        description="Maximum number of queued parallel branches of a workflow run,"
+        " more branches wait for room in the queue",
+        default=100,
+    )
+
+    WORKFLOW_GRAPH_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of compiled workflow graphs cached in a process, 0 to disable the cache",
+        default=500,
+    )
+
     MAX_VARIABLE_SIZE: PositiveInt = Field(
         description="Maximum size in bytes for a single variable in workflows. Default to 5KB.",
         default=5 * 1024,
@@ -402,6 +453,22 @@ class ModerationConfig(BaseSettings):
     )
 
 
+class TokenizerConfig(BaseSettings):
+    """
+    Configuration for the gpt2 tokenizer used to estimate token counts
+    """
+
+    GPT2_TOKENIZER_BACKEND: Literal["tiktoken", "transformers"] = Field(
+        description="Backend of the gpt2 tokenizer, 'tiktoken' (fast, batched) or 'transformers' (pure python)",
+        default="tiktoken",
+    )
+
+    GPT2_TOKENIZER_WARMUP_ENABLED: bool = Field(
+        description="Whether to load the gpt2 tokenizer when the app or worker starts instead of on first use",
+        default=True,
+    )
+
+
 class ToolConfig(BaseSettings):
     """
     Configuration for tool management
@@ -481,10 +548,16 @@ class RagEtlConfig(BaseSettings):
 
     KEYWORD_DATA_SOURCE_TYPE: str = Field(
         description="Data source type for keyword extraction"
-        " ('database' or other supported types), default to 'database'",
+        " ('database', 'postings' or other supported types), default to 'database'."
+        " 'postings' stores one row per keyword and segment and updates it incrementally",
         default="database",
     )
 
+    KEYWORD_TABLE_CACHE_CAPACITY: PositiveInt = Field(
+        description="Maximum number of decoded dataset keyword tables cached in each process for keyword search",
+        default=20,
+    )
+
     UNSTRUCTURED_API_URL: Optional[str] = Field(
         description="API URL for Unstructured.io service",
         default=None,
@@ -506,11 +579,51 @@ class DataSetConfig(BaseSettings):
         default=30,
     )
 
+    CLEAN_EMBEDDING_CACHE_BATCH_SIZE: PositiveInt = Field(
+        description="Number of expired embedding cache rows deleted per statement by the embedding cache cleanup",
+        default=1000,
+    )
+
+    CLEAN_UNUSED_DATASETS_BATCH_SIZE: PositiveInt = Field(
+        description="Number of datasets checked per query by the unused datasets cleanup",
+        default=50,
+    )
+
+    CLEAN_BATCH_INTERVAL: NonNegativeFloat = Field(
+        description="Time in seconds the cleanup tasks wait between batches, limiting their load on the database",
+        default=0.1,
+    )
+
     DATASET_OPERATOR_ENABLED: bool = Field(
         description="Enable or disable dataset operator functionality",
         default=False,
     )
 
+    RETRIEVAL_DATASET_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of datasets retrieved concurrently in each process, shared by all requests",
+        default=20,
+    )
+
+    RETRIEVAL_SEARCH_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of keyword, embedding and full text searches run concurrently in each process",
+        default=40,
+    )
+
+    RETRIEVAL_TIMEOUT: PositiveInt = Field(
+        description="Time in seconds a request waits for its dataset retrievals before dropping the unfinished ones",
+        default=60,
+    )
+
+    QUERY_EMBEDDING_LOCAL_CACHE_CAPACITY: PositiveInt = Field(
+        description="Maximum number of query embeddings kept in the in-process cache in front of Redis",
+        default=1000,
+    )
+
+    QUERY_EMBEDDING_LOCAL_CACHE_TTL: PositiveInt = Field(
+        description="Time in seconds a query embedding stays in the in-process cache",
+        default=300,
+    )
+
 
 class WorkspaceConfig(BaseSettings):
     """
@@ -533,6 +646,34 @@ class IndexingConfig(BaseSettings):
         default=1000,
     )
 
+    INDEXING_EMBEDDING_MAX_CONCURRENCY: PositiveInt = Field(
+        description="Maximum number of batches embedded concurrently when indexing a document,"
+        " the concurrency adapts to the latency and rate limits of the provider up to this limit",
+        default=10,
+    )
+
+    INDEXING_EMBEDDING_MAX_RETRIES: NonNegativeInt = Field(
+        description="Maximum number of retries of a batch rate limited by the embedding provider during indexing",
+        default=5,
+    )
+
+    INDEXING_EMBEDDING_RETRY_BACKOFF: NonNegativeFloat = Field(
+        description="Seconds to wait before retrying a rate limited embedding batch, doubled for each retry",
+        default=1.0,
+    )
+
+    INDEXING_CHECKPOINT_ENABLED: bool = Field(
+        description="Whether to keep the extract and split results of documents being indexed in storage,"
+        " so retried indexing runs resume after the stages already completed",
+        default=True,
+    )
+
+    INDEXING_CHECKPOINT_RETENTION_DAYS: PositiveInt = Field(
+        description="Days the extract and split results of documents are kept in storage since they were last used,"
+        " results of documents never indexed successfully are deleted after that",
+        default=7,
+    )
+
 
 class ImageFormatConfig(BaseSettings):
     MULTIMODAL_SEND_IMAGE_FORMAT: str = Field(
@@ -624,6 +765,7 @@ class FeatureConfig(
     OAuthConfig,
     RagEtlConfig,
     SecurityConfig,
+    TokenizerConfig,
     ToolConfig,
     UpdateConfig,
     WorkflowConfig,
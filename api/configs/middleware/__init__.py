@@ -50,6 +50,18 @@ class VectorStoreConfig(BaseSettings):
         default=None,
     )
 
+    VECTOR_STORE_CONNECTION_POOL_SIZE: PositiveInt = Field(
+        description="Maximum number of connections of each vector store connection pool in a process,"
+        " for the SQL backed vector stores sharing their connections across requests."
+        " The pool of pgvector is sized by PGVECTOR_MIN_CONNECTION and PGVECTOR_MAX_CONNECTION.",
+        default=10,
+    )
+
+    VECTOR_STORE_CONNECTION_POOL_TIMEOUT: PositiveFloat = Field(
+        description="Maximum time in seconds to wait for a connection of a vector store connection pool.",
+        default=30.0,
+    )
+
 
 class KeywordStoreConfig(BaseSettings):
     KEYWORD_STORE: str = Field(
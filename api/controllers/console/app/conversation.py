@@ -23,6 +23,7 @@ from fields.conversation_fields import (
 from libs.helper import DatetimeString
 from libs.login import login_required
 from models.model import AppMode, Conversation, EndUser, Message, MessageAnnotation
+from services.prefetch_service import PrefetchService
 
 
 class CompletionConversationApi(Resource):
@@ -91,6 +92,7 @@ class CompletionConversationApi(Resource):
         query = query.order_by(Conversation.created_at.desc())
 
         conversations = db.paginate(query, page=args["page"], per_page=args["limit"], error_out=False)
+        PrefetchService.prefetch_conversations(conversations.items)
 
         return conversations
 
@@ -256,6 +258,7 @@ class ChatConversationApi(Resource):
                 query = query.order_by(Conversation.created_at.desc())
 
         conversations = db.paginate(query, page=args["page"], per_page=args["limit"], error_out=False)
+        PrefetchService.prefetch_conversations(conversations.items)
 
         return conversations
 
@@ -593,6 +593,7 @@ class DocumentDetailApi(DocumentResource):
                 "completed_at": int(document.completed_at.timestamp()) if document.completed_at else None,
                 "updated_at": int(document.updated_at.timestamp()) if document.updated_at else None,
                 "indexing_latency": document.indexing_latency,
+                "indexing_metadata": document.indexing_metadata,
                 "error": document.error,
                 "enabled": document.enabled,
                 "disabled_at": int(document.disabled_at.timestamp()) if document.disabled_at else None,
@@ -624,6 +625,7 @@ class DocumentDetailApi(DocumentResource):
                 "completed_at": int(document.completed_at.timestamp()) if document.completed_at else None,
                 "updated_at": int(document.updated_at.timestamp()) if document.updated_at else None,
                 "indexing_latency": document.indexing_latency,
+                "indexing_metadata": document.indexing_metadata,
                 "error": document.error,
                 "enabled": document.enabled,
                 "disabled_at": int(document.disabled_at.timestamp()) if document.disabled_at else None,
@@ -1,13 +1,21 @@
 import queue
+import threading
 import time
+import types
+import typing
 from abc import abstractmethod
-from collections.abc import Generator
+from collections.abc import Generator, Mapping, Sequence
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 from enum import Enum
-from typing import Any
+from typing import Any, Literal, Union, get_args, get_origin
+from uuid import UUID
 
+from pydantic import BaseModel
 from sqlalchemy.orm import DeclarativeMeta
 
 from configs import dify_config
+from core.app.apps.task_stop_subscriber import TASK_STOPPED_CHANNEL_PREFIX, task_stop_subscriber
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.app.entities.queue_entities import (
     AppQueueEvent,
@@ -23,7 +31,78 @@ class PublishFrom(Enum):
     TASK_PIPELINE = 2
 
 
+# sentinel put into the queue to wake up the listener once the task is stopped
+_WAKE_UP = object()
+
+# field types which can never hold a SQLAlchemy model instance
+_PLAIN_TYPES = (str, int, float, bool, bytes, Decimal, date, datetime, timedelta, UUID, Enum, type(None))
+_CONTAINER_TYPES = (list, tuple, set, frozenset, dict, Sequence, Mapping)
+
+# event class -> names of the fields whose types may hold SQLAlchemy model instances
+_event_checked_fields: dict[type[AppQueueEvent], tuple[str, ...]] = {}
+
+
+def _annotation_may_hold_sqlalchemy_models(annotation: Any, seen: set[type]) -> bool:
+    """
+    Check whether a value of the annotated type may hold a SQLAlchemy model instance
+    """
+    origin = get_origin(annotation)
+    if origin is Literal:
+        return False
+    if origin is typing.Annotated:
+        return _annotation_may_hold_sqlalchemy_models(get_args(annotation)[0], seen)
+    if origin in {Union, types.UnionType} or (isinstance(origin, type) and issubclass(origin, _CONTAINER_TYPES)):
+        args = [arg for arg in get_args(annotation) if arg is not Ellipsis]
+        return not args or any(_annotation_may_hold_sqlalchemy_models(arg, seen) for arg in args)
+    if origin is not None or not isinstance(annotation, type):
+        # Any, type variables, forward references and other generics are not verifiable
+        return True
+    if issubclass(annotation, _PLAIN_TYPES):
+        return False
+    if issubclass(annotation, BaseModel):
+        return _model_may_hold_sqlalchemy_models(annotation, seen)
+
+    return True
+
+
+def _model_may_hold_sqlalchemy_models(model_class: type[BaseModel], seen: set[type]) -> bool:
+    if model_class in seen:
+        return False
+    seen.add(model_class)
+
+    if model_class.model_config.get("extra") == "allow":
+        return True
+
+    # instances of subclasses are kept as they are by pydantic, so their fields are checked as well
+    return any(
+        _annotation_may_hold_sqlalchemy_models(field.annotation, seen) for field in model_class.model_fields.values()
+    ) or any(_model_may_hold_sqlalchemy_models(subclass, seen) for subclass in model_class.__subclasses__())
+
+
+def _get_event_checked_fields(event_class: type[AppQueueEvent]) -> tuple[str, ...]:
+    """
+    Get the fields of event class to be checked for SQLAlchemy model instances, resolved once per class
+    """
+    checked_fields = _event_checked_fields.get(event_class)
+    if checked_fields is None:
+        checked_fields = tuple(
+            name
+            for name, field in event_class.model_fields.items()
+            if _annotation_may_hold_sqlalchemy_models(field.annotation, {event_class})
+        )
+        _event_checked_fields[event_class] = checked_fields
+
+    return checked_fields
+
+
 class AppQueueManager:
+    # interval of ping events sent to keep the stream alive, in seconds
+    PING_INTERVAL = 10
+    # interval of stop flag checks against Redis while the stop signal subscription is down, in seconds
+    STOP_FLAG_CHECK_INTERVAL = 1
+    # interval of stop flag checks against Redis catching signals missed by the subscription, in seconds
+    STOP_FLAG_FALLBACK_CHECK_INTERVAL = 5
+
     def __init__(self, task_id: str, user_id: str, invoke_from: InvokeFrom) -> None:
         if not user_id:
             raise ValueError("user is required")
@@ -40,6 +119,8 @@ class AppQueueManager:
         q = queue.Queue()
 
         self._q = q
+        self._stopped = threading.Event()
+        self._last_stop_flag_check_time = 0.0
 
     def listen(self) -> Generator:
         """
@@ -50,27 +131,39 @@ class AppQueueManager:
         listen_timeout = dify_config.APP_MAX_EXECUTION_TIME
         start_time = time.time()
         last_ping_time = 0
-        while True:
-            try:
-                message = self._q.get(timeout=1)
-                if message is None:
-                    break
-
-                yield message
-            except queue.Empty:
-                continue
-            finally:
+        task_stop_subscriber.register(self._task_id, self._on_stopped)
+        try:
+            while True:
+                # block until a message arrives or the next ping, stop flag check or timeout is due
                 elapsed_time = time.time() - start_time
-                if elapsed_time >= listen_timeout or self._is_stopped():
-                    # publish two messages to make sure the client can receive the stop signal
-                    # and stop listening after the stop signal processed
-                    self.publish(
-                        QueueStopEvent(stopped_by=QueueStopEvent.StopBy.USER_MANUAL), PublishFrom.TASK_PIPELINE
-                    )
+                wait_timeout = min(
+                    (last_ping_time + 1) * self.PING_INTERVAL - elapsed_time,
+                    listen_timeout - elapsed_time,
+                    self._stop_flag_check_interval(),
+                )
+                try:
+                    message = self._q.get(timeout=max(wait_timeout, 0.01))
+                    if message is None:
+                        break
 
-                if elapsed_time // 10 > last_ping_time:
-                    self.publish(QueuePingEvent(), PublishFrom.TASK_PIPELINE)
-                    last_ping_time = elapsed_time // 10
+                    if message is not _WAKE_UP:
+                        yield message
+                except queue.Empty:
+                    continue
+                finally:
+                    elapsed_time = time.time() - start_time
+                    if elapsed_time >= listen_timeout or self._is_stopped():
+                        # publish two messages to make sure the client can receive the stop signal
+                        # and stop listening after the stop signal processed
+                        self.publish(
+                            QueueStopEvent(stopped_by=QueueStopEvent.StopBy.USER_MANUAL), PublishFrom.TASK_PIPELINE
+                        )
+
+                    if elapsed_time // self.PING_INTERVAL > last_ping_time:
+                        self.publish(QueuePingEvent(), PublishFrom.TASK_PIPELINE)
+                        last_ping_time = elapsed_time // self.PING_INTERVAL
+        finally:
+            task_stop_subscriber.unregister(self._task_id)
 
     def stop_listen(self) -> None:
         """
@@ -95,7 +188,13 @@ class AppQueueManager:
         :param pub_from:
         :return:
         """
-        self._check_for_sqlalchemy_models(event.model_dump())
+        if dify_config.APP_QUEUE_EVENT_DEEP_CHECK_ENABLED:
+            self._check_for_sqlalchemy_models(event.model_dump())
+        else:
+            # only the fields whose types may hold SQLAlchemy models are walked
+            for field_name in _get_event_checked_fields(type(event)):
+                self._check_for_sqlalchemy_models(getattr(event, field_name))
+
         self._publish(event, pub_from)
 
     @abstractmethod
@@ -124,19 +223,44 @@ class AppQueueManager:
 
         stopped_cache_key = cls._generate_stopped_cache_key(task_id)
         redis_client.setex(stopped_cache_key, 600, 1)
+        # notify the listening process immediately, the flag above covers listeners missing the signal
+        redis_client.publish(stopped_cache_key, 1)
 
     def _is_stopped(self) -> bool:
         """
-        Check if task is stopped
+        Check if task is stopped, the stop flag in Redis is checked at most once per check interval
         :return:
         """
+        if self._stopped.is_set():
+            return True
+
+        now = time.monotonic()
+        if now - self._last_stop_flag_check_time < self._stop_flag_check_interval():
+            return False
+
+        self._last_stop_flag_check_time = now
         stopped_cache_key = AppQueueManager._generate_stopped_cache_key(self._task_id)
         result = redis_client.get(stopped_cache_key)
         if result is not None:
+            self._stopped.set()
             return True
 
         return False
 
+    def _on_stopped(self) -> None:
+        """
+        Handle the stop signal delivered by the task stop subscriber
+        :return:
+        """
+        self._stopped.set()
+        self._q.put(_WAKE_UP)
+
+    def _stop_flag_check_interval(self) -> float:
+        if task_stop_subscriber.is_subscribed:
+            return self.STOP_FLAG_FALLBACK_CHECK_INTERVAL
+
+        return self.STOP_FLAG_CHECK_INTERVAL
+
     @classmethod
     def _generate_task_belong_cache_key(cls, task_id: str) -> str:
         """
@@ -153,16 +277,19 @@ class AppQueueManager:
         :param task_id: task id
         :return:
         """
-        return f"generate_task_stopped:{task_id}"
+        return f"{TASK_STOPPED_CHANNEL_PREFIX}{task_id}"
 
     def _check_for_sqlalchemy_models(self, data: Any):
         # from entity to dict or list
         if isinstance(data, dict):
             for key, value in data.items():
                 self._check_for_sqlalchemy_models(value)
-        elif isinstance(data, list):
+        elif isinstance(data, list | tuple | set):
             for item in data:
                 self._check_for_sqlalchemy_models(item)
+        elif isinstance(data, BaseModel):
+            for field_name in type(data).model_fields:
+                self._check_for_sqlalchemy_models(getattr(data, field_name))
         else:
             if isinstance(data, DeclarativeMeta) or hasattr(data, "_sa_instance_state"):
                 raise TypeError(
@@ -0,0 +1,107 @@
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+TASK_STOPPED_CHANNEL_PREFIX = "generate_task_stopped:"
+
+
+class TaskStopSubscriber:
+    """
+    Process-wide subscriber of generate task stop signals.
+
+    A single pub/sub connection per process receives the stop signals published by
+    `AppQueueManager.set_stop_flag` and dispatches them to the callbacks registered by
+    the queue managers running in this process, so listeners do not have to poll Redis.
+    """
+
+    def __init__(self, reconnect_interval: float = 1.0) -> None:
+        self._reconnect_interval = reconnect_interval
+        self._callbacks: dict[str, Callable[[], None]] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._subscribed = threading.Event()
+
+    @property
+    def is_subscribed(self) -> bool:
+        """
+        Whether the subscription is currently established and stop signals are being delivered
+        """
+        return self._subscribed.is_set() and self._pid == os.getpid()
+
+    def register(self, task_id: str, callback: Callable[[], None]) -> None:
+        """
+        Register a callback invoked from the subscriber thread once the task is stopped
+        :param task_id: task id
+        :param callback: callback
+        """
+        with self._lock:
+            self._callbacks[task_id] = callback
+            self._ensure_started()
+
+    def unregister(self, task_id: str) -> None:
+        """
+        Unregister the stop callback of task
+        :param task_id: task id
+        """
+        with self._lock:
+            self._callbacks.pop(task_id, None)
+
+    def _ensure_started(self) -> None:
+        # the subscriber thread does not survive a fork, start a new one in the child process
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        self._pid = os.getpid()
+        self._subscribed.clear()
+        self._thread = threading.Thread(target=self._run, name="task-stop-subscriber", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            pubsub = None
+            try:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f"{TASK_STOPPED_CHANNEL_PREFIX}*")
+                self._subscribed.set()
+                for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+
+                    self._dispatch(message["channel"])
+            except Exception:
+                logger.exception("task stop subscription failed, reconnecting")
+            finally:
+                self._subscribed.clear()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+            time.sleep(self._reconnect_interval)
+
+    def _dispatch(self, channel: bytes | str) -> None:
+        if isinstance(channel, bytes):
+            channel = channel.decode("utf-8")
+
+        task_id = channel.removeprefix(TASK_STOPPED_CHANNEL_PREFIX)
+        with self._lock:
+            callback = self._callbacks.get(task_id)
+
+        if callback is None:
+            return
+
+        try:
+            callback()
+        except Exception:
+            logger.exception(f"failed to deliver stop signal of task {task_id}")
+
+
+task_stop_subscriber = TaskStopSubscriber()
@@ -41,6 +41,7 @@ from core.workflow.graph_engine.entities.event import (
     ParallelBranchRunSucceededEvent,
 )
 from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.entities.graph_cache import graph_cache
 from core.workflow.nodes.base_node import BaseNode
 from core.workflow.nodes.iteration.entities import IterationNodeData
 from core.workflow.nodes.node_mapping import node_classes
@@ -54,7 +55,7 @@ class WorkflowBasedAppRunner(AppRunner):
     def __init__(self, queue_manager: AppQueueManager):
         self.queue_manager = queue_manager
 
-    def _init_graph(self, graph_config: Mapping[str, Any]) -> Graph:
+    def _init_graph(self, graph_config: Mapping[str, Any], workflow_id: str) -> Graph:
         """
         Init graph
         """
@@ -67,7 +68,7 @@ class WorkflowBasedAppRunner(AppRunner):
         if not isinstance(graph_config.get("edges"), list):
             raise ValueError("edges in workflow graph must be a list")
         # init graph
-        graph = Graph.init(graph_config=graph_config)
+        graph = graph_cache.get_or_init(workflow_id=workflow_id, graph_config=graph_config)
 
         if not graph:
             raise ValueError("graph not found in workflow")
@@ -121,7 +122,7 @@ class WorkflowBasedAppRunner(AppRunner):
         graph_config["edges"] = edge_configs
 
         # init graph
-        graph = Graph.init(graph_config=graph_config, root_node_id=node_id)
+        graph = graph_cache.get_or_init(workflow_id=workflow.id, graph_config=graph_config, root_node_id=node_id)
 
         if not graph:
             raise ValueError("graph not found in workflow")
@@ -195,6 +196,7 @@ class WorkflowBasedAppRunner(AppRunner):
                     node_run_index=event.route_node_state.index,
                     predecessor_node_id=event.predecessor_node_id,
                     in_iteration_id=event.in_iteration_id,
+                    in_iteration_index=event.in_iteration_index,
                 )
             )
         elif isinstance(event, NodeRunSucceededEvent):
@@ -222,6 +224,7 @@ class WorkflowBasedAppRunner(AppRunner):
                     if event.route_node_state.node_run_result
                     else {},
                     in_iteration_id=event.in_iteration_id,
+                    in_iteration_index=event.in_iteration_index,
                 )
             )
         elif isinstance(event, NodeRunFailedEvent):
@@ -249,6 +252,7 @@ class WorkflowBasedAppRunner(AppRunner):
                     if event.route_node_state.node_run_result and event.route_node_state.node_run_result.error
                     else "Unknown error",
                     in_iteration_id=event.in_iteration_id,
+                    in_iteration_index=event.in_iteration_index,
                 )
             )
         elif isinstance(event, NodeRunStreamChunkEvent):
@@ -257,12 +261,15 @@ class WorkflowBasedAppRunner(AppRunner):
                     text=event.chunk_content,
                     from_variable_selector=event.from_variable_selector,
                     in_iteration_id=event.in_iteration_id,
+                    in_iteration_index=event.in_iteration_index,
                 )
             )
         elif isinstance(event, NodeRunRetrieverResourceEvent):
             self._publish_event(
                 QueueRetrieverResourcesEvent(
-                    retriever_resources=event.retriever_resources, in_iteration_id=event.in_iteration_id
+                    retriever_resources=event.retriever_resources,
+                    in_iteration_id=event.in_iteration_id,
+                    in_iteration_index=event.in_iteration_index,
                 )
             )
         elif isinstance(event, ParallelBranchRunStartedEvent):
@@ -273,6 +280,7 @@ class WorkflowBasedAppRunner(AppRunner):
                     parent_parallel_id=event.parent_parallel_id,
                     parent_parallel_start_node_id=event.parent_parallel_start_node_id,
                     in_iteration_id=event.in_iteration_id,
+                    in_iteration_index=event.in_iteration_index,
                 )
             )
         elif isinstance(event, ParallelBranchRunSucceededEvent):
@@ -283,6 +291,8 @@ class WorkflowBasedAppRunner(AppRunner):
                     parent_parallel_id=event.parent_parallel_id,
                     parent_parallel_start_node_id=event.parent_parallel_start_node_id,
                     in_iteration_id=event.in_iteration_id,
+                    in_iteration_index=event.in_iteration_index,
+                    elapsed_time=event.elapsed_time,
                 )
             )
         elif isinstance(event, ParallelBranchRunFailedEvent):
@@ -293,7 +303,9 @@ class WorkflowBasedAppRunner(AppRunner):
                     parent_parallel_id=event.parent_parallel_id,
                     parent_parallel_start_node_id=event.parent_parallel_start_node_id,
                     in_iteration_id=event.in_iteration_id,
+                    in_iteration_index=event.in_iteration_index,
                     error=event.error,
+                    elapsed_time=event.elapsed_time,
                 )
             )
         elif isinstance(event, IterationRunStartedEvent):
@@ -164,6 +164,8 @@ class QueueTextChunkEvent(AppQueueEvent):
     """from variable selector"""
     in_iteration_id: Optional[str] = None
     """iteration id if node is in iteration"""
+    in_iteration_index: Optional[int] = None
+    """iteration item index if node is in iteration"""
 
 
 class QueueAgentMessageEvent(AppQueueEvent):
@@ -193,6 +195,8 @@ class QueueRetrieverResourcesEvent(AppQueueEvent):
     retriever_resources: list[dict]
     in_iteration_id: Optional[str] = None
     """iteration id if node is in iteration"""
+    in_iteration_index: Optional[int] = None
+    """iteration item index if node is in iteration"""
 
 
 class QueueAnnotationReplyEvent(AppQueueEvent):
@@ -271,6 +275,8 @@ class QueueNodeStartedEvent(AppQueueEvent):
     """parent parallel start node id if node is in parallel"""
     in_iteration_id: Optional[str] = None
     """iteration id if node is in iteration"""
+    in_iteration_index: Optional[int] = None
+    """iteration item index if node is in iteration"""
     start_at: datetime
 
 
@@ -295,6 +301,8 @@ class QueueNodeSucceededEvent(AppQueueEvent):
     """parent parallel start node id if node is in parallel"""
     in_iteration_id: Optional[str] = None
     """iteration id if node is in iteration"""
+    in_iteration_index: Optional[int] = None
+    """iteration item index if node is in iteration"""
     start_at: datetime
 
     inputs: Optional[dict[str, Any]] = None
@@ -326,6 +334,8 @@ class QueueNodeFailedEvent(AppQueueEvent):
     """parent parallel start node id if node is in parallel"""
     in_iteration_id: Optional[str] = None
     """iteration id if node is in iteration"""
+    in_iteration_index: Optional[int] = None
+    """iteration item index if node is in iteration"""
     start_at: datetime
 
     inputs: Optional[dict[str, Any]] = None
@@ -444,6 +454,8 @@ class QueueParallelBranchRunStartedEvent(AppQueueEvent):
     """parent parallel start node id if node is in parallel"""
     in_iteration_id: Optional[str] = None
     """iteration id if node is in iteration"""
+    in_iteration_index: Optional[int] = None
+    """iteration item index if node is in iteration"""
 
 
 class QueueParallelBranchRunSucceededEvent(AppQueueEvent):
@@ -461,6 +473,10 @@ class QueueParallelBranchRunSucceededEvent(AppQueueEvent):
     """parent parallel start node id if node is in parallel"""
     in_iteration_id: Optional[str] = None
     """iteration id if node is in iteration"""
+    in_iteration_index: Optional[int] = None
+    """iteration item index if node is in iteration"""
+    elapsed_time: Optional[float] = None
+    """branch run time in seconds"""
 
 
 class QueueParallelBranchRunFailedEvent(AppQueueEvent):
@@ -478,4 +494,8 @@ class QueueParallelBranchRunFailedEvent(AppQueueEvent):
     """parent parallel start node id if node is in parallel"""
     in_iteration_id: Optional[str] = None
     """iteration id if node is in iteration"""
+    in_iteration_index: Optional[int] = None
+    """iteration item index if node is in iteration"""
     error: str
+    elapsed_time: Optional[float] = None
+    """branch run time in seconds"""
@@ -1,11 +1,15 @@
-import base64
 import logging
+import pickle
+import threading
 from typing import Optional, cast
 
 import numpy as np
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 
+from configs import dify_config
 from core.embedding.embedding_constant import EmbeddingInputType
+from core.helper.lru_cache import LRUCache
 from core.model_manager import ModelInstance
 from core.model_runtime.entities.model_entities import ModelPropertyKey
 from core.model_runtime.model_providers.__base.text_embedding_model import TextEmbeddingModel
@@ -17,6 +21,32 @@ from models.dataset import Embedding
 
 logger = logging.getLogger(__name__)
 
+# max number of hashes per cache lookup `IN (...)` query and rows per cache upsert
+EMBEDDING_CACHE_BATCH_SIZE = 1000
+
+QUERY_EMBEDDING_REDIS_CACHE_TTL = 600
+
+
+class _CacheStats:
+    def __init__(self) -> None:
+        self._counters = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+
+_query_embedding_local_cache = LRUCache(
+    capacity=dify_config.QUERY_EMBEDDING_LOCAL_CACHE_CAPACITY,
+    ttl=dify_config.QUERY_EMBEDDING_LOCAL_CACHE_TTL,
+)
+_query_embedding_cache_stats = _CacheStats()
+
 
 class CacheEmbedding(Embeddings):
     def __init__(self, model_instance: ModelInstance, user: Optional[str] = None) -> None:
@@ -27,22 +57,20 @@ class CacheEmbedding(Embeddings):
         """Embed search docs in batches of 10."""
         # use doc embedding cache or store if not exists
         text_embeddings = [None for _ in range(len(texts))]
-        embedding_queue_indices = []
-        for i, text in enumerate(texts):
-            hash = helper.generate_text_hash(text)
-            embedding = (
-                db.session.query(Embedding)
-                .filter_by(
-                    model_name=self._model_instance.model, hash=hash, provider_name=self._model_instance.provider
-                )
-                .first()
-            )
-            if embedding:
-                text_embeddings[i] = embedding.get_embedding()
+        text_hashes = [helper.generate_text_hash(text) for text in texts]
+        cached_embeddings = self._get_cached_embeddings(text_hashes)
+
+        # texts sharing the same hash only need to be embedded once
+        embedding_queue_indices: dict[str, list[int]] = {}
+        for i, hash in enumerate(text_hashes):
+            embedding = cached_embeddings.get(hash)
+            if embedding is not None:
+                text_embeddings[i] = embedding
             else:
-                embedding_queue_indices.append(i)
+                embedding_queue_indices.setdefault(hash, []).append(i)
         if embedding_queue_indices:
-            embedding_queue_texts = [texts[i] for i in embedding_queue_indices]
+            embedding_queue_hashes = list(embedding_queue_indices.keys())
+            embedding_queue_texts = [texts[embedding_queue_indices[hash][0]] for hash in embedding_queue_hashes]
             embedding_queue_embeddings = []
             try:
                 model_type_instance = cast(TextEmbeddingModel, self._model_instance.model_type_instance)
@@ -69,23 +97,12 @@ class CacheEmbedding(Embeddings):
                             db.session.rollback()
                         except Exception as e:
                             logging.exception("Failed transform embedding: %s", e)
-                cache_embeddings = []
-                try:
-                    for i, embedding in zip(embedding_queue_indices, embedding_queue_embeddings):
+                new_embeddings = {}
+                for hash, embedding in zip(embedding_queue_hashes, embedding_queue_embeddings):
+                    for i in embedding_queue_indices[hash]:
                         text_embeddings[i] = embedding
-                        hash = helper.generate_text_hash(texts[i])
-                        if hash not in cache_embeddings:
-                            embedding_cache = Embedding(
-                                model_name=self._model_instance.model,
-                                hash=hash,
-                                provider_name=self._model_instance.provider,
-                            )
-                            embedding_cache.set_embedding(embedding)
-                            db.session.add(embedding_cache)
-                            cache_embeddings.append(hash)
-                    db.session.commit()
-                except IntegrityError:
-                    db.session.rollback()
+                    new_embeddings[hash] = embedding
+                self._save_cached_embeddings(new_embeddings)
             except Exception as ex:
                 db.session.rollback()
                 logger.error("Failed to embed documents: %s", ex)
@@ -93,15 +110,74 @@ class CacheEmbedding(Embeddings):
 
         return text_embeddings
 
+    def _get_cached_embeddings(self, text_hashes: list[str]) -> dict[str, list[float]]:
+        """Fetch cached document embeddings with one `IN` query per batch of hashes."""
+        unique_hashes = list(dict.fromkeys(text_hashes))
+        cached_embeddings = {}
+        for i in range(0, len(unique_hashes), EMBEDDING_CACHE_BATCH_SIZE):
+            batch_hashes = unique_hashes[i : i + EMBEDDING_CACHE_BATCH_SIZE]
+            rows = (
+                db.session.query(Embedding.hash, Embedding.embedding)
+                .filter(
+                    Embedding.model_name == self._model_instance.model,
+                    Embedding.provider_name == self._model_instance.provider,
+                    Embedding.hash.in_(batch_hashes),
+                )
+                .all()
+            )
+            cached_embeddings.update({row.hash: pickle.loads(row.embedding) for row in rows})
+        return cached_embeddings
+
+    def _save_cached_embeddings(self, embeddings: dict[str, list[float]]) -> None:
+        """Write new document embeddings back with one multi-row upsert per batch."""
+        if not embeddings:
+            return
+        values = [
+            {
+                "model_name": self._model_instance.model,
+                "hash": hash,
+                "provider_name": self._model_instance.provider,
+                "embedding": pickle.dumps(embedding, protocol=pickle.HIGHEST_PROTOCOL),
+            }
+            for hash, embedding in embeddings.items()
+        ]
+        try:
+            for i in range(0, len(values), EMBEDDING_CACHE_BATCH_SIZE):
+                stmt = (
+                    insert(Embedding)
+                    .values(values[i : i + EMBEDDING_CACHE_BATCH_SIZE])
+                    .on_conflict_do_nothing(index_elements=["model_name", "hash", "provider_name"])
+                )
+                db.session.execute(stmt)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
     def embed_query(self, text: str) -> list[float]:
         """Embed query text."""
-        # use doc embedding cache or store if not exists
+        # use the in-process cache first, then the shared redis cache, then the model
         hash = helper.generate_text_hash(text)
-        embedding_cache_key = f"{self._model_instance.provider}_{self._model_instance.model}_{hash}"
-        embedding = redis_client.get(embedding_cache_key)
+        embedding_cache_key = f"{self._model_instance.provider}_{self._model_instance.model}_{hash}_f32"
+        embedding_vector = _query_embedding_local_cache.get(embedding_cache_key)
+        if embedding_vector is not None:
+            _query_embedding_cache_stats.incr("local_hits")
+            return embedding_vector.tolist()
+
+        try:
+            pipeline = redis_client.pipeline(transaction=False)
+            pipeline.get(embedding_cache_key)
+            pipeline.expire(embedding_cache_key, QUERY_EMBEDDING_REDIS_CACHE_TTL)
+            embedding, _ = pipeline.execute()
+        except Exception as ex:
+            logging.exception("Failed to get embedding from redis %s", ex)
+            embedding = None
         if embedding:
-            redis_client.expire(embedding_cache_key, 600)
-            return list(np.frombuffer(base64.b64decode(embedding), dtype="float"))
+            _query_embedding_cache_stats.incr("redis_hits")
+            embedding_vector = np.frombuffer(embedding, dtype=np.float32)
+            _query_embedding_local_cache.put(embedding_cache_key, embedding_vector)
+            return embedding_vector.tolist()
+
+        _query_embedding_cache_stats.incr("misses")
         try:
             embedding_result = self._model_instance.invoke_text_embedding(
                 texts=[text], user=self._user, input_type=EmbeddingInputType.QUERY
@@ -112,16 +188,17 @@ class CacheEmbedding(Embeddings):
         except Exception as ex:
             raise ex
 
+        embedding_vector = np.array(embedding_results, dtype=np.float32)
+        _query_embedding_local_cache.put(embedding_cache_key, embedding_vector)
         try:
-            # encode embedding to base64
-            embedding_vector = np.array(embedding_results)
-            vector_bytes = embedding_vector.tobytes()
-            # Transform to Base64
-            encoded_vector = base64.b64encode(vector_bytes)
-            # Transform to string
-            encoded_str = encoded_vector.decode("utf-8")
-            redis_client.setex(embedding_cache_key, 600, encoded_str)
+            # store the raw float32 buffer, redis values are binary safe
+            redis_client.setex(embedding_cache_key, QUERY_EMBEDDING_REDIS_CACHE_TTL, embedding_vector.tobytes())
         except Exception as ex:
             logging.exception("Failed to add embedding to redis %s", ex)
 
         return embedding_results
+
+    @staticmethod
+    def get_query_cache_stats() -> dict[str, int]:
+        """Hit and miss counters of the query embedding cache in this process, for monitoring."""
+        return _query_embedding_cache_stats.snapshot()
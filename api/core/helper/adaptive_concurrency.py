@@ -0,0 +1,85 @@
+import threading
+from typing import Optional
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limit of concurrent calls to a rate limited service, adapted to how the service responds.
+
+    The limit grows by one after each window of `limit` calls answered within the latency tolerance of the
+    usual latency, drops by one when a call is slower than that, and is halved when the service rate limits.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        initial_limit: Optional[int] = None,
+        min_limit: int = 1,
+        latency_tolerance: float = 2.0,
+    ) -> None:
+        """
+        :param max_limit: max number of concurrent calls
+        :param initial_limit: number of concurrent calls allowed at first, half of the max by default
+        :param min_limit: min number of concurrent calls
+        :param latency_tolerance: calls slower than this factor of the usual latency reduce the limit
+        """
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.latency_tolerance = latency_tolerance
+        self._limit = max(self.min_limit, min(initial_limit or max_limit // 2, max_limit))
+        self._in_flight = 0
+        self._window_successes = 0
+        # moving average of the latency, the usual latency of the service
+        self._latency: Optional[float] = None
+        self._condition = threading.Condition()
+        self.peak_limit = self._limit
+        self.rate_limited_count = 0
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def acquire(self) -> None:
+        """
+        Wait until a call is allowed, the caller must `release` it when the call is done.
+        """
+        with self._condition:
+            while self._in_flight >= self._limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self, latency: float) -> None:
+        """
+        Record a call answered in the given latency.
+        :param latency: latency in seconds
+        """
+        with self._condition:
+            if self._latency is not None and latency > self._latency * self.latency_tolerance:
+                self._set_limit(self._limit - 1)
+                self._window_successes = 0
+            else:
+                self._window_successes += 1
+                if self._window_successes >= self._limit:
+                    self._set_limit(self._limit + 1)
+                    self._window_successes = 0
+
+            self._latency = latency if self._latency is None else self._latency * 0.8 + latency * 0.2
+
+    def on_rate_limited(self) -> None:
+        """
+        Record a call rejected by the rate limit of the service.
+        """
+        with self._condition:
+            self.rate_limited_count += 1
+            self._set_limit(self._limit // 2)
+            self._window_successes = 0
+
+    def _set_limit(self, limit: int) -> None:
+        self._limit = max(self.min_limit, min(limit, self.max_limit))
+        self.peak_limit = max(self.peak_limit, self._limit)
+        self._condition.notify_all()
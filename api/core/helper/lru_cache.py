@@ -1,22 +1,47 @@
+import threading
+import time
 from collections import OrderedDict
-from typing import Any
+from typing import Any, Optional
 
 
 class LRUCache:
-    def __init__(self, capacity: int):
+    """
+    Thread-safe bounded LRU cache, entries optionally expire `ttl` seconds after they were put.
+    """
+
+    def __init__(self, capacity: int, ttl: Optional[float] = None):
         self.cache = OrderedDict()
         self.capacity = capacity
+        self.ttl = ttl
+        self._lock = threading.Lock()
 
     def get(self, key: Any) -> Any:
-        if key not in self.cache:
-            return None
-        else:
+        with self._lock:
+            if key not in self.cache:
+                return None
+            value, expire_at = self.cache[key]
+            if expire_at is not None and expire_at <= time.monotonic():
+                del self.cache[key]
+                return None
             self.cache.move_to_end(key)  # move the key to the end of the OrderedDict
-            return self.cache[key]
+            return value
 
     def put(self, key: Any, value: Any) -> None:
-        if key in self.cache:
-            self.cache.move_to_end(key)
-        self.cache[key] = value
-        if len(self.cache) > self.capacity:
-            self.cache.popitem(last=False)  # pop the first item
+        expire_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+            self.cache[key] = (value, expire_at)
+            if len(self.cache) > self.capacity:
+                self.cache.popitem(last=False)  # pop the first item
+
+    def delete(self, key: Any) -> None:
+        with self._lock:
+            self.cache.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.cache.clear()
+
+    def __len__(self) -> int:
+        return len(self.cache)
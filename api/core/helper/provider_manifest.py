@@ -0,0 +1,93 @@
+import hashlib
+import json
+import logging
+import os
+from threading import Lock
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+class ProviderManifest:
+    """
+    Prebuilt manifest of the builtin providers of a directory, holding what listing the providers needs
+    (names, positions, icons, schemas) so the provider modules are only imported when a provider is used.
+
+    The manifest is built by `flask build-provider-manifests` and is ignored once the files of the directory
+    changed, then the providers are scanned as if there was no manifest.
+    """
+
+    def __init__(self, providers_path: str, file_name: str = "_manifest.json") -> None:
+        self.providers_path = providers_path
+        self.path = os.path.join(providers_path, file_name)
+        self._lock = Lock()
+        self._loaded = False
+        self._providers: Optional[dict[str, dict[str, Any]]] = None
+
+    def load(self) -> Optional[dict[str, dict[str, Any]]]:
+        """
+        Load the providers of the manifest, cached after the first call.
+        :return: manifest entries by provider name in position order, None if there is no up to date manifest
+        """
+        if self._loaded:
+            return self._providers
+
+        with self._lock:
+            if not self._loaded:
+                self._providers = self._load()
+                self._loaded = True
+
+        return self._providers
+
+    def save(self, providers: dict[str, dict[str, Any]]) -> None:
+        """
+        Write the manifest of the providers.
+        :param providers: manifest entries by provider name in position order
+        """
+        manifest = {"version": MANIFEST_VERSION, "fingerprint": self.fingerprint(), "providers": providers}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+        with self._lock:
+            self._providers = providers
+            self._loaded = True
+
+    def fingerprint(self) -> str:
+        """
+        Fingerprint of the files of the providers directory, from their paths, sizes and modification times.
+        """
+        manifest_file_names = {os.path.basename(self.path), f"{os.path.basename(self.path)}.tmp"}
+        digest = hashlib.sha256()
+        for dir_path, dir_names, file_names in os.walk(self.providers_path):
+            dir_names[:] = sorted(dir_name for dir_name in dir_names if dir_name != "__pycache__")
+            for file_name in sorted(file_names):
+                if dir_path == self.providers_path and file_name in manifest_file_names:
+                    continue
+                file_path = os.path.join(dir_path, file_name)
+                stat = os.stat(file_path)
+                relative_path = os.path.relpath(file_path, self.providers_path)
+                digest.update(f"{relative_path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+
+    def _load(self) -> Optional[dict[str, dict[str, Any]]]:
+        if not os.path.exists(self.path):
+            return None
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except Exception as e:
+            logger.warning(f"failed to load provider manifest {self.path}: {e}")
+            return None
+
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("fingerprint") != self.fingerprint():
+            logger.warning(
+                f"provider manifest {self.path} is outdated, rebuild it with `flask build-provider-manifests`"
+            )
+            return None
+
+        return manifest["providers"]
@@ -13,15 +13,19 @@ from flask_login import current_user
 from sqlalchemy.orm.exc import ObjectDeletedError
 
 from configs import dify_config
+from core.embedding.cached_embedding import CacheEmbedding
 from core.errors.error import ProviderTokenNotInitError
 from core.llm_generator.llm_generator import LLMGenerator
 from core.model_manager import ModelInstance, ModelManager
-from core.model_runtime.entities.model_entities import ModelType
+from core.model_runtime.entities.model_entities import ModelPropertyKey, ModelType
+from core.model_runtime.model_providers.__base.text_embedding_model import TextEmbeddingModel
 from core.rag.datasource.keyword.keyword_factory import Keyword
 from core.rag.docstore.dataset_docstore import DatasetDocumentStore
 from core.rag.extractor.entity.extract_setting import ExtractSetting
+from core.rag.index_processor.index_load_pipeline import IndexLoadPipeline
 from core.rag.index_processor.index_processor_base import BaseIndexProcessor
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
+from core.rag.index_processor.indexing_checkpoint import IndexingCheckpoint
 from core.rag.models.document import Document
 from core.rag.splitter.fixed_text_splitter import (
     EnhanceRecursiveCharacterTextSplitter,
@@ -61,12 +65,20 @@ class IndexingRunner:
                 )
                 index_type = dataset_document.doc_form
                 index_processor = IndexProcessorFactory(index_type).init_index_processor()
+                checkpoint = IndexingCheckpoint(
+                    dataset.tenant_id, dataset_document.id, enabled=dify_config.INDEXING_CHECKPOINT_ENABLED
+                )
                 # extract
-                text_docs = self._extract(index_processor, dataset_document, processing_rule.to_dict())
+                text_docs = self._extract(index_processor, dataset_document, processing_rule.to_dict(), checkpoint)
 
                 # transform
                 documents = self._transform(
-                    index_processor, dataset, text_docs, dataset_document.doc_language, processing_rule.to_dict()
+                    index_processor,
+                    dataset,
+                    text_docs,
+                    dataset_document.doc_language,
+                    processing_rule.to_dict(),
+                    checkpoint,
                 )
                 # save segment
                 self._load_segments(dataset, dataset_document, documents)
@@ -78,6 +90,7 @@ class IndexingRunner:
                     dataset_document=dataset_document,
                     documents=documents,
                 )
+                checkpoint.clear()
             except DocumentIsPausedError:
                 raise DocumentIsPausedError("Document paused, document id: {}".format(dataset_document.id))
             except ProviderTokenNotInitError as e:
@@ -120,12 +133,20 @@ class IndexingRunner:
 
             index_type = dataset_document.doc_form
             index_processor = IndexProcessorFactory(index_type).init_index_processor()
+            checkpoint = IndexingCheckpoint(
+                dataset.tenant_id, dataset_document.id, enabled=dify_config.INDEXING_CHECKPOINT_ENABLED
+            )
             # extract
-            text_docs = self._extract(index_processor, dataset_document, processing_rule.to_dict())
+            text_docs = self._extract(index_processor, dataset_document, processing_rule.to_dict(), checkpoint)
 
             # transform
             documents = self._transform(
-                index_processor, dataset, text_docs, dataset_document.doc_language, processing_rule.to_dict()
+                index_processor,
+                dataset,
+                text_docs,
+                dataset_document.doc_language,
+                processing_rule.to_dict(),
+                checkpoint,
             )
             # save segment
             self._load_segments(dataset, dataset_document, documents)
@@ -134,6 +155,7 @@ class IndexingRunner:
             self._load(
                 index_processor=index_processor, dataset=dataset, dataset_document=dataset_document, documents=documents
             )
+            checkpoint.clear()
         except DocumentIsPausedError:
             raise DocumentIsPausedError("Document paused, document id: {}".format(dataset_document.id))
         except ProviderTokenNotInitError as e:
@@ -189,9 +211,17 @@ class IndexingRunner:
 
             index_type = dataset_document.doc_form
             index_processor = IndexProcessorFactory(index_type).init_index_processor()
+            # completed segments are kept, the batches interrupted while written are loaded again from scratch
+            if documents:
+                try:
+                    index_processor.clean(dataset, [document.metadata["doc_id"] for document in documents])
+                except Exception:
+                    logging.exception("clean index of uncompleted segments failed")
             self._load(
                 index_processor=index_processor, dataset=dataset, dataset_document=dataset_document, documents=documents
             )
+            # the extract and split results of the interrupted run are not needed anymore
+            IndexingCheckpoint.delete_document_checkpoints(dataset_document.id)
         except DocumentIsPausedError:
             raise DocumentIsPausedError("Document paused, document id: {}".format(dataset_document.id))
         except ProviderTokenNotInitError as e:
@@ -206,6 +236,18 @@ class IndexingRunner:
             dataset_document.stopped_at = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
             db.session.commit()
 
+    @staticmethod
+    def can_resume_indexing(dataset_document: DatasetDocument) -> bool:
+        """
+        Whether all segments of the current processing of the document were saved, then a retry resumes
+        from the segments not completed yet instead of extracting and splitting the document again.
+        """
+        return bool(
+            dataset_document.processing_started_at
+            and dataset_document.splitting_completed_at
+            and dataset_document.splitting_completed_at >= dataset_document.processing_started_at
+        )
+
     def indexing_estimate(
         self,
         tenant_id: str,
@@ -289,7 +331,11 @@ class IndexingRunner:
         return {"total_segments": total_segments, "preview": preview_texts}
 
     def _extract(
-        self, index_processor: BaseIndexProcessor, dataset_document: DatasetDocument, process_rule: dict
+        self,
+        index_processor: BaseIndexProcessor,
+        dataset_document: DatasetDocument,
+        process_rule: dict,
+        checkpoint: Optional[IndexingCheckpoint] = None,
     ) -> list[Document]:
         # load file
         if dataset_document.data_source_type not in {"upload_file", "notion_import", "website_crawl"}:
@@ -309,7 +355,21 @@ class IndexingRunner:
                 extract_setting = ExtractSetting(
                     datasource_type="upload_file", upload_file=file_detail, document_model=dataset_document.doc_form
                 )
-                text_docs = index_processor.extract(extract_setting, process_rule_mode=process_rule["mode"])
+                # text extracted by an interrupted run of the same file is reused
+                checkpoint_settings = {
+                    "doc_form": dataset_document.doc_form,
+                    "process_rule_mode": process_rule["mode"],
+                    "etl_type": dify_config.ETL_TYPE,
+                }
+                checkpoint_docs = (
+                    checkpoint.load("extract", file_detail.hash, checkpoint_settings) if checkpoint else None
+                )
+                if checkpoint_docs is not None:
+                    text_docs = checkpoint_docs
+                else:
+                    text_docs = index_processor.extract(extract_setting, process_rule_mode=process_rule["mode"])
+                    if checkpoint:
+                        checkpoint.save("extract", file_detail.hash, checkpoint_settings, text_docs)
         elif dataset_document.data_source_type == "notion_import":
             if (
                 not data_source_info
@@ -645,38 +705,30 @@ class IndexingRunner:
                 model=dataset.embedding_model,
             )
 
-        # chunk nodes by chunk size
         indexing_start_at = time.perf_counter()
         tokens = 0
-        chunk_size = 10
+        indexing_metadata = {}
+        flask_app = current_app._get_current_object()
 
         # create keyword index
-        create_keyword_thread = threading.Thread(
-            target=self._process_keyword_index,
-            args=(current_app._get_current_object(), dataset.id, dataset_document.id, documents),
-        )
-        create_keyword_thread.start()
-        if dataset.indexing_technique == "high_quality":
-            with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                futures = []
-                for i in range(0, len(documents), chunk_size):
-                    chunk_documents = documents[i : i + chunk_size]
-                    futures.append(
-                        executor.submit(
-                            self._process_chunk,
-                            current_app._get_current_object(),
-                            index_processor,
-                            chunk_documents,
-                            dataset,
-                            dataset_document,
-                            embedding_model_instance,
-                        )
-                    )
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as keyword_executor:
+            keyword_future = keyword_executor.submit(
+                self._process_keyword_index, flask_app, dataset.id, dataset_document.id, documents
+            )
+            if dataset.indexing_technique == "high_quality":
+                pipeline = self._get_load_pipeline(
+                    flask_app, index_processor, dataset, dataset_document, embedding_model_instance
+                )
+                tokens = pipeline.run(documents)
+                indexing_metadata = pipeline.get_stats()
 
-                for future in futures:
-                    tokens += future.result()
+            keyword_latency = keyword_future.result()
+            indexing_metadata.setdefault("stages", {})["keyword"] = {
+                "documents": len(documents),
+                "seconds": round(keyword_latency, 3),
+                "documents_per_second": round(len(documents) / keyword_latency, 2) if keyword_latency else None,
+            }
 
-        create_keyword_thread.join()
         indexing_end_at = time.perf_counter()
 
         # update document status to completed
@@ -687,69 +739,89 @@ class IndexingRunner:
                 DatasetDocument.tokens: tokens,
                 DatasetDocument.completed_at: datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None),
                 DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
+                DatasetDocument.indexing_metadata: indexing_metadata,
                 DatasetDocument.error: None,
             },
         )
 
+    def _get_load_pipeline(
+        self,
+        flask_app: Flask,
+        index_processor: BaseIndexProcessor,
+        dataset: Dataset,
+        dataset_document: DatasetDocument,
+        embedding_model_instance: ModelInstance,
+    ) -> IndexLoadPipeline:
+        cache_embedding = CacheEmbedding(embedding_model_instance)
+
+        def embed(documents: list[Document]) -> tuple[list[list[float]], int]:
+            texts = [document.page_content for document in documents]
+            embeddings = cache_embedding.embed_documents(texts)
+            tokens = sum(embedding_model_instance.get_text_embedding_num_tokens_per_text(texts=texts))
+            return embeddings, tokens
+
+        def write(documents: list[Document], embeddings: list[list[float]]) -> None:
+            index_processor.load(dataset, documents, with_keywords=False, embeddings=embeddings)
+
+        def complete(documents: list[Document]) -> None:
+            self._complete_segments(dataset.id, dataset_document.id, documents)
+
+        return IndexLoadPipeline(
+            flask_app=flask_app,
+            embed=embed,
+            write=write,
+            complete=complete,
+            batch_size=self._get_embedding_batch_size(embedding_model_instance),
+            max_concurrency=dify_config.INDEXING_EMBEDDING_MAX_CONCURRENCY,
+            max_retries=dify_config.INDEXING_EMBEDDING_MAX_RETRIES,
+            retry_backoff=dify_config.INDEXING_EMBEDDING_RETRY_BACKOFF,
+            before_batch=lambda: self._check_document_paused_status(dataset_document.id),
+        )
+
     @staticmethod
-    def _process_keyword_index(flask_app, dataset_id, document_id, documents):
+    def _get_embedding_batch_size(embedding_model_instance: ModelInstance) -> int:
+        """
+        Number of texts the embedding model takes per call, from the max chunks of its schema.
+        """
+        model_type_instance = cast(TextEmbeddingModel, embedding_model_instance.model_type_instance)
+        model_schema = model_type_instance.get_model_schema(
+            embedding_model_instance.model, embedding_model_instance.credentials
+        )
+        if model_schema and ModelPropertyKey.MAX_CHUNKS in model_schema.model_properties:
+            return model_schema.model_properties[ModelPropertyKey.MAX_CHUNKS]
+        return 1
+
+    @staticmethod
+    def _process_keyword_index(flask_app, dataset_id, document_id, documents) -> float:
         with flask_app.app_context():
+            start_at = time.perf_counter()
             dataset = Dataset.query.filter_by(id=dataset_id).first()
             if not dataset:
                 raise ValueError("no dataset found")
             keyword = Keyword(dataset)
             keyword.create(documents)
             if dataset.indexing_technique != "high_quality":
-                document_ids = [document.metadata["doc_id"] for document in documents]
-                db.session.query(DocumentSegment).filter(
-                    DocumentSegment.document_id == document_id,
-                    DocumentSegment.dataset_id == dataset_id,
-                    DocumentSegment.index_node_id.in_(document_ids),
-                    DocumentSegment.status == "indexing",
-                ).update(
-                    {
-                        DocumentSegment.status: "completed",
-                        DocumentSegment.enabled: True,
-                        DocumentSegment.completed_at: datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None),
-                    }
-                )
-
-                db.session.commit()
+                IndexingRunner._complete_segments(dataset_id, document_id, documents)
 
-    def _process_chunk(
-        self, flask_app, index_processor, chunk_documents, dataset, dataset_document, embedding_model_instance
-    ):
-        with flask_app.app_context():
-            # check document is paused
-            self._check_document_paused_status(dataset_document.id)
-
-            tokens = 0
-            if embedding_model_instance:
-                tokens += sum(
-                    embedding_model_instance.get_text_embedding_num_tokens([document.page_content])
-                    for document in chunk_documents
-                )
-
-            # load index
-            index_processor.load(dataset, chunk_documents, with_keywords=False)
-
-            document_ids = [document.metadata["doc_id"] for document in chunk_documents]
-            db.session.query(DocumentSegment).filter(
-                DocumentSegment.document_id == dataset_document.id,
-                DocumentSegment.dataset_id == dataset.id,
-                DocumentSegment.index_node_id.in_(document_ids),
-                DocumentSegment.status == "indexing",
-            ).update(
-                {
-                    DocumentSegment.status: "completed",
-                    DocumentSegment.enabled: True,
-                    DocumentSegment.completed_at: datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None),
-                }
-            )
+            return time.perf_counter() - start_at
 
-            db.session.commit()
+    @staticmethod
+    def _complete_segments(dataset_id: str, document_id: str, documents: list[Document]) -> None:
+        document_ids = [document.metadata["doc_id"] for document in documents]
+        db.session.query(DocumentSegment).filter(
+            DocumentSegment.document_id == document_id,
+            DocumentSegment.dataset_id == dataset_id,
+            DocumentSegment.index_node_id.in_(document_ids),
+            DocumentSegment.status == "indexing",
+        ).update(
+            {
+                DocumentSegment.status: "completed",
+                DocumentSegment.enabled: True,
+                DocumentSegment.completed_at: datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None),
+            }
+        )
 
-            return tokens
+        db.session.commit()
 
     @staticmethod
     def _check_document_paused_status(document_id: str):
@@ -817,6 +889,7 @@ class IndexingRunner:
         text_docs: list[Document],
         doc_language: str,
         process_rule: dict,
+        checkpoint: Optional[IndexingCheckpoint] = None,
     ) -> list[Document]:
         # get embedding model instance
         embedding_model_instance = None
@@ -834,6 +907,27 @@ class IndexingRunner:
                     model_type=ModelType.TEXT_EMBEDDING,
                 )
 
+        # documents split by an interrupted run of the same text and rules are reused
+        checkpoint_hash = IndexingCheckpoint.hash_documents(text_docs) if text_docs else None
+        checkpoint_settings = {
+            "index_processor": type(index_processor).__name__,
+            "process_rule": process_rule,
+            "doc_language": doc_language,
+            "embedding_model": (
+                [embedding_model_instance.provider, embedding_model_instance.model]
+                if embedding_model_instance
+                else None
+            ),
+        }
+        documents = checkpoint.load("split", checkpoint_hash, checkpoint_settings) if checkpoint else None
+        if documents is not None:
+            # the segments of the interrupted run were removed, and the checkpoint may come from another document
+            for document in documents:
+                document.metadata["doc_id"] = str(uuid.uuid4())
+                document.metadata["document_id"] = text_docs[0].metadata["document_id"]
+                document.metadata["dataset_id"] = text_docs[0].metadata["dataset_id"]
+            return documents
+
         documents = index_processor.transform(
             text_docs,
             embedding_model_instance=embedding_model_instance,
@@ -841,6 +935,8 @@ class IndexingRunner:
             tenant_id=dataset.tenant_id,
             doc_language=doc_language,
         )
+        if checkpoint:
+            checkpoint.save("split", checkpoint_hash, checkpoint_settings, documents)
 
         return documents
 
@@ -1,3 +1,4 @@
+import zlib
 from typing import Optional
 
 from core.app.app_config.features.file_upload.manager import FileUploadConfigManager
@@ -12,6 +13,7 @@ from core.model_runtime.entities.message_entities import (
     UserPromptMessage,
 )
 from core.prompt.utils.extract_thread_messages import extract_thread_messages
+from core.prompt.utils.prompt_message_token_counter import PromptMessageTokenCounter
 from extensions.ext_database import db
 from models.model import AppMode, Conversation, Message, MessageFile
 from models.workflow import WorkflowRun
@@ -63,6 +65,9 @@ class TokenBufferMemory:
 
         message_file_parser = MessageFileParser(tenant_id=app_record.tenant_id, app_id=app_record.id)
         prompt_messages = []
+        # token count cache keys, messages with files are keyed by their content and the others by their id
+        # and a fingerprint of their text, as the answer of a message is updated while it is generated
+        prompt_message_keys = []
         for message in messages:
             files = db.session.query(MessageFile).filter(MessageFile.message_id == message.id).all()
             if files:
@@ -87,30 +92,28 @@ class TokenBufferMemory:
 
                 if not file_objs:
                     prompt_messages.append(UserPromptMessage(content=message.query))
+                    prompt_message_keys.append(self._get_prompt_message_key(message.id, "query", message.query))
                 else:
                     prompt_message_contents = [TextPromptMessageContent(data=message.query)]
                     for file_obj in file_objs:
                         prompt_message_contents.append(file_obj.prompt_message_content)
 
                     prompt_messages.append(UserPromptMessage(content=prompt_message_contents))
+                    prompt_message_keys.append(None)
             else:
                 prompt_messages.append(UserPromptMessage(content=message.query))
+                prompt_message_keys.append(self._get_prompt_message_key(message.id, "query", message.query))
 
             prompt_messages.append(AssistantPromptMessage(content=message.answer))
+            prompt_message_keys.append(self._get_prompt_message_key(message.id, "answer", message.answer))
 
         if not prompt_messages:
             return []
 
         # prune the chat message if it exceeds the max token limit
-        curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
-
-        if curr_message_tokens > max_token_limit:
-            pruned_memory = []
-            while curr_message_tokens > max_token_limit and len(prompt_messages) > 1:
-                pruned_memory.append(prompt_messages.pop(0))
-                curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
-
-        return prompt_messages
+        return PromptMessageTokenCounter(self.model_instance).prune(
+            prompt_messages, max_token_limit, keys=prompt_message_keys
+        )
 
     def get_history_prompt_text(
         self,
@@ -152,3 +155,8 @@ class TokenBufferMemory:
                 string_messages.append(message)
 
         return "\n".join(string_messages)
+
+    @staticmethod
+    def _get_prompt_message_key(message_id: str, field: str, text: Optional[str]) -> str:
+        text = text or ""
+        return f"{message_id}:{field}:{len(text)}:{zlib.crc32(text.encode()):08x}"
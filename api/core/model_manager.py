@@ -201,6 +201,24 @@ class ModelInstance:
             texts=texts,
         )
 
+    def get_text_embedding_num_tokens_per_text(self, texts: list[str]) -> list[int]:
+        """
+        Get number of tokens of each text for text embedding
+
+        :param texts: texts to embed
+        :return: number of tokens of each text
+        """
+        if not isinstance(self.model_type_instance, TextEmbeddingModel):
+            raise Exception("Model type instance is not TextEmbeddingModel")
+
+        self.model_type_instance = cast(TextEmbeddingModel, self.model_type_instance)
+        return self._round_robin_invoke(
+            function=self.model_type_instance.get_num_tokens_per_text,
+            model=self.model,
+            credentials=self.credentials,
+            texts=texts,
+        )
+
     def invoke_rerank(
         self,
         query: str,
@@ -1,10 +1,98 @@
+import json
+from abc import ABC, abstractmethod
 from os.path import abspath, dirname, join
 from threading import Lock
-from typing import Any
+from typing import Any, Optional
 
-from transformers import GPT2Tokenizer as TransformerGPT2Tokenizer
+GPT2_TOKENIZER_PATH = join(dirname(abspath(__file__)), "gpt2")
+# pre-tokenization pattern of gpt2, the same as the one of the transformers tokenizer
+GPT2_PAT_STR = r"""'(?:[sdmt]|ll|ve|re)| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+"""
+GPT2_END_OF_TEXT = "<|endoftext|>"
 
-_tokenizer = None
+
+class GPT2TokenizerBackend(ABC):
+    """
+    Backend of the gpt2 tokenizer, loaded once per process and shared by all threads.
+    """
+
+    @abstractmethod
+    def encode_batch(self, texts: list[str]) -> list[list[int]]:
+        """
+        Encode texts to gpt2 tokens.
+        :param texts: texts to encode
+        :return: tokens of each text
+        """
+        raise NotImplementedError
+
+    def encode(self, text: str) -> list[int]:
+        return self.encode_batch([text])[0]
+
+
+class TiktokenGPT2TokenizerBackend(GPT2TokenizerBackend):
+    """
+    Rust BPE of tiktoken with the bundled gpt2 vocab, encodes the same tokens as the transformers tokenizer.
+    Encoding is thread-safe. Batches are encoded in the calling thread, the thread pool of tiktoken's
+    encode_batch costs more than it saves in gevent workers.
+    """
+
+    def __init__(self) -> None:
+        import tiktoken
+
+        self._encoding = tiktoken.Encoding(
+            name="gpt2",
+            pat_str=GPT2_PAT_STR,
+            mergeable_ranks=self._load_mergeable_ranks(),
+            special_tokens={GPT2_END_OF_TEXT: 50256},
+        )
+
+    def encode(self, text: str) -> list[int]:
+        return self._encoding.encode(text, allowed_special="all")
+
+    def encode_batch(self, texts: list[str]) -> list[list[int]]:
+        return [self._encoding.encode(text, allowed_special="all") for text in texts]
+
+    @staticmethod
+    def _load_mergeable_ranks() -> dict[bytes, int]:
+        # tokens of vocab.json are bytes mapped to printable characters, the ids of gpt2 are the merge ranks
+        printable_bytes = [
+            *range(ord("!"), ord("~") + 1),
+            *range(ord("¡"), ord("¬") + 1),
+            *range(ord("®"), ord("ÿ") + 1),
+        ]
+        byte_decoder = {chr(b): b for b in printable_bytes}
+        for i, b in enumerate(b for b in range(256) if b not in printable_bytes):
+            byte_decoder[chr(256 + i)] = b
+
+        with open(join(GPT2_TOKENIZER_PATH, "vocab.json"), encoding="utf-8") as f:
+            vocab = json.load(f)
+        return {
+            bytes(byte_decoder[c] for c in token): rank for token, rank in vocab.items() if token != GPT2_END_OF_TEXT
+        }
+
+
+class TransformersGPT2TokenizerBackend(GPT2TokenizerBackend):
+    """
+    Pure python gpt2 tokenizer of transformers.
+    """
+
+    def __init__(self) -> None:
+        from transformers import GPT2Tokenizer as TransformerGPT2Tokenizer
+
+        self._tokenizer = TransformerGPT2Tokenizer.from_pretrained(GPT2_TOKENIZER_PATH)
+
+    def encode(self, text: str) -> list[int]:
+        return self._tokenizer.encode(text, verbose=False)
+
+    def encode_batch(self, texts: list[str]) -> list[list[int]]:
+        return [self._tokenizer.encode(text, verbose=False) for text in texts]
+
+
+_backend_classes: dict[str, type[GPT2TokenizerBackend]] = {
+    "tiktoken": TiktokenGPT2TokenizerBackend,
+    "transformers": TransformersGPT2TokenizerBackend,
+}
+_backend_name = "tiktoken"
+_backend: Optional[GPT2TokenizerBackend] = None
 _lock = Lock()
 
 
@@ -14,21 +102,56 @@ class GPT2Tokenizer:
         """
         use gpt2 tokenizer to get num tokens
         """
-        _tokenizer = GPT2Tokenizer.get_encoder()
-        tokens = _tokenizer.encode(text, verbose=False)
-        return len(tokens)
+        return len(GPT2Tokenizer.get_encoder().encode(text))
 
     @staticmethod
     def get_num_tokens(text: str) -> int:
         return GPT2Tokenizer._get_num_tokens_by_gpt2(text)
 
     @staticmethod
-    def get_encoder() -> Any:
-        global _tokenizer, _lock
+    def get_num_tokens_batch(texts: list[str]) -> list[int]:
+        """
+        use gpt2 tokenizer to get num tokens of each text, the texts are encoded in one call
+        """
+        return [len(tokens) for tokens in GPT2Tokenizer.get_encoder().encode_batch(texts)]
+
+    @staticmethod
+    def register_backend(name: str, backend_class: type[GPT2TokenizerBackend]) -> None:
+        """
+        Register a tokenizer backend, selectable with `set_backend`.
+        """
+        _backend_classes[name] = backend_class
+
+    @staticmethod
+    def set_backend(name: str) -> None:
+        """
+        Select the tokenizer backend, it is loaded on first use or by `warm_up`.
+        """
+        global _backend_name, _backend
+        if name not in _backend_classes:
+            raise ValueError(f"Unknown gpt2 tokenizer backend {name}, available: {', '.join(_backend_classes)}")
+
         with _lock:
-            if _tokenizer is None:
-                base_path = abspath(__file__)
-                gpt2_tokenizer_path = join(dirname(base_path), "gpt2")
-                _tokenizer = TransformerGPT2Tokenizer.from_pretrained(gpt2_tokenizer_path)
+            if name != _backend_name:
+                _backend_name = name
+                _backend = None
+
+    @staticmethod
+    def warm_up() -> None:
+        """
+        Load the tokenizer backend ahead of the first request, e.g. when a worker starts.
+        """
+        GPT2Tokenizer.get_encoder().encode(GPT2_END_OF_TEXT)
+
+    @staticmethod
+    def get_encoder() -> Any:
+        global _backend
+        # the lock only guards the first load, encoding does not take it
+        backend = _backend
+        if backend is None:
+            with _lock:
+                if _backend is None:
+                    _backend = _backend_classes[_backend_name]()
+                backend = _backend
 
-            return _tokenizer
+        return backend
@@ -1,12 +1,14 @@
 import logging
 import os
 from collections.abc import Sequence
+from threading import Lock
 from typing import Optional
 
 from pydantic import BaseModel, ConfigDict
 
 from core.helper.module_import_helper import load_single_subclass_from_source
 from core.helper.position_helper import get_provider_position_map, sort_to_dict_by_position_map
+from core.helper.provider_manifest import ProviderManifest
 from core.model_runtime.entities.model_entities import ModelType
 from core.model_runtime.entities.provider_entities import ProviderConfig, ProviderEntity, SimpleProviderEntity
 from core.model_runtime.model_providers.__base.model_provider import ModelProvider
@@ -25,39 +27,57 @@ class ModelProviderExtension(BaseModel):
 
 
 class ModelProviderFactory:
+    """
+    Builtin model providers, loaded on demand.
+
+    Listing providers and their predefined models reads the provider manifest (see `ProviderManifest`) when it is
+    up to date, a provider module is only imported when the provider instance is needed.
+    """
+
     model_provider_extensions: Optional[dict[str, ModelProviderExtension]] = None
 
-    def __init__(self) -> None:
-        # for cache in memory
-        self.get_providers()
+    def __init__(self, manifest: Optional[ProviderManifest] = None) -> None:
+        self._lock = Lock()
+        self._manifest = manifest or ProviderManifest(os.path.dirname(os.path.abspath(__file__)))
+        self._provider_instances: dict[str, ModelProvider] = {}
+        self._provider_entities: Optional[dict[str, ProviderEntity]] = None
 
     def get_providers(self) -> Sequence[ProviderEntity]:
         """
         Get all providers
         :return: list of providers
         """
-        # scan all providers
-        model_provider_extensions = self._get_model_provider_map()
-
-        # traverse all model_provider_extensions
-        providers = []
-        for model_provider_extension in model_provider_extensions.values():
-            # get model_provider instance
-            model_provider_instance = model_provider_extension.provider_instance
+        return list(self._get_provider_entities().values())
 
-            # get provider schema
-            provider_schema = model_provider_instance.get_provider_schema()
+    def get_provider_schema(self, provider: str) -> ProviderEntity:
+        """
+        Get the schema of a provider, without its predefined models
+        :param provider: provider name
+        :return: provider schema
+        """
+        manifest = self._manifest.load()
+        if manifest is not None and provider in manifest:
+            return self._get_provider_entities()[provider].model_copy(update={"models": []})
 
-            for model_type in provider_schema.supported_model_types:
-                # get predefined models for given model type
-                models = model_provider_instance.models(model_type)
-                if models:
-                    provider_schema.models.extend(models)
+        return self.get_provider_instance(provider).get_provider_schema()
 
-            providers.append(provider_schema)
+    def get_manifest(self) -> ProviderManifest:
+        return self._manifest
 
-        # return providers
-        return providers
+    def build_manifest(self) -> dict[str, dict]:
+        """
+        Build the manifest entries of all providers, see `ProviderManifest.save`
+        :return: manifest entries by provider name in position order
+        """
+        return {
+            name: {
+                "position": model_provider_extension.position,
+                "provider_schema": self._build_provider_entity(model_provider_extension.provider_instance).model_dump(
+                    mode="json"
+                ),
+            }
+            for name, model_provider_extension in self._get_model_provider_map().items()
+        }
 
     def provider_credentials_validate(self, *, provider: str, credentials: dict) -> dict:
         """
@@ -141,45 +161,30 @@ class ModelProviderFactory:
         """
         provider_configs = provider_configs or []
 
-        # scan all providers
-        model_provider_extensions = self._get_model_provider_map()
-
         # convert provider_configs to dict
         provider_credentials_dict = {}
         for provider_config in provider_configs:
             provider_credentials_dict[provider_config.provider] = provider_config.credentials
 
-        # traverse all model_provider_extensions
+        # traverse all providers
         providers = []
-        for name, model_provider_extension in model_provider_extensions.items():
+        for name, provider_entity in self._get_provider_entities().items():
             # filter by provider if provider is present
             if provider and name != provider:
                 continue
 
-            # get model_provider instance
-            model_provider_instance = model_provider_extension.provider_instance
-
-            # get provider schema
-            provider_schema = model_provider_instance.get_provider_schema()
-
-            model_types = provider_schema.supported_model_types
+            model_types = provider_entity.supported_model_types
             if model_type:
                 if model_type not in model_types:
                     continue
 
                 model_types = [model_type]
 
-            all_model_type_models = []
-            for model_type in model_types:
-                # get predefined models for given model type
-                models = model_provider_instance.models(
-                    model_type=model_type,
-                )
-
-                all_model_type_models.extend(models)
-
-            simple_provider_schema = provider_schema.to_simple_provider()
-            simple_provider_schema.models.extend(all_model_type_models)
+            simple_provider_schema = provider_entity.to_simple_provider()
+            # predefined models of the provider entity are in the order of the supported model types
+            simple_provider_schema.models = [
+                model for model in provider_entity.models if model.model_type in model_types
+            ]
 
             providers.append(simple_provider_schema)
 
@@ -187,22 +192,99 @@ class ModelProviderFactory:
 
     def get_provider_instance(self, provider: str) -> ModelProvider:
         """
-        Get provider instance by provider name
+        Get provider instance by provider name, the provider module is imported on first use
         :param provider: provider name
         :return: provider instance
         """
-        # scan all providers
-        model_provider_extensions = self._get_model_provider_map()
+        model_provider_instance = self._provider_instances.get(provider)
+        if model_provider_instance:
+            return model_provider_instance
 
-        # get the provider extension
-        model_provider_extension = model_provider_extensions.get(provider)
-        if not model_provider_extension:
-            raise Exception(f"Invalid provider: {provider}")
+        with self._lock:
+            if provider not in self._provider_instances:
+                if self.model_provider_extensions:
+                    model_provider_extension = self.model_provider_extensions.get(provider)
+                    model_provider_instance = (
+                        model_provider_extension.provider_instance if model_provider_extension else None
+                    )
+                elif not provider.startswith("__") and os.path.isdir(os.path.join(self._providers_path, provider)):
+                    model_provider_instance = self._load_provider_instance(provider)
 
-        # get the provider instance
-        model_provider_instance = model_provider_extension.provider_instance
+                if not model_provider_instance:
+                    raise Exception(f"Invalid provider: {provider}")
+
+                self._provider_instances[provider] = model_provider_instance
+
+        return self._provider_instances[provider]
+
+    @property
+    def _providers_path(self) -> str:
+        return self._manifest.providers_path
+
+    def _get_provider_entities(self) -> dict[str, ProviderEntity]:
+        """
+        Get the provider schemas with their predefined models, from the manifest when it is up to date
+        """
+        if self._provider_entities is not None:
+            return self._provider_entities
+
+        manifest = self._manifest.load()
+        if manifest is not None:
+            provider_entities = {
+                name: ProviderEntity(**provider_manifest["provider_schema"])
+                for name, provider_manifest in manifest.items()
+            }
+        else:
+            provider_entities = {
+                name: self._build_provider_entity(model_provider_extension.provider_instance)
+                for name, model_provider_extension in self._get_model_provider_map().items()
+            }
+
+        self._provider_entities = provider_entities
+        return provider_entities
+
+    @staticmethod
+    def _build_provider_entity(model_provider_instance: ModelProvider) -> ProviderEntity:
+        provider_schema = model_provider_instance.get_provider_schema()
+
+        models = []
+        for model_type in provider_schema.supported_model_types:
+            # get predefined models for given model type
+            models.extend(model_provider_instance.models(model_type))
+
+        # the schema is cached by the provider instance, the models are set on a copy
+        return provider_schema.model_copy(update={"models": models})
+
+    def _load_provider_instance(self, model_provider_name: str) -> Optional[ModelProvider]:
+        """
+        Import the module of a provider and create its instance
+        :param model_provider_name: provider name, the name of its directory
+        :return: provider instance, None if the provider directory is incomplete
+        """
+        model_provider_dir_path = os.path.join(self._providers_path, model_provider_name)
+        file_names = os.listdir(model_provider_dir_path)
+
+        if (model_provider_name + ".py") not in file_names:
+            logger.warning(f"Missing {model_provider_name}.py file in {model_provider_dir_path}, Skip.")
+            return None
+
+        # Dynamic loading {model_provider_name}.py file and find the subclass of ModelProvider
+        py_path = os.path.join(model_provider_dir_path, model_provider_name + ".py")
+        model_provider_class = load_single_subclass_from_source(
+            module_name=f"core.model_runtime.model_providers.{model_provider_name}.{model_provider_name}",
+            script_path=py_path,
+            parent_type=ModelProvider,
+        )
+
+        if not model_provider_class:
+            logger.warning(f"Missing Model Provider Class that extends ModelProvider in {py_path}, Skip.")
+            return None
 
-        return model_provider_instance
+        if f"{model_provider_name}.yaml" not in file_names:
+            logger.warning(f"Missing {model_provider_name}.yaml file in {model_provider_dir_path}, Skip.")
+            return None
+
+        return model_provider_class()
 
     def _get_model_provider_map(self) -> dict[str, ModelProviderExtension]:
         """
@@ -221,13 +303,11 @@ class ModelProviderFactory:
         if self.model_provider_extensions:
             return self.model_provider_extensions
 
-        # get the path of current classes
-        current_path = os.path.abspath(__file__)
-        model_providers_path = os.path.dirname(current_path)
+        model_providers_path = self._providers_path
 
         # get all folders path under model_providers_path that do not start with __
-        model_provider_dir_paths = [
-            os.path.join(model_providers_path, model_provider_dir)
+        model_provider_names = [
+            model_provider_dir
             for model_provider_dir in os.listdir(model_providers_path)
             if not model_provider_dir.startswith("__")
             and os.path.isdir(os.path.join(model_providers_path, model_provider_dir))
@@ -236,41 +316,25 @@ class ModelProviderFactory:
         # get _position.yaml file path
         position_map = get_provider_position_map(model_providers_path)
 
-        # traverse all model_provider_dir_paths
+        # traverse all model_provider_names
         model_providers: list[ModelProviderExtension] = []
-        for model_provider_dir_path in model_provider_dir_paths:
-            # get model_provider dir name
-            model_provider_name = os.path.basename(model_provider_dir_path)
-
-            file_names = os.listdir(model_provider_dir_path)
-
-            if (model_provider_name + ".py") not in file_names:
-                logger.warning(f"Missing {model_provider_name}.py file in {model_provider_dir_path}, Skip.")
-                continue
-
-            # Dynamic loading {model_provider_name}.py file and find the subclass of ModelProvider
-            py_path = os.path.join(model_provider_dir_path, model_provider_name + ".py")
-            model_provider_class = load_single_subclass_from_source(
-                module_name=f"core.model_runtime.model_providers.{model_provider_name}.{model_provider_name}",
-                script_path=py_path,
-                parent_type=ModelProvider,
-            )
-
-            if not model_provider_class:
-                logger.warning(f"Missing Model Provider Class that extends ModelProvider in {py_path}, Skip.")
-                continue
-
-            if f"{model_provider_name}.yaml" not in file_names:
-                logger.warning(f"Missing {model_provider_name}.yaml file in {model_provider_dir_path}, Skip.")
-                continue
+        with self._lock:
+            for model_provider_name in model_provider_names:
+                # reuse the instances of the providers loaded on demand
+                model_provider_instance = self._provider_instances.get(model_provider_name)
+                if not model_provider_instance:
+                    model_provider_instance = self._load_provider_instance(model_provider_name)
+                if not model_provider_instance:
+                    continue
 
-            model_providers.append(
-                ModelProviderExtension(
-                    name=model_provider_name,
-                    provider_instance=model_provider_class(),
-                    position=position_map.get(model_provider_name),
+                self._provider_instances[model_provider_name] = model_provider_instance
+                model_providers.append(
+                    ModelProviderExtension(
+                        name=model_provider_name,
+                        provider_instance=model_provider_instance,
+                        position=position_map.get(model_provider_name),
+                    )
                 )
-            )
 
         sorted_extensions = sort_to_dict_by_position_map(position_map, model_providers, lambda x: x.name)
 
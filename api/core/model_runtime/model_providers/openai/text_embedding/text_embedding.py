@@ -129,6 +129,25 @@ class OpenAITextEmbeddingModel(_CommonOpenAI, TextEmbeddingModel):
 
         return total_num_tokens
 
+    def get_num_tokens_per_text(self, model: str, credentials: dict, texts: list[str]) -> list[int]:
+        """
+        Get number of tokens of each text, encoded in one batch
+
+        :param model: model name
+        :param credentials: model credentials
+        :param texts: texts to embed
+        :return: number of tokens of each text
+        """
+        if len(texts) == 0:
+            return []
+
+        try:
+            enc = tiktoken.encoding_for_model(model)
+        except KeyError:
+            enc = tiktoken.get_encoding("cl100k_base")
+
+        return [len(tokenized_text) for tokenized_text in enc.encode_batch(texts)]
+
     def validate_credentials(self, model: str, credentials: dict) -> None:
         """
         Validate model credentials
@@ -6,6 +6,7 @@ from core.model_manager import ModelInstance
 from core.model_runtime.entities.message_entities import PromptMessage
 from core.model_runtime.entities.model_entities import ModelPropertyKey
 from core.prompt.entities.advanced_prompt_entities import MemoryConfig
+from core.prompt.utils.prompt_message_token_counter import PromptMessageTokenCounter
 
 
 class PromptTransform:
@@ -33,7 +34,7 @@ class PromptTransform:
                 provider_model_bundle=model_config.provider_model_bundle, model=model_config.model
             )
 
-            curr_message_tokens = model_instance.get_llm_num_tokens(prompt_messages)
+            curr_message_tokens = PromptMessageTokenCounter(model_instance).get_num_tokens(prompt_messages)
 
             max_tokens = 0
             for parameter_rule in model_config.model_schema.parameter_rules:
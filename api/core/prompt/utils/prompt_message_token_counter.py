@@ -0,0 +1,106 @@
+import hashlib
+import json
+from collections.abc import Sequence
+from typing import Optional
+
+from configs import dify_config
+from core.helper.lru_cache import LRUCache
+from core.model_manager import ModelInstance
+from core.model_runtime.entities.message_entities import PromptMessage
+
+_prompt_message_tokens_cache = LRUCache(capacity=dify_config.PROMPT_MESSAGE_TOKENS_CACHE_CAPACITY)
+
+
+class PromptMessageTokenCounter:
+    """
+    Count the tokens of prompt messages for the model of a model instance, caching the counts in the process.
+
+    Each message is counted once, a message is keyed by the given key (e.g. the id of the message it was built
+    from) or by its content. The whole prompt is counted first, histories over the limit are pruned from the
+    suffix sums of the message counts, and the kept prompt is counted to confirm the cut.
+    """
+
+    def __init__(self, model_instance: ModelInstance) -> None:
+        self.model_instance = model_instance
+        # the tokenizer of some providers depends on the credentials, e.g. the base model of a deployment
+        credentials = json.dumps(model_instance.credentials, sort_keys=True, default=str)
+        self._tokenizer_key = (
+            model_instance.provider,
+            model_instance.model,
+            hashlib.sha256(credentials.encode()).hexdigest(),
+        )
+
+    def get_num_tokens(self, prompt_messages: Sequence[PromptMessage]) -> int:
+        """
+        Count the tokens of prompt messages as a whole, the count is cached by their content.
+        :param prompt_messages: prompt messages
+        :return: number of tokens
+        """
+        return self._get_num_tokens(prompt_messages, self._get_keys(prompt_messages))
+
+    def prune(
+        self,
+        prompt_messages: list[PromptMessage],
+        max_token_limit: int,
+        keys: Optional[Sequence[Optional[str]]] = None,
+    ) -> list[PromptMessage]:
+        """
+        Drop the oldest prompt messages until the rest fits in the token limit, the last message is always kept.
+        :param prompt_messages: prompt messages, oldest first
+        :param max_token_limit: max token limit
+        :param keys: cache keys of the prompt messages, messages without a key are keyed by their content
+        :return: the kept prompt messages
+        """
+        if not prompt_messages:
+            return []
+
+        keys = [
+            key or self._get_keys([prompt_message])[0]
+            for prompt_message, key in zip(prompt_messages, keys or [None] * len(prompt_messages))
+        ]
+        # histories fitting in the limit are counted once as a whole
+        if self._get_num_tokens(prompt_messages, keys) <= max_token_limit:
+            return prompt_messages
+
+        message_tokens = [
+            self._get_num_tokens(prompt_messages[i : i + 1], keys[i : i + 1]) for i in range(len(prompt_messages))
+        ]
+        # each count includes the tokens added once per prompt, e.g. the reply priming of chat models
+        overhead = 0
+        if len(prompt_messages) > 1:
+            overhead = max(
+                message_tokens[-2] + message_tokens[-1] - self._get_num_tokens(prompt_messages[-2:], keys[-2:]), 0
+            )
+
+        # estimate the first kept message from the suffix sums of the message counts
+        start = len(prompt_messages) - 1
+        suffix_tokens = message_tokens[-1]
+        for i in range(len(prompt_messages) - 2, -1, -1):
+            suffix_tokens += message_tokens[i] - overhead
+            if suffix_tokens > max_token_limit:
+                break
+            start = i
+
+        # counts of a whole prompt may differ from the estimate, confirm the cut
+        while start < len(prompt_messages) - 1 and (
+            self._get_num_tokens(prompt_messages[start:], keys[start:]) > max_token_limit
+        ):
+            start += 1
+        while start > 0 and self._get_num_tokens(prompt_messages[start - 1 :], keys[start - 1 :]) <= max_token_limit:
+            start -= 1
+
+        return prompt_messages[start:]
+
+    def _get_num_tokens(self, prompt_messages: Sequence[PromptMessage], keys: Sequence[str]) -> int:
+        cache_key = (*self._tokenizer_key, *keys)
+        num_tokens = _prompt_message_tokens_cache.get(cache_key)
+        if num_tokens is None:
+            num_tokens = self.model_instance.get_llm_num_tokens(list(prompt_messages))
+            _prompt_message_tokens_cache.put(cache_key, num_tokens)
+        return num_tokens
+
+    @staticmethod
+    def _get_keys(prompt_messages: Sequence[PromptMessage]) -> list[str]:
+        return [
+            hashlib.sha256(prompt_message.model_dump_json().encode()).hexdigest() for prompt_message in prompt_messages
+        ]
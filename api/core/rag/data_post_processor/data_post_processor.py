@@ -59,6 +59,7 @@ class DataPostProcessor:
                     ),
                     keyword_setting=KeywordSetting(
                         keyword_weight=weights["keyword_setting"]["keyword_weight"],
+                        keyword_scoring_method=weights["keyword_setting"].get("keyword_scoring_method", "tfidf"),
                     ),
                 ),
             )
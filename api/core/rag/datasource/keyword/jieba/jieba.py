@@ -1,11 +1,14 @@
 import json
-from collections import defaultdict
+import uuid
+from collections import Counter
 from typing import Any, Optional
 
 from pydantic import BaseModel
 
 from configs import dify_config
+from core.helper.lru_cache import LRUCache
 from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
+from core.rag.datasource.keyword.jieba.keyword_postings import KeywordPostings
 from core.rag.datasource.keyword.keyword_base import BaseKeyword
 from core.rag.models.document import Document
 from extensions.ext_database import db
@@ -13,6 +16,9 @@ from extensions.ext_redis import redis_client
 from extensions.ext_storage import storage
 from models.dataset import Dataset, DatasetKeywordTable, DocumentSegment
 
+# decoded keyword tables by dataset id, validated against the version stored in redis on every read
+_keyword_table_cache = LRUCache(capacity=dify_config.KEYWORD_TABLE_CACHE_CAPACITY)
+
 
 class KeywordTableConfig(BaseModel):
     max_keywords_per_chunk: int = 10
@@ -24,6 +30,15 @@ class Jieba(BaseKeyword):
         self._config = KeywordTableConfig()
 
     def create(self, texts: list[Document], **kwargs) -> BaseKeyword:
+        keyword_postings = self._get_keyword_postings()
+        if keyword_postings:
+            node_keywords = {}
+            for text, keywords in zip(texts, self._get_texts_keywords(texts)):
+                self._update_segment_keywords(self.dataset.id, text.metadata["doc_id"], keywords)
+                node_keywords[text.metadata["doc_id"]] = keywords
+            keyword_postings.add(node_keywords)
+            return self
+
         lock_name = "keyword_indexing_lock_{}".format(self.dataset.id)
         with redis_client.lock(lock_name, timeout=600):
             keyword_table_handler = JiebaKeywordTableHandler()
@@ -40,34 +55,50 @@ class Jieba(BaseKeyword):
             return self
 
     def add_texts(self, texts: list[Document], **kwargs):
+        keyword_postings = self._get_keyword_postings()
+        if keyword_postings:
+            node_keywords = {}
+            for text, keywords in zip(texts, self._get_texts_keywords(texts, kwargs.get("keywords_list"))):
+                self._update_segment_keywords(self.dataset.id, text.metadata["doc_id"], keywords)
+                node_keywords[text.metadata["doc_id"]] = keywords
+            keyword_postings.add(node_keywords)
+            return
+
         lock_name = "keyword_indexing_lock_{}".format(self.dataset.id)
         with redis_client.lock(lock_name, timeout=600):
-            keyword_table_handler = JiebaKeywordTableHandler()
-
             keyword_table = self._get_dataset_keyword_table()
-            keywords_list = kwargs.get("keywords_list")
-            for i in range(len(texts)):
-                text = texts[i]
-                if keywords_list:
-                    keywords = keywords_list[i]
-                    if not keywords:
-                        keywords = keyword_table_handler.extract_keywords(
-                            text.page_content, self._config.max_keywords_per_chunk
-                        )
-                else:
-                    keywords = keyword_table_handler.extract_keywords(
-                        text.page_content, self._config.max_keywords_per_chunk
-                    )
-                self._update_segment_keywords(self.dataset.id, text.metadata["doc_id"], list(keywords))
-                keyword_table = self._add_text_to_keyword_table(keyword_table, text.metadata["doc_id"], list(keywords))
+            for text, keywords in zip(texts, self._get_texts_keywords(texts, kwargs.get("keywords_list"))):
+                self._update_segment_keywords(self.dataset.id, text.metadata["doc_id"], keywords)
+                keyword_table = self._add_text_to_keyword_table(keyword_table, text.metadata["doc_id"], keywords)
 
             self._save_dataset_keyword_table(keyword_table)
 
+    def _get_texts_keywords(self, texts: list[Document], keywords_list: Optional[list] = None) -> list[list[str]]:
+        keyword_table_handler = JiebaKeywordTableHandler()
+        texts_keywords = []
+        for i, text in enumerate(texts):
+            keywords = keywords_list[i] if keywords_list else None
+            if not keywords:
+                keywords = keyword_table_handler.extract_keywords(
+                    text.page_content, self._config.max_keywords_per_chunk
+                )
+            texts_keywords.append(list(keywords))
+        return texts_keywords
+
     def text_exists(self, id: str) -> bool:
-        keyword_table = self._get_dataset_keyword_table()
-        return id in set.union(*keyword_table.values())
+        keyword_postings = self._get_keyword_postings()
+        if keyword_postings:
+            return keyword_postings.exists(id)
+
+        keyword_table = self._get_cached_dataset_keyword_table()
+        return any(id in node_ids for node_ids in keyword_table.values())
 
     def delete_by_ids(self, ids: list[str]) -> None:
+        keyword_postings = self._get_keyword_postings()
+        if keyword_postings:
+            keyword_postings.delete_by_node_ids(ids)
+            return
+
         lock_name = "keyword_indexing_lock_{}".format(self.dataset.id)
         with redis_client.lock(lock_name, timeout=600):
             keyword_table = self._get_dataset_keyword_table()
@@ -76,20 +107,31 @@ class Jieba(BaseKeyword):
             self._save_dataset_keyword_table(keyword_table)
 
     def search(self, query: str, **kwargs: Any) -> list[Document]:
-        keyword_table = self._get_dataset_keyword_table()
-
         k = kwargs.get("top_k", 4)
 
-        sorted_chunk_indices = self._retrieve_ids_by_query(keyword_table, query, k)
+        keyword_postings = self._get_keyword_postings()
+        if keyword_postings:
+            keywords = JiebaKeywordTableHandler().extract_keywords(query)
+            sorted_chunk_indices = keyword_postings.search(list(keywords), k)
+        else:
+            keyword_table = self._get_cached_dataset_keyword_table()
+            sorted_chunk_indices = self._retrieve_ids_by_query(keyword_table, query, k)
 
-        documents = []
-        for chunk_index in sorted_chunk_indices:
-            segment = (
+        segments = []
+        if sorted_chunk_indices:
+            segments = (
                 db.session.query(DocumentSegment)
-                .filter(DocumentSegment.dataset_id == self.dataset.id, DocumentSegment.index_node_id == chunk_index)
-                .first()
+                .filter(
+                    DocumentSegment.dataset_id == self.dataset.id,
+                    DocumentSegment.index_node_id.in_(sorted_chunk_indices),
+                )
+                .all()
             )
+        segment_map = {segment.index_node_id: segment for segment in segments}
 
+        documents = []
+        for chunk_index in sorted_chunk_indices:
+            segment = segment_map.get(chunk_index)
             if segment:
                 documents.append(
                     Document(
@@ -112,9 +154,12 @@ class Jieba(BaseKeyword):
             if dataset_keyword_table:
                 db.session.delete(dataset_keyword_table)
                 db.session.commit()
-                if dataset_keyword_table.data_source_type != "database":
+                if dataset_keyword_table.data_source_type == "postings":
+                    KeywordPostings(self.dataset.id).delete()
+                elif dataset_keyword_table.data_source_type != "database":
                     file_key = "keyword_files/" + self.dataset.tenant_id + "/" + self.dataset.id + ".txt"
                     storage.delete(file_key)
+                self._bump_keyword_table_version()
 
     def _save_dataset_keyword_table(self, keyword_table):
         keyword_table_dict = {
@@ -131,6 +176,36 @@ class Jieba(BaseKeyword):
             if storage.exists(file_key):
                 storage.delete(file_key)
             storage.save(file_key, json.dumps(keyword_table_dict, cls=SetEncoder).encode("utf-8"))
+        self._bump_keyword_table_version()
+
+    def _get_cached_dataset_keyword_table(self) -> dict:
+        """
+        Get the keyword table through the process-wide cache, for read-only use.
+        The cached table is shared between threads and must not be mutated.
+        """
+        version = self._get_keyword_table_version()
+        cached = _keyword_table_cache.get(self.dataset.id)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        keyword_table = self._get_dataset_keyword_table()
+        _keyword_table_cache.put(self.dataset.id, (version, keyword_table))
+        return keyword_table
+
+    def _get_keyword_table_version(self) -> bytes:
+        """
+        The version is a random token replaced on every write, so that versions never repeat
+        even if the redis key is lost and recreated.
+        """
+        version_key = "keyword_table_version_{}".format(self.dataset.id)
+        version = redis_client.get(version_key)
+        if version is None:
+            redis_client.set(version_key, uuid.uuid4().hex, nx=True)
+            version = redis_client.get(version_key)
+        return version
+
+    def _bump_keyword_table_version(self) -> None:
+        redis_client.set("keyword_table_version_{}".format(self.dataset.id), uuid.uuid4().hex)
 
     def _get_dataset_keyword_table(self) -> Optional[dict]:
         dataset_keyword_table = self.dataset.dataset_keyword_table
@@ -139,25 +214,43 @@ class Jieba(BaseKeyword):
             if keyword_table_dict:
                 return keyword_table_dict["__data__"]["table"]
         else:
-            keyword_data_source_type = dify_config.KEYWORD_DATA_SOURCE_TYPE
-            dataset_keyword_table = DatasetKeywordTable(
-                dataset_id=self.dataset.id,
-                keyword_table="",
-                data_source_type=keyword_data_source_type,
-            )
-            if keyword_data_source_type == "database":
-                dataset_keyword_table.keyword_table = json.dumps(
-                    {
-                        "__type__": "keyword_table",
-                        "__data__": {"index_id": self.dataset.id, "summary": None, "table": {}},
-                    },
-                    cls=SetEncoder,
-                )
-            db.session.add(dataset_keyword_table)
-            db.session.commit()
+            self._create_dataset_keyword_table()
 
         return {}
 
+    def _create_dataset_keyword_table(self) -> DatasetKeywordTable:
+        keyword_data_source_type = dify_config.KEYWORD_DATA_SOURCE_TYPE
+        dataset_keyword_table = DatasetKeywordTable(
+            dataset_id=self.dataset.id,
+            keyword_table="",
+            data_source_type=keyword_data_source_type,
+        )
+        if keyword_data_source_type == "database":
+            dataset_keyword_table.keyword_table = json.dumps(
+                {
+                    "__type__": "keyword_table",
+                    "__data__": {"index_id": self.dataset.id, "summary": None, "table": {}},
+                },
+                cls=SetEncoder,
+            )
+        db.session.add(dataset_keyword_table)
+        db.session.commit()
+        return dataset_keyword_table
+
+    def _get_keyword_postings(self) -> Optional[KeywordPostings]:
+        """Return the postings store if the keyword table of the dataset is stored as postings."""
+        # only fetch the type column, the keyword table blob may be megabytes
+        data_source_type = (
+            db.session.query(DatasetKeywordTable.data_source_type)
+            .filter(DatasetKeywordTable.dataset_id == self.dataset.id)
+            .scalar()
+        )
+        if data_source_type is None:
+            data_source_type = self._create_dataset_keyword_table().data_source_type
+        if data_source_type == "postings":
+            return KeywordPostings(self.dataset.id)
+        return None
+
     def _add_text_to_keyword_table(self, keyword_table: dict, id: str, keywords: list[str]) -> dict:
         for keyword in keywords:
             if keyword not in keyword_table:
@@ -187,19 +280,13 @@ class Jieba(BaseKeyword):
         keywords = keyword_table_handler.extract_keywords(query)
 
         # go through text chunks in order of most matching keywords
-        chunk_indices_count: dict[str, int] = defaultdict(int)
-        keywords = [keyword for keyword in keywords if keyword in set(keyword_table.keys())]
+        chunk_indices_count: Counter[str] = Counter()
         for keyword in keywords:
-            for node_id in keyword_table[keyword]:
-                chunk_indices_count[node_id] += 1
-
-        sorted_chunk_indices = sorted(
-            chunk_indices_count.keys(),
-            key=lambda x: chunk_indices_count[x],
-            reverse=True,
-        )
+            node_ids = keyword_table.get(keyword)
+            if node_ids:
+                chunk_indices_count.update(node_ids)
 
-        return sorted_chunk_indices[:k]
+        return [chunk_index for chunk_index, _ in chunk_indices_count.most_common(k)]
 
     def _update_segment_keywords(self, dataset_id: str, node_id: str, keywords: list[str]):
         document_segment = (
@@ -213,6 +300,12 @@ class Jieba(BaseKeyword):
             db.session.commit()
 
     def create_segment_keywords(self, node_id: str, keywords: list[str]):
+        keyword_postings = self._get_keyword_postings()
+        if keyword_postings:
+            self._update_segment_keywords(self.dataset.id, node_id, keywords)
+            keyword_postings.add({node_id: keywords})
+            return
+
         keyword_table = self._get_dataset_keyword_table()
         self._update_segment_keywords(self.dataset.id, node_id, keywords)
         keyword_table = self._add_text_to_keyword_table(keyword_table, node_id, keywords)
@@ -220,21 +313,32 @@ class Jieba(BaseKeyword):
 
     def multi_create_segment_keywords(self, pre_segment_data_list: list):
         keyword_table_handler = JiebaKeywordTableHandler()
-        keyword_table = self._get_dataset_keyword_table()
+        node_keywords = {}
         for pre_segment_data in pre_segment_data_list:
             segment = pre_segment_data["segment"]
             if pre_segment_data["keywords"]:
                 segment.keywords = pre_segment_data["keywords"]
-                keyword_table = self._add_text_to_keyword_table(
-                    keyword_table, segment.index_node_id, pre_segment_data["keywords"]
-                )
             else:
                 keywords = keyword_table_handler.extract_keywords(segment.content, self._config.max_keywords_per_chunk)
                 segment.keywords = list(keywords)
-                keyword_table = self._add_text_to_keyword_table(keyword_table, segment.index_node_id, list(keywords))
+            node_keywords[segment.index_node_id] = segment.keywords
+
+        keyword_postings = self._get_keyword_postings()
+        if keyword_postings:
+            keyword_postings.add(node_keywords)
+            return
+
+        keyword_table = self._get_dataset_keyword_table()
+        for node_id, keywords in node_keywords.items():
+            keyword_table = self._add_text_to_keyword_table(keyword_table, node_id, keywords)
         self._save_dataset_keyword_table(keyword_table)
 
     def update_segment_keywords_index(self, node_id: str, keywords: list[str]):
+        keyword_postings = self._get_keyword_postings()
+        if keyword_postings:
+            keyword_postings.add({node_id: keywords})
+            return
+
         keyword_table = self._get_dataset_keyword_table()
         keyword_table = self._add_text_to_keyword_table(keyword_table, node_id, keywords)
         self._save_dataset_keyword_table(keyword_table)
@@ -0,0 +1,77 @@
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from extensions.ext_database import db
+from models.dataset import DatasetKeywordPosting
+
+# max number of postings written by one multi-row insert
+POSTINGS_INSERT_BATCH_SIZE = 1000
+
+
+class KeywordPostings:
+    """
+    Keyword table of a dataset stored incrementally, one (keyword, index node id) row per posting,
+    so that single segment edits only touch their own rows instead of rewriting the whole table.
+    """
+
+    def __init__(self, dataset_id: str):
+        self._dataset_id = dataset_id
+
+    def add(self, node_keywords: dict[str, list[str]]) -> None:
+        values = [
+            {"dataset_id": self._dataset_id, "keyword": keyword, "index_node_id": node_id}
+            for node_id, keywords in node_keywords.items()
+            for keyword in set(keywords)
+            if keyword and len(keyword) <= 255
+        ]
+        for i in range(0, len(values), POSTINGS_INSERT_BATCH_SIZE):
+            stmt = (
+                insert(DatasetKeywordPosting)
+                .values(values[i : i + POSTINGS_INSERT_BATCH_SIZE])
+                .on_conflict_do_nothing(index_elements=["dataset_id", "keyword", "index_node_id"])
+            )
+            db.session.execute(stmt)
+        db.session.commit()
+
+    def delete_by_node_ids(self, node_ids: list[str]) -> None:
+        if not node_ids:
+            return
+        db.session.query(DatasetKeywordPosting).filter(
+            DatasetKeywordPosting.dataset_id == self._dataset_id,
+            DatasetKeywordPosting.index_node_id.in_(node_ids),
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+    def delete(self) -> None:
+        db.session.query(DatasetKeywordPosting).filter(DatasetKeywordPosting.dataset_id == self._dataset_id).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+
+    def exists(self, node_id: str) -> bool:
+        return db.session.query(
+            db.session.query(DatasetKeywordPosting)
+            .filter(
+                DatasetKeywordPosting.dataset_id == self._dataset_id,
+                DatasetKeywordPosting.index_node_id == node_id,
+            )
+            .exists()
+        ).scalar()
+
+    def search(self, keywords: list[str], k: int = 4) -> list[str]:
+        """Return the ids of the k index nodes matching the most keywords, best first."""
+        if not keywords:
+            return []
+        score = func.count(DatasetKeywordPosting.id).label("score")
+        rows = (
+            db.session.query(DatasetKeywordPosting.index_node_id, score)
+            .filter(
+                DatasetKeywordPosting.dataset_id == self._dataset_id,
+                DatasetKeywordPosting.keyword.in_(keywords),
+            )
+            .group_by(DatasetKeywordPosting.index_node_id)
+            .order_by(score.desc(), DatasetKeywordPosting.index_node_id)
+            .limit(k)
+            .all()
+        )
+        return [row.index_node_id for row in rows]
@@ -1,12 +1,14 @@
-import threading
+import functools
 from typing import Optional
 
 from flask import Flask, current_app
 
+from configs import dify_config
 from core.rag.data_post_processor.data_post_processor import DataPostProcessor
 from core.rag.datasource.keyword.keyword_factory import Keyword
 from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.rerank.constants.rerank_mode import RerankMode
+from core.rag.retrieval.retrieval_executor import search_retrieval_executor
 from core.rag.retrieval.retrieval_methods import RetrievalMethod
 from extensions.ext_database import db
 from models.dataset import Dataset
@@ -40,64 +42,50 @@ class RetrievalService:
 
         if not dataset or dataset.available_document_count == 0 or dataset.available_segment_count == 0:
             return []
-        all_documents = []
-        threads = []
-        exceptions = []
+        flask_app = current_app._get_current_object()
+        search_tasks = []
         # retrieval_model source with keyword
         if retrieval_method == "keyword_search":
-            keyword_thread = threading.Thread(
-                target=RetrievalService.keyword_search,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),
-                    "dataset_id": dataset_id,
-                    "query": query,
-                    "top_k": top_k,
-                    "all_documents": all_documents,
-                    "exceptions": exceptions,
-                },
+            search_tasks.append(
+                functools.partial(
+                    RetrievalService.keyword_search,
+                    flask_app=flask_app,
+                    dataset_id=dataset_id,
+                    query=query,
+                    top_k=top_k,
+                )
             )
-            threads.append(keyword_thread)
-            keyword_thread.start()
         # retrieval_model source with semantic
         if RetrievalMethod.is_support_semantic_search(retrieval_method):
-            embedding_thread = threading.Thread(
-                target=RetrievalService.embedding_search,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),
-                    "dataset_id": dataset_id,
-                    "query": query,
-                    "top_k": top_k,
-                    "score_threshold": score_threshold,
-                    "reranking_model": reranking_model,
-                    "all_documents": all_documents,
-                    "retrieval_method": retrieval_method,
-                    "exceptions": exceptions,
-                },
+            search_tasks.append(
+                functools.partial(
+                    RetrievalService.embedding_search,
+                    flask_app=flask_app,
+                    dataset_id=dataset_id,
+                    query=query,
+                    top_k=top_k,
+                    score_threshold=score_threshold,
+                    reranking_model=reranking_model,
+                    retrieval_method=retrieval_method,
+                )
             )
-            threads.append(embedding_thread)
-            embedding_thread.start()
 
         # retrieval source with full text
         if RetrievalMethod.is_support_fulltext_search(retrieval_method):
-            full_text_index_thread = threading.Thread(
-                target=RetrievalService.full_text_index_search,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),
-                    "dataset_id": dataset_id,
-                    "query": query,
-                    "retrieval_method": retrieval_method,
-                    "score_threshold": score_threshold,
-                    "top_k": top_k,
-                    "reranking_model": reranking_model,
-                    "all_documents": all_documents,
-                    "exceptions": exceptions,
-                },
+            search_tasks.append(
+                functools.partial(
+                    RetrievalService.full_text_index_search,
+                    flask_app=flask_app,
+                    dataset_id=dataset_id,
+                    query=query,
+                    retrieval_method=retrieval_method,
+                    score_threshold=score_threshold,
+                    top_k=top_k,
+                    reranking_model=reranking_model,
+                )
             )
-            threads.append(full_text_index_thread)
-            full_text_index_thread.start()
 
-        for thread in threads:
-            thread.join()
+        all_documents, exceptions = cls._run_search_tasks(search_tasks)
 
         if exceptions:
             exception_message = ";\n".join(exceptions)
@@ -112,6 +100,31 @@ class RetrievalService:
             )
         return all_documents
 
+    @staticmethod
+    def _run_search_tasks(search_tasks: list[functools.partial]) -> tuple[list, list[str]]:
+        """
+        Run searches on the shared search executor, each with its own result lists
+        so that searches abandoned at the deadline can not touch the merged results.
+        """
+        task_results = [([], []) for _ in search_tasks]
+        futures = search_retrieval_executor.run(
+            [
+                functools.partial(search_task, all_documents=documents, exceptions=exceptions)
+                for search_task, (documents, exceptions) in zip(search_tasks, task_results)
+            ],
+            timeout=dify_config.RETRIEVAL_TIMEOUT,
+        )
+
+        all_documents = []
+        all_exceptions = []
+        for search_task, future, (documents, exceptions) in zip(search_tasks, futures, task_results):
+            if not future.done() or future.cancelled():
+                all_exceptions.append(f"{search_task.func.__name__} timed out")
+                continue
+            all_documents.extend(documents)
+            all_exceptions.extend(exceptions)
+        return all_documents, all_exceptions
+
     @classmethod
     def external_retrieve(cls, dataset_id: str, query: str, external_retrieval_model: Optional[dict] = None):
         dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
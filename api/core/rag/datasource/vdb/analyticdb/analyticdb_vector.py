@@ -1,4 +1,5 @@
 import json
+import uuid
 from typing import Any
 
 from pydantic import BaseModel
@@ -10,6 +11,7 @@ _import_err_msg = (
 
 from configs import dify_config
 from core.rag.datasource.entity.embedding import Embeddings
+from core.rag.datasource.vdb.connection_pool import connection_pool_registry
 from core.rag.datasource.vdb.vector_base import BaseVector
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
@@ -49,7 +51,9 @@ class AnalyticdbVector(BaseVector):
             raise ImportError(_import_err_msg)
         self.config = config
         self._client_config = open_api_models.Config(user_agent="dify", **config.to_analyticdb_client_params())
-        self._client = Client(self._client_config)
+        self._client = connection_pool_registry.get_or_create(
+            VectorType.ANALYTICDB, config, lambda: Client(self._client_config)
+        )
         self._initialize()
 
     def _initialize(self) -> None:
@@ -194,6 +198,35 @@ class AnalyticdbVector(BaseVector):
         response = self._client.query_collection_data(request)
         return len(response.body.matches.match) > 0
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        if not ids:
+            return set()
+        # ids are put in the filter expression as they are, only uuids are accepted
+        for id in ids:
+            try:
+                uuid.UUID(id)
+            except ValueError:
+                raise ValueError(f"Invalid document id {id!r}, a uuid is expected")
+        ids_str = ",".join(f"'{id}'" for id in ids)
+
+        from alibabacloud_gpdb20160503 import models as gpdb_20160503_models
+
+        request = gpdb_20160503_models.QueryCollectionDataRequest(
+            dbinstance_id=self.config.instance_id,
+            region_id=self.config.region_id,
+            namespace=self.config.namespace,
+            namespace_password=self.config.namespace_password,
+            collection=self._collection_name,
+            metrics=self.config.metrics,
+            include_values=False,
+            vector=None,
+            content=None,
+            top_k=len(ids),
+            filter=f"ref_doc_id IN ({ids_str})",
+        )
+        response = self._client.query_collection_data(request)
+        return {match.metadata.get("ref_doc_id") for match in response.body.matches.match}
+
     def delete_by_ids(self, ids: list[str]) -> None:
         from alibabacloud_gpdb20160503 import models as gpdb_20160503_models
 
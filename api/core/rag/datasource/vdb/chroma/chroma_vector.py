@@ -89,6 +89,13 @@ class ChromaVector(BaseVector):
         response = collection.get(ids=[id])
         return len(response) > 0
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        if not ids:
+            return set()
+        collection = self._client.get_or_create_collection(self._collection_name)
+        response = collection.get(ids=ids, include=[])
+        return set(response["ids"])
+
     def search_by_vector(self, query_vector: list[float], **kwargs: Any) -> list[Document]:
         collection = self._client.get_or_create_collection(self._collection_name)
         results: QueryResult = collection.query(query_embeddings=query_vector, n_results=kwargs.get("top_k", 4))
@@ -0,0 +1,153 @@
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from typing import Any, Optional, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.pool import QueuePool
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ConnectionPoolRegistry:
+    """
+    Process-wide registry of the connection pools (or clients) of the vector stores.
+
+    Pools are created lazily on first use and shared by all the vector instances of the process using the
+    same connection config, so datasets and requests reuse open connections instead of connecting for each
+    `Vector`. Pools do not survive a fork, a forked process creates its own.
+
+    Backends report the time spent waiting for a connection with `checkout`, see `get_stats`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pools: dict[tuple[str, str], Any] = {}
+        self._creating: dict[tuple[str, str], threading.Lock] = {}
+        self._pid: Optional[int] = None
+        self._stats: dict[str, dict[str, Any]] = {}
+
+    def get_or_create(self, vector_type: str, config: BaseModel, factory: Callable[[], T]) -> T:
+        """
+        Get the pool of a connection config, creating it on first use.
+        :param vector_type: vector store type
+        :param config: connection config of the vector store
+        :param factory: creates the pool, called once per process and connection config
+        :return: pool
+        """
+        key = (vector_type, config.model_dump_json())
+        with self._lock:
+            if self._pid != os.getpid():
+                # connections of the parent process can not be shared, they are left to the parent
+                self._pools = {}
+                self._creating = {}
+                self._pid = os.getpid()
+
+            pool = self._pools.get(key)
+            if pool is not None:
+                return pool
+
+            creating_lock = self._creating.setdefault(key, threading.Lock())
+
+        # pools are created outside of the registry lock, connecting may be slow
+        with creating_lock:
+            with self._lock:
+                pool = self._pools.get(key)
+            if pool is not None:
+                return pool
+
+            pool = factory()
+            with self._lock:
+                self._pools[key] = pool
+                self._get_stats(vector_type)["pools"] += 1
+
+        logger.info(f"created {vector_type} connection pool")
+        return pool
+
+    @contextmanager
+    def checkout(self, vector_type: str) -> Generator[None, None, None]:
+        """
+        Wrap the wait for a connection of a pool to record the wait time.
+        :param vector_type: vector store type
+        """
+        started_at = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            with self._lock:
+                self._get_stats(vector_type)["failed"] += 1
+            raise
+        finally:
+            self.record_checkout(vector_type, time.perf_counter() - started_at)
+
+    def record_checkout(self, vector_type: str, wait_seconds: float) -> None:
+        with self._lock:
+            stats = self._get_stats(vector_type)
+            stats["checkouts"] += 1
+            stats["wait_seconds"] += wait_seconds
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], wait_seconds)
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        """Pools, checkouts and accumulated checkout wait time of this process per vector store, for monitoring."""
+        with self._lock:
+            return {vector_type: dict(stats) for vector_type, stats in self._stats.items()}
+
+    def _get_stats(self, vector_type: str) -> dict[str, Any]:
+        # called with the lock held
+        if vector_type not in self._stats:
+            self._stats[vector_type] = {
+                "pools": 0,
+                "checkouts": 0,
+                "failed": 0,
+                "wait_seconds": 0.0,
+                "max_wait_seconds": 0.0,
+            }
+        return self._stats[vector_type]
+
+
+connection_pool_registry = ConnectionPoolRegistry()
+
+
+class _CheckoutTimedQueuePool(QueuePool):
+    # set on the subclass of each vector store type, see `create_pooled_engine`
+    vector_type = ""
+
+    def _do_get(self):
+        with connection_pool_registry.checkout(self.vector_type):
+            return super()._do_get()
+
+
+_queue_pool_classes: dict[str, type[QueuePool]] = {}
+
+
+def create_pooled_engine(vector_type: str, url: str, **kwargs: Any) -> Engine:
+    """
+    Create a SQLAlchemy engine for a SQL backed vector store with the vector store pool settings,
+    its connection checkouts are recorded in the registry.
+    :param vector_type: vector store type
+    :param url: database url
+    :return: engine
+    """
+    pool_class = _queue_pool_classes.get(vector_type)
+    if pool_class is None:
+        pool_class = type(f"{vector_type}QueuePool", (_CheckoutTimedQueuePool,), {"vector_type": vector_type})
+        _queue_pool_classes[vector_type] = pool_class
+
+    return create_engine(
+        url,
+        poolclass=pool_class,
+        pool_size=dify_config.VECTOR_STORE_CONNECTION_POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=dify_config.VECTOR_STORE_CONNECTION_POOL_TIMEOUT,
+        pool_recycle=3600,
+        pool_pre_ping=True,
+        **kwargs,
+    )
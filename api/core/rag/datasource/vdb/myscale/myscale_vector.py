@@ -98,6 +98,15 @@ class MyScaleVector(BaseVector):
         results = self._client.query(f"SELECT id FROM {self._config.database}.{self._collection_name} WHERE id='{id}'")
         return results.row_count > 0
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        if not ids:
+            return set()
+        rows = self._client.query(
+            f"SELECT id FROM {self._config.database}.{self._collection_name} WHERE has({{ids:Array(String)}}, id)",
+            parameters={"ids": ids},
+        ).result_rows
+        return {row[0] for row in rows}
+
     def delete_by_ids(self, ids: list[str]) -> None:
         self._client.command(
             f"DELETE FROM {self._config.database}.{self._collection_name} WHERE id IN {str(tuple(ids))}"
@@ -141,6 +141,16 @@ class OpenSearchVector(BaseVector):
         except:
             return False
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        index_name = self._collection_name.lower()
+        if not ids or not self._client.indices.exists(index=index_name):
+            return set()
+        # documents are indexed with generated ids, look them up by the doc id of their metadata
+        doc_id_field = f"{Field.METADATA_KEY.value}.doc_id"
+        query = {"query": {"terms": {doc_id_field: ids}}, "size": len(ids), "_source": [doc_id_field]}
+        response = self._client.search(index=index_name, body=query)
+        return {hit["_source"][Field.METADATA_KEY.value]["doc_id"] for hit in response["hits"]["hits"]}
+
     def search_by_vector(self, query_vector: list[float], **kwargs: Any) -> list[Document]:
         # Make sure query_vector is a list
         if not isinstance(query_vector, list):
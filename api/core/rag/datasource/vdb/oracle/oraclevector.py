@@ -14,6 +14,7 @@ from pydantic import BaseModel, model_validator
 
 from configs import dify_config
 from core.rag.datasource.entity.embedding import Embeddings
+from core.rag.datasource.vdb.connection_pool import connection_pool_registry
 from core.rag.datasource.vdb.vector_base import BaseVector
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
@@ -106,18 +107,25 @@ class OracleVector(BaseVector):
             )
 
     def _create_connection_pool(self, config: OracleVectorConfig):
-        return oracledb.create_pool(
-            user=config.user,
-            password=config.password,
-            dsn="{}:{}/{}".format(config.host, config.port, config.database),
-            min=1,
-            max=50,
-            increment=1,
+        return connection_pool_registry.get_or_create(
+            VectorType.ORACLE,
+            config,
+            lambda: oracledb.create_pool(
+                user=config.user,
+                password=config.password,
+                dsn="{}:{}/{}".format(config.host, config.port, config.database),
+                min=1,
+                max=dify_config.VECTOR_STORE_CONNECTION_POOL_SIZE,
+                increment=1,
+                getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+                wait_timeout=int(dify_config.VECTOR_STORE_CONNECTION_POOL_TIMEOUT * 1000),
+            ),
         )
 
     @contextmanager
     def _get_cursor(self):
-        conn = self.pool.acquire()
+        with connection_pool_registry.checkout(VectorType.ORACLE):
+            conn = self.pool.acquire()
         conn.inputtypehandler = self.input_type_handler
         conn.outputtypehandler = self.output_type_handler
         cur = conn.cursor()
@@ -160,6 +168,14 @@ class OracleVector(BaseVector):
             cur.execute(f"SELECT id FROM {self.table_name} WHERE id = '%s'" % (id,))
             return cur.fetchone() is not None
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        if not ids:
+            return set()
+        with self._get_cursor() as cur:
+            placeholders = ",".join(f":{i}" for i in range(1, len(ids) + 1))
+            cur.execute(f"SELECT id FROM {self.table_name} WHERE id IN ({placeholders})", ids)
+            return {record[0] for record in cur}
+
     def get_by_ids(self, ids: list[str]) -> list[Document]:
         with self._get_cursor() as cur:
             cur.execute(f"SELECT meta, text FROM {self.table_name} WHERE id IN %s", (tuple(ids),))
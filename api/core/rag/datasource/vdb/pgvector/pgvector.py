@@ -1,4 +1,5 @@
 import json
+import threading
 import uuid
 from contextlib import contextmanager
 from typing import Any
@@ -9,6 +10,7 @@ from pydantic import BaseModel, model_validator
 
 from configs import dify_config
 from core.rag.datasource.entity.embedding import Embeddings
+from core.rag.datasource.vdb.connection_pool import connection_pool_registry
 from core.rag.datasource.vdb.vector_base import BaseVector
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
@@ -58,6 +60,52 @@ CREATE TABLE IF NOT EXISTS {table_name} (
 """
 
 
+class PGVectorConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+    """
+    Thread-safe connection pool shared by the PGVector instances of a process, waiting for a connection
+    up to a timeout instead of failing as soon as all connections are in use. Connections are checked on
+    checkout and replaced if the server dropped them, like the pool_pre_ping of SQLAlchemy.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, timeout: float, *args, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._timeout = timeout
+
+    def getconn(self, key=None):
+        with connection_pool_registry.checkout(VectorType.PGVECTOR):
+            if not self._slots.acquire(timeout=self._timeout):
+                raise psycopg2.pool.PoolError(f"no connection available within {self._timeout}s")
+
+        try:
+            conn = super().getconn(key)
+            if not self._is_alive(conn):
+                super().putconn(conn, key, close=True)
+                conn = super().getconn(key)
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    @staticmethod
+    def _is_alive(conn) -> bool:
+        if conn.closed:
+            return False
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+        except psycopg2.Error:
+            return False
+        return True
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+
 class PGVector(BaseVector):
     def __init__(self, collection_name: str, config: PGVectorConfig):
         super().__init__(collection_name)
@@ -68,26 +116,38 @@ class PGVector(BaseVector):
         return VectorType.PGVECTOR
 
     def _create_connection_pool(self, config: PGVectorConfig):
-        return psycopg2.pool.SimpleConnectionPool(
-            config.min_connection,
-            config.max_connection,
-            host=config.host,
-            port=config.port,
-            user=config.user,
-            password=config.password,
-            database=config.database,
+        return connection_pool_registry.get_or_create(
+            VectorType.PGVECTOR,
+            config,
+            lambda: PGVectorConnectionPool(
+                config.min_connection,
+                config.max_connection,
+                dify_config.VECTOR_STORE_CONNECTION_POOL_TIMEOUT,
+                host=config.host,
+                port=config.port,
+                user=config.user,
+                password=config.password,
+                database=config.database,
+            ),
         )
 
     @contextmanager
     def _get_cursor(self):
         conn = self.pool.getconn()
-        cur = conn.cursor()
+        broken = False
         try:
-            yield cur
-        finally:
-            cur.close()
+            with conn.cursor() as cur:
+                yield cur
             conn.commit()
-            self.pool.putconn(conn)
+        except Exception:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+            raise
+        finally:
+            # always give the connection back, closing it if it is broken, so its slot is not leaked
+            self.pool.putconn(conn, close=broken or conn.closed != 0)
 
     def create(self, texts: list[Document], embeddings: list[list[float]], **kwargs):
         dimension = len(embeddings[0])
@@ -119,6 +179,13 @@ class PGVector(BaseVector):
             cur.execute(f"SELECT id FROM {self.table_name} WHERE id = %s", (id,))
             return cur.fetchone() is not None
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        if not ids:
+            return set()
+        with self._get_cursor() as cur:
+            cur.execute(f"SELECT id FROM {self.table_name} WHERE id IN %s", (tuple(ids),))
+            return {str(record[0]) for record in cur}
+
     def get_by_ids(self, ids: list[str]) -> list[Document]:
         with self._get_cursor() as cur:
             cur.execute(f"SELECT meta, text FROM {self.table_name} WHERE id IN %s", (tuple(ids),))
@@ -3,12 +3,13 @@ import uuid
 from typing import Any, Optional
 
 from pydantic import BaseModel, model_validator
-from sqlalchemy import Column, Sequence, String, Table, create_engine, insert
+from sqlalchemy import Column, Sequence, String, Table, insert
 from sqlalchemy import text as sql_text
 from sqlalchemy.dialects.postgresql import JSON, TEXT
 from sqlalchemy.orm import Session
 
 from core.rag.datasource.entity.embedding import Embeddings
+from core.rag.datasource.vdb.connection_pool import connection_pool_registry, create_pooled_engine
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from models.dataset import Dataset
@@ -57,7 +58,9 @@ class RelytVector(BaseVector):
         self._url = (
             f"postgresql+psycopg2://{config.user}:{config.password}@{config.host}:{config.port}/{config.database}"
         )
-        self.client = create_engine(self._url)
+        self.client = connection_pool_registry.get_or_create(
+            VectorType.RELYT, config, lambda: create_pooled_engine(VectorType.RELYT, self._url)
+        )
         self._fields = []
         self._group_id = group_id
 
@@ -222,6 +225,17 @@ class RelytVector(BaseVector):
             result = session.execute(select_statement).fetchall()
         return len(result) > 0
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        if not ids:
+            return set()
+        with Session(self.client) as session:
+            select_statement = sql_text(
+                f"""SELECT metadata->>'doc_id' FROM "{self._collection_name}" """
+                f"""WHERE metadata->>'doc_id' = ANY (:doc_ids); """
+            )
+            result = session.execute(select_statement, {"doc_ids": ids}).fetchall()
+        return {item[0] for item in result}
+
     def search_by_vector(self, query_vector: list[float], **kwargs: Any) -> list[Document]:
         results = self.similarity_search_with_score_by_vector(
             k=int(kwargs.get("top_k")), embedding=query_vector, filter=kwargs.get("filter")
@@ -139,6 +139,12 @@ class TencentVector(BaseVector):
             return True
         return False
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        if not ids:
+            return set()
+        docs = self._db.collection(self._collection_name).query(document_ids=ids, retrieve_vector=False, limit=len(ids))
+        return {doc["id"] for doc in docs or []}
+
     def delete_by_ids(self, ids: list[str]) -> None:
         self._db.collection(self._collection_name).delete(document_ids=ids)
 
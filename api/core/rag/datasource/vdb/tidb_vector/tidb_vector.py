@@ -4,12 +4,13 @@ from typing import Any
 
 import sqlalchemy
 from pydantic import BaseModel, model_validator
-from sqlalchemy import JSON, TEXT, Column, DateTime, String, Table, create_engine, insert
+from sqlalchemy import JSON, TEXT, Column, DateTime, String, Table, bindparam, insert
 from sqlalchemy import text as sql_text
 from sqlalchemy.orm import Session, declarative_base
 
 from configs import dify_config
 from core.rag.datasource.entity.embedding import Embeddings
+from core.rag.datasource.vdb.connection_pool import connection_pool_registry, create_pooled_engine
 from core.rag.datasource.vdb.vector_base import BaseVector
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
@@ -80,7 +81,9 @@ class TiDBVector(BaseVector):
             f"ssl_verify_cert=true&ssl_verify_identity=true&program_name={config.program_name}"
         )
         self._distance_func = distance_func.lower()
-        self._engine = create_engine(self._url)
+        self._engine = connection_pool_registry.get_or_create(
+            VectorType.TIDB_VECTOR, config, lambda: create_pooled_engine(VectorType.TIDB_VECTOR, self._url)
+        )
         self._orm_base = declarative_base()
         self._dimension = 1536
 
@@ -143,6 +146,16 @@ class TiDBVector(BaseVector):
         result = self.get_ids_by_metadata_field("doc_id", id)
         return bool(result)
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        if not ids:
+            return set()
+        with Session(self._engine) as session:
+            select_statement = sql_text(
+                f"SELECT meta->>'$.doc_id' FROM {self._collection_name} WHERE meta->>'$.doc_id' IN :doc_ids; "
+            ).bindparams(bindparam("doc_ids", expanding=True))
+            result = session.execute(select_statement, {"doc_ids": ids}).fetchall()
+        return {item[0] for item in result}
+
     def delete_by_ids(self, ids: list[str]) -> None:
         with Session(self._engine) as session:
             ids_str = ",".join(f"'{doc_id}'" for doc_id in ids)
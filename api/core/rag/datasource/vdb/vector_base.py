@@ -5,6 +5,9 @@ from typing import Any
 
 from core.rag.models.document import Document
 
+# max number of document ids checked by one `get_existing_ids` call
+EXISTING_IDS_BATCH_SIZE = 1000
+
 
 class BaseVector(ABC):
     def __init__(self, collection_name: str):
@@ -26,6 +29,15 @@ class BaseVector(ABC):
     def text_exists(self, id: str) -> bool:
         raise NotImplementedError
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        """
+        Get the document ids which already exist in the vector store.
+        Backends override it with a batch lookup, the default checks the ids one by one.
+        :param ids: document ids, at most `EXISTING_IDS_BATCH_SIZE`
+        :return: the existing document ids
+        """
+        return {id for id in ids if self.text_exists(id)}
+
     @abstractmethod
     def delete_by_ids(self, ids: list[str]) -> None:
         raise NotImplementedError
@@ -50,13 +62,15 @@ class BaseVector(ABC):
         raise NotImplementedError
 
     def _filter_duplicate_texts(self, texts: list[Document]) -> list[Document]:
-        for text in texts.copy():
-            doc_id = text.metadata["doc_id"]
-            exists_duplicate_node = self.text_exists(doc_id)
-            if exists_duplicate_node:
-                texts.remove(text)
+        doc_ids = self._get_uuids(texts)
+        existing_ids: set[str] = set()
+        for i in range(0, len(doc_ids), EXISTING_IDS_BATCH_SIZE):
+            existing_ids.update(self.get_existing_ids(doc_ids[i : i + EXISTING_IDS_BATCH_SIZE]))
+
+        if not existing_ids:
+            return texts
 
-        return texts
+        return [text for text in texts if text.metadata["doc_id"] not in existing_ids]
 
     def _get_uuids(self, texts: list[Document]) -> list[str]:
         return [text.metadata["doc_id"] for text in texts]
@@ -106,9 +106,11 @@ class Vector:
             case _:
                 raise ValueError(f"Vector store {vector_type} is not supported.")
 
-    def create(self, texts: Optional[list] = None, **kwargs):
+    def create(self, texts: Optional[list] = None, embeddings: Optional[list[list[float]]] = None, **kwargs):
         if texts:
-            embeddings = self._embeddings.embed_documents([document.page_content for document in texts])
+            # embeddings computed by the caller, e.g. the indexing pipeline, are stored as they are
+            if embeddings is None:
+                embeddings = self._embeddings.embed_documents([document.page_content for document in texts])
             self._vector_processor.create(texts=texts, embeddings=embeddings, **kwargs)
 
     def add_texts(self, documents: list[Document], **kwargs):
@@ -121,6 +123,9 @@ class Vector:
     def text_exists(self, id: str) -> bool:
         return self._vector_processor.text_exists(id)
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        return self._vector_processor.get_existing_ids(ids)
+
     def delete_by_ids(self, ids: list[str]) -> None:
         self._vector_processor.delete_by_ids(ids)
 
@@ -153,13 +158,7 @@ class Vector:
         return CacheEmbedding(embedding_model)
 
     def _filter_duplicate_texts(self, texts: list[Document]) -> list[Document]:
-        for text in texts.copy():
-            doc_id = text.metadata["doc_id"]
-            exists_duplicate_node = self.text_exists(doc_id)
-            if exists_duplicate_node:
-                texts.remove(text)
-
-        return texts
+        return self._vector_processor._filter_duplicate_texts(texts)
 
     def __getattr__(self, name):
         if self._vector_processor is not None:
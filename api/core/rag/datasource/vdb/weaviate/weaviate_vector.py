@@ -163,6 +163,33 @@ class WeaviateVector(BaseVector):
 
         return True
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        collection_name = self._collection_name
+        schema = self._default_schema(self._collection_name)
+
+        if not ids or not self._client.schema.contains(schema):
+            return set()
+        # objects are stored with the doc id as uuid, filtering the word tokenized doc_id text would also
+        # match the other ids sharing a token of the uuid
+        result = (
+            self._client.query.get(collection_name)
+            .with_additional(["id"])
+            .with_where(
+                {
+                    "path": ["id"],
+                    "operator": "ContainsAny",
+                    "valueTextArray": ids,
+                }
+            )
+            .with_limit(len(ids))
+            .do()
+        )
+
+        if "errors" in result:
+            raise ValueError(f"Error during query: {result['errors']}")
+
+        return {entry["_additional"]["id"] for entry in result["data"]["Get"][collection_name]}
+
     def delete_by_ids(self, ids: list[str]) -> None:
         # check whether the index already exists
         schema = self._default_schema(self._collection_name)
@@ -0,0 +1,251 @@
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional
+
+from flask import Flask
+
+from core.helper.adaptive_concurrency import AdaptiveConcurrencyLimiter
+from core.model_runtime.errors.invoke import InvokeRateLimitError
+from core.rag.models.document import Document
+
+logger = logging.getLogger(__name__)
+
+# marks the end of the batches of a stage queue
+_END = object()
+
+
+class _StageStats:
+    def __init__(self) -> None:
+        self.documents = 0
+        self.tokens = 0
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, started_at: float, finished_at: float, documents: int, tokens: int = 0) -> None:
+        with self._lock:
+            self.documents += documents
+            self.tokens += tokens
+            self._started_at = started_at if self._started_at is None else min(self._started_at, started_at)
+            self._finished_at = finished_at if self._finished_at is None else max(self._finished_at, finished_at)
+
+    def to_dict(self) -> dict[str, Any]:
+        # throughput over the span of the stage, the stages overlap so their spans add up to more than the total
+        seconds = (self._finished_at - self._started_at) if self._started_at is not None else 0.0
+        stats: dict[str, Any] = {
+            "documents": self.documents,
+            "seconds": round(seconds, 3),
+            "documents_per_second": round(self.documents / seconds, 2) if seconds else None,
+        }
+        if self.tokens:
+            stats["tokens"] = self.tokens
+            stats["tokens_per_second"] = round(self.tokens / seconds, 2) if seconds else None
+        return stats
+
+
+class IndexLoadPipeline:
+    """
+    Load documents into the index in overlapping stages: batches are embedded concurrently, embedded batches
+    are written to the vector store, and the segments of written batches are marked completed.
+
+    Embedding concurrency adapts to the latency and rate limits of the provider, rate limited batches are
+    retried after a backoff. Queues between the stages are bounded, a slow stage holds back the ones before it.
+    The first error of any stage stops the pipeline and is raised by `run`, batches written by then are still
+    marked completed so a retry only loads the rest.
+    """
+
+    def __init__(
+        self,
+        flask_app: Flask,
+        embed: Callable[[list[Document]], tuple[list[list[float]], int]],
+        write: Callable[[list[Document], list[list[float]]], None],
+        complete: Callable[[list[Document]], None],
+        batch_size: int,
+        max_concurrency: int,
+        max_retries: int = 5,
+        retry_backoff: float = 1.0,
+        before_batch: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        :param flask_app: app of the stage threads
+        :param embed: embed a batch, returns the embeddings and the number of tokens of the batch
+        :param write: write documents with their embeddings to the vector store
+        :param complete: mark the segments of written documents completed
+        :param batch_size: number of documents embedded per call, the max chunks of the embedding model
+        :param max_concurrency: max number of batches embedded concurrently
+        :param max_retries: max number of retries of a rate limited batch
+        :param retry_backoff: seconds to wait before the first retry of a rate limited batch, doubled each retry
+        :param before_batch: called before each batch is embedded, e.g. to stop a paused document
+        """
+        self._flask_app = flask_app
+        self._embed = embed
+        self._write = write
+        self._complete = complete
+        self._batch_size = max(batch_size, 1)
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+        self._before_batch = before_batch
+        self._limiter = AdaptiveConcurrencyLimiter(max_limit=max_concurrency)
+        self._initial_concurrency = self._limiter.limit
+        self._stats = {"embedding": _StageStats(), "vector_store": _StageStats(), "segment_status": _StageStats()}
+
+    def run(self, documents: list[Document]) -> int:
+        """
+        Load the documents.
+        :param documents: documents to load
+        :return: number of embedded tokens
+        """
+        stop = threading.Event()
+        write_queue: queue.Queue = queue.Queue(maxsize=self._limiter.max_limit)
+        complete_queue: queue.Queue = queue.Queue(maxsize=self._limiter.max_limit)
+
+        def stop_on_error(future: Future) -> None:
+            if future.exception() is not None:
+                stop.set()
+
+        with ThreadPoolExecutor(max_workers=self._limiter.max_limit + 2) as executor:
+            writer = executor.submit(self._run_write_stage, write_queue, complete_queue, stop)
+            completer = executor.submit(self._run_complete_stage, complete_queue, stop)
+            writer.add_done_callback(stop_on_error)
+            completer.add_done_callback(stop_on_error)
+
+            embed_futures = []
+            for i in range(0, len(documents), self._batch_size):
+                self._limiter.acquire()
+                if stop.is_set():
+                    self._limiter.release()
+                    break
+                future = executor.submit(self._embed_batch, documents[i : i + self._batch_size], write_queue, stop)
+                # stop before the slot is released, no batch is started after an error
+                future.add_done_callback(stop_on_error)
+                future.add_done_callback(lambda _: self._limiter.release())
+                embed_futures.append(future)
+
+            for future in embed_futures:
+                future.exception()
+            self._put(write_queue, _END, stop)
+
+            # the first error stops the other stages, which end without an error of their own
+            for future in [*embed_futures, writer, completer]:
+                future.result()
+
+        return self._stats["embedding"].tokens
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Throughput of each stage and the embedding concurrency of the last run.
+        """
+        return {
+            "batch_size": self._batch_size,
+            "concurrency": {
+                "initial": self._initial_concurrency,
+                "peak": self._limiter.peak_limit,
+                "final": self._limiter.limit,
+                "max": self._limiter.max_limit,
+            },
+            "rate_limited": self._limiter.rate_limited_count,
+            "stages": {name: stats.to_dict() for name, stats in self._stats.items()},
+        }
+
+    def _embed_batch(self, documents: list[Document], write_queue: queue.Queue, stop: threading.Event) -> None:
+        with self._flask_app.app_context():
+            for attempt in range(self._max_retries + 1):
+                if stop.is_set():
+                    return
+                if self._before_batch:
+                    self._before_batch()
+
+                started_at = time.perf_counter()
+                try:
+                    embeddings, tokens = self._embed(documents)
+                except InvokeRateLimitError:
+                    self._limiter.on_rate_limited()
+                    if attempt >= self._max_retries:
+                        raise
+                    backoff = self._retry_backoff * 2**attempt
+                    logger.warning(
+                        "embedding rate limited, retry in %ss with concurrency %d", backoff, self._limiter.limit
+                    )
+                    stop.wait(backoff)
+                    continue
+
+                finished_at = time.perf_counter()
+                self._limiter.on_success(finished_at - started_at)
+                self._stats["embedding"].record(started_at, finished_at, len(documents), tokens)
+                self._put(write_queue, (documents, embeddings), stop)
+                return
+
+    def _run_write_stage(self, write_queue: queue.Queue, complete_queue: queue.Queue, stop: threading.Event) -> None:
+        with self._flask_app.app_context():
+            while True:
+                items, end = self._get_all(write_queue, stop)
+                if stop.is_set():
+                    return
+                if items:
+                    started_at = time.perf_counter()
+                    # batches embedded meanwhile are written together
+                    documents = [document for batch_documents, _ in items for document in batch_documents]
+                    self._write(documents, [embedding for _, embeddings in items for embedding in embeddings])
+                    self._stats["vector_store"].record(started_at, time.perf_counter(), len(documents))
+                    self._put(complete_queue, documents, stop)
+                if end:
+                    self._put(complete_queue, _END, stop)
+                    return
+
+    def _run_complete_stage(self, complete_queue: queue.Queue, stop: threading.Event) -> None:
+        with self._flask_app.app_context():
+            while True:
+                items, end = self._get_all(complete_queue, stop)
+                if stop.is_set():
+                    # batches already written are still marked, a retry resumes after them
+                    items.extend(self._drain(complete_queue))
+                if items:
+                    started_at = time.perf_counter()
+                    documents = [document for batch_documents in items for document in batch_documents]
+                    self._complete(documents)
+                    self._stats["segment_status"].record(started_at, time.perf_counter(), len(documents))
+                if end or stop.is_set():
+                    return
+
+    @staticmethod
+    def _put(stage_queue: queue.Queue, item: Any, stop: threading.Event) -> None:
+        while not stop.is_set():
+            try:
+                stage_queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    @staticmethod
+    def _drain(stage_queue: queue.Queue) -> list[Any]:
+        items = []
+        while True:
+            try:
+                item = stage_queue.get_nowait()
+            except queue.Empty:
+                return items
+            if item is not _END:
+                items.append(item)
+
+    @staticmethod
+    def _get_all(stage_queue: queue.Queue, stop: threading.Event) -> tuple[list[Any], bool]:
+        """
+        Wait for the next items of a queue and take all the queued ones.
+        :return: the items, and whether the end of the queue was reached
+        """
+        items: list[Any] = []
+        while not stop.is_set():
+            try:
+                item = stage_queue.get(timeout=0.1) if not items else stage_queue.get_nowait()
+            except queue.Empty:
+                if items:
+                    break
+                continue
+            if item is _END:
+                return items, True
+            items.append(item)
+        return items, False
@@ -27,7 +27,13 @@ class BaseIndexProcessor(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def load(self, dataset: Dataset, documents: list[Document], with_keywords: bool = True):
+    def load(
+        self,
+        dataset: Dataset,
+        documents: list[Document],
+        with_keywords: bool = True,
+        embeddings: Optional[list[list[float]]] = None,
+    ):
         raise NotImplementedError
 
     def clean(self, dataset: Dataset, node_ids: Optional[list[str]], with_keywords: bool = True):
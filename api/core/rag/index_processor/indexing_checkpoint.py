@@ -0,0 +1,160 @@
+import gzip
+import hashlib
+import json
+import logging
+import time
+from collections.abc import Iterable
+from typing import Any, Optional
+
+from configs import dify_config
+from core.rag.models.document import Document
+from extensions.ext_redis import redis_client
+from extensions.ext_storage import storage
+
+logger = logging.getLogger(__name__)
+
+# sorted set of the checkpoint paths, scored by the time they were last used
+CHECKPOINTS_KEY = "indexing_checkpoints"
+
+
+class IndexingCheckpoint:
+    """
+    Extract and split results of a document kept in storage, so a retried indexing run skips the stages
+    that already completed instead of parsing the file and splitting (or generating Q&A) again.
+
+    Results are keyed by the hash of their input and the hash of the settings of the stage: extracted text by
+    the hash of the uploaded file, split documents by the hash of the extracted text. Documents with the same
+    content and rules share them. The checkpoints read or written by a run are deleted by `clear` once the
+    document is indexed.
+
+    Checkpoints are registered in redis with the time they were last used and by the documents using them,
+    so the checkpoints of a deleted document and checkpoints left by failed runs can be deleted.
+    """
+
+    def __init__(self, tenant_id: str, document_id: str, enabled: bool = True) -> None:
+        self.tenant_id = tenant_id
+        self.document_id = document_id
+        self.enabled = enabled
+        self._paths: set[str] = set()
+
+    def load(self, stage: str, source_hash: Optional[str], settings: dict[str, Any]) -> Optional[list[Document]]:
+        """
+        Load the documents of a stage.
+        :param stage: stage name, e.g. extract or split
+        :param source_hash: hash of the input of the stage, None if the input can not be hashed
+        :param settings: settings the output of the stage depends on
+        :return: the documents, None if there is no checkpoint
+        """
+        path = self._get_path(stage, source_hash, settings)
+        if not path:
+            return None
+
+        try:
+            if not storage.exists(path):
+                return None
+            data = json.loads(gzip.decompress(storage.load_once(path)))
+        except Exception as e:
+            logger.warning(f"failed to load indexing checkpoint {path}: {e}")
+            return None
+
+        self._register(path)
+        return [Document(page_content=item["page_content"], metadata=item["metadata"]) for item in data]
+
+    def save(self, stage: str, source_hash: Optional[str], settings: dict[str, Any], documents: list[Document]) -> None:
+        """
+        Save the documents of a stage, failures are logged and do not fail the indexing run.
+        """
+        path = self._get_path(stage, source_hash, settings)
+        # registered first, a checkpoint the cleanups do not know of is never saved
+        if not path or not self._register(path):
+            return
+
+        data = [{"page_content": document.page_content, "metadata": document.metadata} for document in documents]
+        try:
+            storage.save(path, gzip.compress(json.dumps(data, ensure_ascii=False, default=str).encode()))
+        except Exception as e:
+            logger.warning(f"failed to save indexing checkpoint {path}: {e}")
+
+    def clear(self) -> None:
+        """
+        Delete the checkpoints read or written through this instance, and the ones left by former runs of the
+        document.
+        """
+        try:
+            self._delete_paths(self._paths)
+        except Exception as e:
+            logger.warning(f"failed to delete indexing checkpoints of document {self.document_id}: {e}")
+        self._paths.clear()
+        self.delete_document_checkpoints(self.document_id)
+
+    @classmethod
+    def delete_document_checkpoints(cls, document_id: str) -> None:
+        """
+        Delete the checkpoints read or written by the indexing runs of a document.
+        :param document_id: document id
+        """
+        try:
+            paths = [path.decode() for path in redis_client.smembers(cls._get_document_key(document_id))]
+            cls._delete_paths(paths)
+            redis_client.delete(cls._get_document_key(document_id))
+        except Exception as e:
+            logger.warning(f"failed to delete indexing checkpoints of document {document_id}: {e}")
+
+    @classmethod
+    def delete_expired_checkpoints(cls, expired_before: float, batch_size: int = 100) -> int:
+        """
+        Delete the checkpoints not used since the given time.
+        :param expired_before: unix timestamp
+        :param batch_size: number of checkpoints deleted per batch
+        :return: number of deleted checkpoints
+        """
+        deleted_count = 0
+        while True:
+            paths = redis_client.zrangebyscore(CHECKPOINTS_KEY, "-inf", expired_before, start=0, num=batch_size)
+            if not paths:
+                return deleted_count
+            cls._delete_paths([path.decode() for path in paths])
+            deleted_count += len(paths)
+
+    @staticmethod
+    def hash_documents(documents: list[Document]) -> str:
+        digest = hashlib.sha256()
+        for document in documents:
+            digest.update(document.page_content.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _register(self, path: str) -> bool:
+        self._paths.add(path)
+        try:
+            redis_client.zadd(CHECKPOINTS_KEY, {path: time.time()})
+            document_key = self._get_document_key(self.document_id)
+            redis_client.sadd(document_key, path)
+            # the checkpoints of the document are swept by then
+            redis_client.expire(document_key, dify_config.INDEXING_CHECKPOINT_RETENTION_DAYS * 24 * 60 * 60)
+        except Exception as e:
+            logger.warning(f"failed to register indexing checkpoint {path}: {e}")
+            return False
+        return True
+
+    @staticmethod
+    def _delete_paths(paths: Iterable[str]) -> None:
+        paths = list(paths)
+        for path in paths:
+            try:
+                storage.delete(path)
+            except Exception as e:
+                logger.warning(f"failed to delete indexing checkpoint {path}: {e}")
+        if paths:
+            redis_client.zrem(CHECKPOINTS_KEY, *paths)
+
+    @staticmethod
+    def _get_document_key(document_id: str) -> str:
+        return f"indexing_checkpoints:{document_id}"
+
+    def _get_path(self, stage: str, source_hash: Optional[str], settings: dict[str, Any]) -> Optional[str]:
+        if not self.enabled or not source_hash:
+            return None
+
+        settings_hash = hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()
+        return f"indexing_checkpoints/{self.tenant_id}/{source_hash}/{stage}-{settings_hash}.json.gz"
@@ -54,10 +54,16 @@ class ParagraphIndexProcessor(BaseIndexProcessor):
             all_documents.extend(split_documents)
         return all_documents
 
-    def load(self, dataset: Dataset, documents: list[Document], with_keywords: bool = True):
+    def load(
+        self,
+        dataset: Dataset,
+        documents: list[Document],
+        with_keywords: bool = True,
+        embeddings: Optional[list[list[float]]] = None,
+    ):
         if dataset.indexing_technique == "high_quality":
             vector = Vector(dataset)
-            vector.create(documents)
+            vector.create(documents, embeddings=embeddings)
         if with_keywords:
             keyword = Keyword(dataset)
             keyword.create(documents)
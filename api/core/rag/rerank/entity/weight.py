@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel
 
 
@@ -12,6 +14,9 @@ class VectorSetting(BaseModel):
 class KeywordSetting(BaseModel):
     keyword_weight: float
 
+    # "tfidf" for TF-IDF cosine similarity or "bm25" for normalized BM25
+    keyword_scoring_method: Literal["tfidf", "bm25"] = "tfidf"
+
 
 class Weights(BaseModel):
     """Model for weighted rerank."""
@@ -0,0 +1,118 @@
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+
+
+class KeywordTermMatrix:
+    """
+    Sparse (COO) term-frequency matrix of candidate documents, built once per query
+    and shared by the keyword scoring functions.
+    """
+
+    def __init__(self, documents_keywords: Sequence[Iterable[str]]):
+        self.vocabulary: dict[str, int] = {}
+        rows = []
+        cols = []
+        for row, document_keywords in enumerate(documents_keywords):
+            for keyword in document_keywords:
+                rows.append(row)
+                cols.append(self.vocabulary.setdefault(keyword, len(self.vocabulary)))
+
+        self.document_count = len(documents_keywords)
+        # merge repeated (document, keyword) pairs into term counts
+        pairs = np.unique(
+            np.array(rows, dtype=np.int64) * max(len(self.vocabulary), 1) + np.array(cols, dtype=np.int64),
+            return_counts=True,
+        )
+        self.rows = pairs[0] // max(len(self.vocabulary), 1)
+        self.cols = pairs[0] % max(len(self.vocabulary), 1)
+        self.term_counts = pairs[1].astype(np.float64)
+        # number of documents containing each keyword
+        self.document_frequencies = np.bincount(self.cols, minlength=len(self.vocabulary)).astype(np.float64)
+        self.document_lengths = np.bincount(self.rows, weights=self.term_counts, minlength=self.document_count)
+
+    def query_term_counts(self, query_keywords: Iterable[str]) -> np.ndarray:
+        """Dense term counts of the query over the vocabulary, keywords absent from all documents are dropped."""
+        query_counts = np.zeros(len(self.vocabulary), dtype=np.float64)
+        for keyword in query_keywords:
+            col = self.vocabulary.get(keyword)
+            if col is not None:
+                query_counts[col] += 1
+        return query_counts
+
+
+def tfidf_cosine_scores(query_keywords: Iterable[str], documents_keywords: Sequence[Iterable[str]]) -> list[float]:
+    """
+    Cosine similarity between the TF-IDF vectors of the query and each document,
+    with smoothed IDF `log((1 + N) / (1 + df)) + 1` computed over the candidate documents.
+    """
+    matrix = KeywordTermMatrix(documents_keywords)
+    if not matrix.document_count:
+        return []
+
+    idf = np.log((1 + matrix.document_count) / (1 + matrix.document_frequencies)) + 1
+    query_tfidf = matrix.query_term_counts(query_keywords) * idf
+    documents_tfidf = matrix.term_counts * idf[matrix.cols]
+
+    numerators = np.bincount(
+        matrix.rows, weights=documents_tfidf * query_tfidf[matrix.cols], minlength=matrix.document_count
+    )
+    documents_norm = np.sqrt(np.bincount(matrix.rows, weights=documents_tfidf**2, minlength=matrix.document_count))
+    denominators = documents_norm * np.linalg.norm(query_tfidf)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(denominators > 0, numerators / denominators, 0.0)
+    return scores.tolist()
+
+
+def bm25_scores(
+    query_keywords: Iterable[str],
+    documents_keywords: Sequence[Iterable[str]],
+    k1: float = 1.5,
+    b: float = 0.75,
+) -> list[float]:
+    """
+    Okapi BM25 score of each document for the query, divided by the best score
+    so that results fall into [0, 1] like the other rerank scores.
+    """
+    matrix = KeywordTermMatrix(documents_keywords)
+    if not matrix.document_count:
+        return []
+
+    idf = np.log(1 + (matrix.document_count - matrix.document_frequencies + 0.5) / (matrix.document_frequencies + 0.5))
+    query_counts = matrix.query_term_counts(query_keywords)
+    average_length = matrix.document_lengths.mean() or 1.0
+    length_norms = k1 * (1 - b + b * matrix.document_lengths / average_length)
+    term_scores = (
+        idf[matrix.cols]
+        * matrix.term_counts
+        * (k1 + 1)
+        / (matrix.term_counts + length_norms[matrix.rows])
+        * query_counts[matrix.cols]
+    )
+    scores = np.bincount(matrix.rows, weights=term_scores, minlength=matrix.document_count).astype(np.float64)
+    max_score = scores.max()
+    if max_score > 0:
+        scores = scores / max_score
+    return scores.tolist()
+
+
+def keyword_scores(
+    query_keywords: Iterable[str], documents_keywords: Sequence[Iterable[str]], method: str = "tfidf"
+) -> list[float]:
+    if method == "bm25":
+        return bm25_scores(query_keywords, documents_keywords)
+    elif method == "tfidf":
+        return tfidf_cosine_scores(query_keywords, documents_keywords)
+    else:
+        raise ValueError(f"Keyword scoring method {method} is not supported.")
+
+
+def vector_cosine_scores(query_vector: Sequence[float], vectors: Sequence[Sequence[float]]) -> list[float]:
+    """Cosine similarity between the query vector and each vector, as a single matrix-vector product."""
+    if not vectors:
+        return []
+    query = np.asarray(query_vector, dtype=np.float64)
+    matrix = np.asarray(vectors, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query))
+    return np.nan_to_num(scores, nan=0.0, posinf=0.0, neginf=0.0).tolist()
@@ -1,15 +1,20 @@
-import math
-from collections import Counter
 from typing import Optional
 
-import numpy as np
-
 from core.embedding.cached_embedding import CacheEmbedding
+from core.helper.lru_cache import LRUCache
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
+from core.rag.datasource.keyword.jieba.jieba import KeywordTableConfig
 from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
 from core.rag.models.document import Document
 from core.rag.rerank.entity.weight import VectorSetting, Weights
+from core.rag.rerank.rerank_scoring import keyword_scores, vector_cosine_scores
+from extensions.ext_database import db
+from libs import helper
+from models.dataset import DocumentSegment
+
+# keywords extracted from documents without stored segment keywords, by content hash
+_document_keywords_cache = LRUCache(capacity=5000)
 
 
 class WeightRerankRunner:
@@ -65,7 +70,7 @@ class WeightRerankRunner:
 
     def _calculate_keyword_score(self, query: str, documents: list[Document]) -> list[float]:
         """
-        Calculate BM25 scores
+        Calculate keyword scores, TF-IDF cosine similarity by default or normalized BM25
         :param query: search query
         :param documents: documents for reranking
 
@@ -73,71 +78,53 @@ class WeightRerankRunner:
         """
         keyword_table_handler = JiebaKeywordTableHandler()
         query_keywords = keyword_table_handler.extract_keywords(query, None)
+        documents_keywords = self._get_documents_keywords(documents)
+        for document, document_keywords in zip(documents, documents_keywords):
+            document.metadata["keywords"] = set(document_keywords)
+
+        return keyword_scores(
+            query_keywords, documents_keywords, method=self.weights.keyword_setting.keyword_scoring_method
+        )
+
+    def _get_documents_keywords(self, documents: list[Document]) -> list[set[str]]:
+        """
+        Get the keywords of each document, reusing the keywords stored on its segment at indexing time
+        and falling back to jieba extraction cached by content hash.
+        Extraction is capped like at indexing time, so all documents are scored on keyword sets of the same size.
+        """
+        segments_keywords = self._get_segments_keywords(documents)
+        keyword_table_handler = JiebaKeywordTableHandler()
+        max_keywords_per_chunk = KeywordTableConfig().max_keywords_per_chunk
         documents_keywords = []
         for document in documents:
-            # get the document keywords
-            document_keywords = keyword_table_handler.extract_keywords(document.page_content, None)
-            document.metadata["keywords"] = document_keywords
+            document_keywords = segments_keywords.get(document.metadata.get("doc_id"))
+            if not document_keywords:
+                content_hash = helper.generate_text_hash(document.page_content)
+                document_keywords = _document_keywords_cache.get(content_hash)
+                if document_keywords is None:
+                    document_keywords = keyword_table_handler.extract_keywords(
+                        document.page_content, max_keywords_per_chunk
+                    )
+                    _document_keywords_cache.put(content_hash, document_keywords)
             documents_keywords.append(document_keywords)
 
-        # Counter query keywords(TF)
-        query_keyword_counts = Counter(query_keywords)
-
-        # total documents
-        total_documents = len(documents)
-
-        # calculate all documents' keywords IDF
-        all_keywords = set()
-        for document_keywords in documents_keywords:
-            all_keywords.update(document_keywords)
-
-        keyword_idf = {}
-        for keyword in all_keywords:
-            # calculate include query keywords' documents
-            doc_count_containing_keyword = sum(1 for doc_keywords in documents_keywords if keyword in doc_keywords)
-            # IDF
-            keyword_idf[keyword] = math.log((1 + total_documents) / (1 + doc_count_containing_keyword)) + 1
-
-        query_tfidf = {}
-
-        for keyword, count in query_keyword_counts.items():
-            tf = count
-            idf = keyword_idf.get(keyword, 0)
-            query_tfidf[keyword] = tf * idf
-
-        # calculate all documents' TF-IDF
-        documents_tfidf = []
-        for document_keywords in documents_keywords:
-            document_keyword_counts = Counter(document_keywords)
-            document_tfidf = {}
-            for keyword, count in document_keyword_counts.items():
-                tf = count
-                idf = keyword_idf.get(keyword, 0)
-                document_tfidf[keyword] = tf * idf
-            documents_tfidf.append(document_tfidf)
-
-        def cosine_similarity(vec1, vec2):
-            intersection = set(vec1.keys()) & set(vec2.keys())
-            numerator = sum(vec1[x] * vec2[x] for x in intersection)
-
-            sum1 = sum(vec1[x] ** 2 for x in vec1)
-            sum2 = sum(vec2[x] ** 2 for x in vec2)
-            denominator = math.sqrt(sum1) * math.sqrt(sum2)
-
-            if not denominator:
-                return 0.0
-            else:
-                return float(numerator) / denominator
-
-        similarities = []
-        for document_tfidf in documents_tfidf:
-            similarity = cosine_similarity(query_tfidf, document_tfidf)
-            similarities.append(similarity)
-
-        # for idx, similarity in enumerate(similarities):
-        #     print(f"Document {idx + 1} similarity: {similarity}")
-
-        return similarities
+        return documents_keywords
+
+    def _get_segments_keywords(self, documents: list[Document]) -> dict[str, set[str]]:
+        dataset_ids = {document.metadata["dataset_id"] for document in documents if document.metadata.get("dataset_id")}
+        doc_ids = [document.metadata["doc_id"] for document in documents if document.metadata.get("doc_id")]
+        if not dataset_ids or not doc_ids:
+            return {}
+
+        segments = (
+            db.session.query(DocumentSegment.index_node_id, DocumentSegment.keywords)
+            .filter(
+                DocumentSegment.dataset_id.in_(dataset_ids),
+                DocumentSegment.index_node_id.in_(doc_ids),
+            )
+            .all()
+        )
+        return {segment.index_node_id: set(segment.keywords) for segment in segments if segment.keywords}
 
     def _calculate_cosine(
         self, tenant_id: str, query: str, documents: list[Document], vector_setting: VectorSetting
@@ -149,8 +136,6 @@ class WeightRerankRunner:
 
         :return:
         """
-        query_vector_scores = []
-
         model_manager = ModelManager()
 
         embedding_model = model_manager.get_model_instance(
@@ -161,24 +146,12 @@ class WeightRerankRunner:
         )
         cache_embedding = CacheEmbedding(embedding_model)
         query_vector = cache_embedding.embed_query(query)
-        for document in documents:
-            # calculate cosine similarity
-            if "score" in document.metadata:
-                query_vector_scores.append(document.metadata["score"])
-            else:
-                # transform to NumPy
-                vec1 = np.array(query_vector)
-                vec2 = np.array(document.vector)
-
-                # calculate dot product
-                dot_product = np.dot(vec1, vec2)
-
-                # calculate norm
-                norm_vec1 = np.linalg.norm(vec1)
-                norm_vec2 = np.linalg.norm(vec2)
-
-                # calculate cosine similarity
-                cosine_sim = dot_product / (norm_vec1 * norm_vec2)
-                query_vector_scores.append(cosine_sim)
+
+        # documents already scored by the vector search keep their score, the rest are scored in one pass
+        query_vector_scores = [document.metadata.get("score") for document in documents]
+        unscored_indices = [i for i, score in enumerate(query_vector_scores) if score is None]
+        cosine_scores = vector_cosine_scores(query_vector, [documents[i].vector for i in unscored_indices])
+        for i, cosine_score in zip(unscored_indices, cosine_scores):
+            query_vector_scores[i] = cosine_score
 
         return query_vector_scores
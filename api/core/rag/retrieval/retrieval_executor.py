@@ -0,0 +1,99 @@
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Optional
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalExecutor:
+    """
+    Process-wide bounded thread pool for retrieval tasks, shared by all requests.
+
+    Each call to `run` waits for its own tasks until a deadline. Tasks still queued when the
+    deadline passes are cancelled, tasks already running are abandoned and their results ignored.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self._name = name
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "cancelled": 0,
+            "timed_out": 0,
+            "queue_wait_seconds": 0.0,
+            "execution_seconds": 0.0,
+        }
+
+    def run(self, tasks: list[Callable[[], Any]], timeout: Optional[float] = None) -> list[Future]:
+        """
+        Run tasks in the pool and wait until they are all done or the timeout elapses.
+        :param tasks: callables without arguments
+        :param timeout: deadline in seconds for the whole batch, None to wait without limit
+
+        :return: futures in the order of the tasks, unfinished ones are cancelled or still running
+        """
+        if not tasks:
+            return []
+
+        executor = self._get_executor()
+        futures = [executor.submit(self._run_task, task, time.perf_counter()) for task in tasks]
+        with self._lock:
+            self._stats["submitted"] += len(futures)
+
+        _, not_done = wait(futures, timeout=timeout)
+        if not_done:
+            cancelled_count = sum(1 for future in not_done if future.cancel())
+            with self._lock:
+                self._stats["timed_out"] += len(not_done)
+                self._stats["cancelled"] += cancelled_count
+            logger.warning(
+                "%s: %d of %d tasks did not finish within %ss, %d cancelled before start",
+                self._name,
+                len(not_done),
+                len(futures),
+                timeout,
+                cancelled_count,
+            )
+
+        return futures
+
+    def get_stats(self) -> dict[str, Any]:
+        """Counters and accumulated queue wait / execution time of this process, for monitoring."""
+        with self._lock:
+            return {"name": self._name, "max_workers": self._max_workers, **self._stats}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            # processes forked after the pool was created can not use its threads
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix=self._name)
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run_task(self, task: Callable[[], Any], submitted_at: float) -> Any:
+        started_at = time.perf_counter()
+        try:
+            return task()
+        finally:
+            finished_at = time.perf_counter()
+            with self._lock:
+                self._stats["completed"] += 1
+                self._stats["queue_wait_seconds"] += started_at - submitted_at
+                self._stats["execution_seconds"] += finished_at - started_at
+
+
+# retrieval of whole datasets, these tasks wait on search tasks so they need a pool of their own
+dataset_retrieval_executor = RetrievalExecutor("dataset_retrieval", dify_config.RETRIEVAL_DATASET_MAX_WORKERS)
+
+# keyword, embedding and full text searches within a dataset
+search_retrieval_executor = RetrievalExecutor("search_retrieval", dify_config.RETRIEVAL_SEARCH_MAX_WORKERS)
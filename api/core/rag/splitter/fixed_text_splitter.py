@@ -39,6 +39,20 @@ class EnhanceRecursiveCharacterTextSplitter(RecursiveCharacterTextSplitter):
             else:
                 return GPT2Tokenizer.get_num_tokens(text)
 
+        def _batch_token_encoder(texts: list[str]) -> list[int]:
+            # empty texts are not tokenized
+            non_empty_texts = [text for text in texts if text]
+            if not non_empty_texts:
+                return [0] * len(texts)
+
+            if embedding_model_instance:
+                non_empty_lengths = iter(
+                    embedding_model_instance.get_text_embedding_num_tokens_per_text(texts=non_empty_texts)
+                )
+            else:
+                non_empty_lengths = iter(GPT2Tokenizer.get_num_tokens_batch(non_empty_texts))
+            return [next(non_empty_lengths) if text else 0 for text in texts]
+
         if issubclass(cls, TokenTextSplitter):
             extra_kwargs = {
                 "model_name": embedding_model_instance.model if embedding_model_instance else "gpt2",
@@ -47,7 +61,7 @@ class EnhanceRecursiveCharacterTextSplitter(RecursiveCharacterTextSplitter):
             }
             kwargs = {**kwargs, **extra_kwargs}
 
-        return cls(length_function=_token_encoder, **kwargs)
+        return cls(length_function=_token_encoder, batch_length_function=_batch_token_encoder, **kwargs)
 
 
 class FixedRecursiveCharacterTextSplitter(EnhanceRecursiveCharacterTextSplitter):
@@ -65,8 +79,8 @@ class FixedRecursiveCharacterTextSplitter(EnhanceRecursiveCharacterTextSplitter)
             chunks = [text]
 
         final_chunks = []
-        for chunk in chunks:
-            if self._length_function(chunk) > self._chunk_size:
+        for chunk, chunk_len in zip(chunks, self._get_lengths(chunks)):
+            if chunk_len > self._chunk_size:
                 final_chunks.extend(self.recursive_split_text(chunk))
             else:
                 final_chunks.append(chunk)
@@ -93,8 +107,7 @@ class FixedRecursiveCharacterTextSplitter(EnhanceRecursiveCharacterTextSplitter)
         # Now go merging things, recursively splitting longer texts.
         _good_splits = []
         _good_splits_lengths = []  # cache the lengths of the splits
-        for s in splits:
-            s_len = self._length_function(s)
+        for s, s_len in zip(splits, self._get_lengths(splits)):
             if s_len < self._chunk_size:
                 _good_splits.append(s)
                 _good_splits_lengths.append(s_len)
@@ -21,6 +21,9 @@ logger = logging.getLogger(__name__)
 
 TS = TypeVar("TS", bound="TextSplitter")
 
+# max number of fragment lengths memoized by a splitter
+LENGTH_CACHE_SIZE = 100_000
+
 
 def _split_text_with_regex(text: str, separator: str, keep_separator: bool) -> list[str]:
     # Now that we have the separator, split the text
@@ -48,6 +51,7 @@ class TextSplitter(BaseDocumentTransformer, ABC):
         length_function: Callable[[str], int] = len,
         keep_separator: bool = False,
         add_start_index: bool = False,
+        batch_length_function: Optional[Callable[[list[str]], list[int]]] = None,
     ) -> None:
         """Create a new TextSplitter.
 
@@ -57,6 +61,8 @@ class TextSplitter(BaseDocumentTransformer, ABC):
             length_function: Function that measures the length of given chunks
             keep_separator: Whether to keep the separator in the chunks
             add_start_index: If `True`, includes chunk's start index in metadata
+            batch_length_function: Function that measures the lengths of a batch of chunks, the splits of a
+                text are measured in one call instead of one `length_function` call each
         """
         if chunk_overlap > chunk_size:
             raise ValueError(
@@ -65,6 +71,8 @@ class TextSplitter(BaseDocumentTransformer, ABC):
         self._chunk_size = chunk_size
         self._chunk_overlap = chunk_overlap
         self._length_function = length_function
+        self._batch_length_function = batch_length_function
+        self._length_cache: dict[str, int] = {}
         self._keep_separator = keep_separator
         self._add_start_index = add_start_index
 
@@ -72,6 +80,24 @@ class TextSplitter(BaseDocumentTransformer, ABC):
     def split_text(self, text: str) -> list[str]:
         """Split text into multiple components."""
 
+    def _get_lengths(self, texts: list[str]) -> list[int]:
+        """Measure the lengths of texts, memoized for repeated fragments and separators."""
+        lengths = [self._length_cache.get(text) for text in texts]
+        missing_texts = list(dict.fromkeys(text for text, length in zip(texts, lengths) if length is None))
+        if not missing_texts:
+            return lengths
+
+        if self._batch_length_function:
+            missing_lengths = self._batch_length_function(missing_texts)
+        else:
+            missing_lengths = [self._length_function(text) for text in missing_texts]
+
+        if len(self._length_cache) + len(missing_texts) > LENGTH_CACHE_SIZE:
+            self._length_cache.clear()
+        self._length_cache.update(zip(missing_texts, missing_lengths))
+        missing_lengths_by_text = dict(zip(missing_texts, missing_lengths))
+        return [length if length is not None else missing_lengths_by_text[text] for text, length in zip(texts, lengths)]
+
     def create_documents(self, texts: list[str], metadatas: Optional[list[dict]] = None) -> list[Document]:
         """Create documents from a list of texts."""
         _metadatas = metadatas or [{}] * len(texts)
@@ -106,10 +132,11 @@ class TextSplitter(BaseDocumentTransformer, ABC):
     def _merge_splits(self, splits: Iterable[str], separator: str, lengths: list[int]) -> list[str]:
         # We now want to combine these smaller pieces into medium size
         # chunks to send to the LLM.
-        separator_len = self._length_function(separator)
+        separator_len = self._get_lengths([separator])[0]
 
         docs = []
         current_doc: list[str] = []
+        current_doc_lengths: list[int] = []
         total = 0
         index = 0
         for d in splits:
@@ -129,9 +156,11 @@ class TextSplitter(BaseDocumentTransformer, ABC):
                     while total > self._chunk_overlap or (
                         total + _len + (separator_len if len(current_doc) > 0 else 0) > self._chunk_size and total > 0
                     ):
-                        total -= self._length_function(current_doc[0]) + (separator_len if len(current_doc) > 1 else 0)
+                        total -= current_doc_lengths[0] + (separator_len if len(current_doc) > 1 else 0)
                         current_doc = current_doc[1:]
+                        current_doc_lengths = current_doc_lengths[1:]
             current_doc.append(d)
+            current_doc_lengths.append(_len)
             total += _len + (separator_len if len(current_doc) > 1 else 0)
             index += 1
         doc = self._join_docs(current_doc, separator)
@@ -223,9 +252,7 @@ class CharacterTextSplitter(TextSplitter):
         # First we naively split the large input into a bunch of smaller ones.
         splits = _split_text_with_regex(text, self._separator, self._keep_separator)
         _separator = "" if self._keep_separator else self._separator
-        _good_splits_lengths = []  # cache the lengths of the splits
-        for split in splits:
-            _good_splits_lengths.append(self._length_function(split))
+        _good_splits_lengths = self._get_lengths(splits)  # cache the lengths of the splits
         return self._merge_splits(splits, _separator, _good_splits_lengths)
 
 
@@ -479,8 +506,7 @@ class RecursiveCharacterTextSplitter(TextSplitter):
         _good_splits_lengths = []  # cache the lengths of the splits
         _separator = "" if self._keep_separator else separator
 
-        for s in splits:
-            s_len = self._length_function(s)
+        for s, s_len in zip(splits, self._get_lengths(splits)):
             if s_len < self._chunk_size:
                 _good_splits.append(s)
                 _good_splits_lengths.append(s_len)
@@ -3,7 +3,7 @@ import logging
 import mimetypes
 from collections.abc import Generator
 from os import listdir, path
-from threading import Lock
+from threading import RLock
 from typing import Any, Optional, Union
 
 from configs import dify_config
@@ -11,6 +11,7 @@ from core.agent.entities import AgentToolEntity
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.helper.module_import_helper import load_single_subclass_from_source
 from core.helper.position_helper import is_filtered
+from core.helper.provider_manifest import ProviderManifest
 from core.model_runtime.utils.encoders import jsonable_encoder
 from core.tools.entities.api_entities import UserToolProvider, UserToolProviderTypeLiteral
 from core.tools.entities.common_entities import I18nObject
@@ -32,23 +33,31 @@ from services.tools.tools_transform_service import ToolTransformService
 logger = logging.getLogger(__name__)
 
 
+_builtin_providers_path = path.join(path.dirname(path.realpath(__file__)), "provider", "builtin")
+
+
 class ToolManager:
-    _builtin_provider_lock = Lock()
+    # reentrant, the builtin providers may be used while they are listed
+    _builtin_provider_lock = RLock()
     _builtin_providers = {}
     _builtin_providers_loaded = False
+    _builtin_provider_names = None
     _builtin_tools_labels = {}
+    _builtin_tools_labels_loaded = False
+    _builtin_providers_manifest = ProviderManifest(_builtin_providers_path)
 
     @classmethod
     def get_builtin_provider(cls, provider: str) -> BuiltinToolProviderController:
         """
-        get the builtin provider
+        get the builtin provider, its module is imported on first use
 
         :param provider: the name of the provider
         :return: the provider
         """
-        if len(cls._builtin_providers) == 0:
-            # init the builtin providers
-            cls.load_builtin_providers_cache()
+        if provider not in cls._builtin_providers and not cls._builtin_providers_loaded:
+            with cls._builtin_provider_lock:
+                if provider not in cls._builtin_providers and provider in cls._list_builtin_provider_names():
+                    cls._load_builtin_provider(provider)
 
         if provider not in cls._builtin_providers:
             raise ToolProviderNotFoundError(f"builtin provider {provider} not found")
@@ -317,17 +326,13 @@ class ToolManager:
 
         :return: the absolute path of the icon, the mime type of the icon
         """
-        # get provider
-        provider_controller = cls.get_builtin_provider(provider)
+        manifest = cls._builtin_providers_manifest.load()
+        if manifest is not None and provider in manifest:
+            icon = manifest[provider]["icon"]
+        else:
+            icon = cls.get_builtin_provider(provider).identity.icon
 
-        absolute_path = path.join(
-            path.dirname(path.realpath(__file__)),
-            "provider",
-            "builtin",
-            provider,
-            "_assets",
-            provider_controller.identity.icon,
-        )
+        absolute_path = path.join(_builtin_providers_path, provider, "_assets", icon)
         # check if the icon exists
         if not path.exists(absolute_path):
             raise ToolProviderNotFoundError(f"builtin provider {provider} icon not found")
@@ -357,44 +362,86 @@ class ToolManager:
         """
         list all the builtin providers
         """
-        for provider in listdir(path.join(path.dirname(path.realpath(__file__)), "provider", "builtin")):
-            if provider.startswith("__"):
-                continue
-
-            if path.isdir(path.join(path.dirname(path.realpath(__file__)), "provider", "builtin", provider)):
-                if provider.startswith("__"):
-                    continue
-
-                # init provider
-                try:
-                    provider_class = load_single_subclass_from_source(
-                        module_name=f"core.tools.provider.builtin.{provider}.{provider}",
-                        script_path=path.join(
-                            path.dirname(path.realpath(__file__)), "provider", "builtin", provider, f"{provider}.py"
-                        ),
-                        parent_type=BuiltinToolProviderController,
-                    )
-                    provider: BuiltinToolProviderController = provider_class()
-                    cls._builtin_providers[provider.identity.name] = provider
-                    for tool in provider.get_tools():
-                        cls._builtin_tools_labels[tool.identity.name] = tool.identity.label
-                    yield provider
+        for provider_name in cls._list_builtin_provider_names():
+            # providers used before the listing are already loaded
+            provider = cls._builtin_providers.get(provider_name) or cls._load_builtin_provider(provider_name)
+            if provider:
+                yield provider
 
-                except Exception as e:
-                    logger.error(f"load builtin provider {provider} error: {e}")
-                    continue
         # set builtin providers loaded
         cls._builtin_providers_loaded = True
 
+    @classmethod
+    def _list_builtin_provider_names(cls) -> list[str]:
+        """
+        list the names of the builtin providers, from the manifest when it is up to date
+        """
+        if cls._builtin_provider_names is None:
+            manifest = cls._builtin_providers_manifest.load()
+            if manifest is not None:
+                cls._builtin_provider_names = list(manifest)
+            else:
+                cls._builtin_provider_names = [
+                    provider
+                    for provider in listdir(_builtin_providers_path)
+                    if not provider.startswith("__") and path.isdir(path.join(_builtin_providers_path, provider))
+                ]
+
+        return cls._builtin_provider_names
+
+    @classmethod
+    def _load_builtin_provider(cls, provider_name: str) -> Optional[BuiltinToolProviderController]:
+        """
+        import the module of a builtin provider and cache the provider
+
+        :param provider_name: the name of the provider, the name of its directory
+        :return: the provider, None if it can not be loaded
+        """
+        try:
+            provider_class = load_single_subclass_from_source(
+                module_name=f"core.tools.provider.builtin.{provider_name}.{provider_name}",
+                script_path=path.join(_builtin_providers_path, provider_name, f"{provider_name}.py"),
+                parent_type=BuiltinToolProviderController,
+            )
+            provider: BuiltinToolProviderController = provider_class()
+            cls._builtin_providers[provider.identity.name] = provider
+            for tool in provider.get_tools():
+                cls._builtin_tools_labels[tool.identity.name] = tool.identity.label
+            return provider
+        except Exception as e:
+            logger.error(f"load builtin provider {provider_name} error: {e}")
+            return None
+
     @classmethod
     def load_builtin_providers_cache(cls):
         for _ in cls.list_builtin_providers():
             pass
 
+    @classmethod
+    def get_builtin_providers_manifest(cls) -> ProviderManifest:
+        return cls._builtin_providers_manifest
+
+    @classmethod
+    def build_builtin_providers_manifest(cls) -> dict[str, dict]:
+        """
+        build the manifest entries of the builtin providers, see `ProviderManifest.save`
+
+        :return: the manifest entries by provider name
+        """
+        return {
+            provider.identity.name: {
+                "icon": provider.identity.icon,
+                "tool_labels": {tool.identity.name: tool.identity.label.model_dump() for tool in provider.get_tools()},
+            }
+            for provider in cls.list_builtin_providers()
+        }
+
     @classmethod
     def clear_builtin_providers_cache(cls):
         cls._builtin_providers = {}
         cls._builtin_providers_loaded = False
+        cls._builtin_provider_names = None
+        cls._builtin_tools_labels_loaded = False
 
     @classmethod
     def get_tool_label(cls, tool_name: str) -> Union[I18nObject, None]:
@@ -405,9 +452,16 @@ class ToolManager:
 
         :return: the label of the tool
         """
-        if len(cls._builtin_tools_labels) == 0:
-            # init the builtin providers
-            cls.load_builtin_providers_cache()
+        if tool_name not in cls._builtin_tools_labels and not cls._builtin_tools_labels_loaded:
+            manifest = cls._builtin_providers_manifest.load()
+            if manifest is not None:
+                for provider_manifest in manifest.values():
+                    for name, label in provider_manifest["tool_labels"].items():
+                        cls._builtin_tools_labels[name] = I18nObject(**label)
+            else:
+                # init the builtin providers
+                cls.load_builtin_providers_cache()
+            cls._builtin_tools_labels_loaded = True
 
         if tool_name not in cls._builtin_tools_labels:
             return None
@@ -638,6 +692,3 @@ class ToolManager:
             return json.loads(provider.icon)
         else:
             raise ValueError(f"provider type {provider_type} not found")
-
-
-ToolManager.load_builtin_providers_cache()
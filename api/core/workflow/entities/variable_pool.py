@@ -1,8 +1,9 @@
-from collections import defaultdict
+import sys
+import threading
 from collections.abc import Mapping, Sequence
-from typing import Any, Union
+from typing import Any, Optional, Union
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 from typing_extensions import deprecated
 
 from core.app.segments import Segment, Variable, factory
@@ -16,14 +17,163 @@ SYSTEM_VARIABLE_NODE_ID = "sys"
 ENVIRONMENT_VARIABLE_NODE_ID = "env"
 CONVERSATION_VARIABLE_NODE_ID = "conversation"
 
+# Forks stack layers, past this depth the layers of a pool are merged to keep lookups fast.
+MAX_LAYER_DEPTH = 16
+
+# Markers in the layers, a variable removed and a node whose variables of the lower layers are removed.
+_REMOVED = object()
+_NODE_RESET = object()
+_MISSING = object()
+
+# Types of the raw values turned into segments on first read.
+_LAZY_SEGMENT_TYPES = (list, dict)
+
+
+class _MemoryUsage:
+    """Variables added to the pools of a run, shared by the pool and its forks."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.variables = 0
+        self.bytes = 0
+
+    def add(self, size: int) -> None:
+        with self._lock:
+            self.variables += 1
+            self.bytes += size
+
+
+class VariableLayers:
+    """
+    Copy-on-write storage of the variables of a pool.
+
+    Variables are stored in layers, looked up from the top layer down. A layer maps the node id to the
+    variables of the node, keyed by the hash of the selector without the node id. Only the top layer is
+    modified, lower layers are frozen and shared with the forks, so forking takes constant time.
+
+    Values are segments, or raw lists and dicts turned into segments on first read.
+    """
+
+    def __init__(
+        self, frozen_layers: tuple[dict[str, dict], ...] = (), memory_usage: Optional[_MemoryUsage] = None
+    ) -> None:
+        self._layer: dict[str, dict] = {}
+        self._frozen_layers = frozen_layers
+        self._lock = threading.Lock()
+        self._memory_usage = memory_usage or _MemoryUsage()
+
+    @property
+    def depth(self) -> int:
+        return len(self._frozen_layers) + 1
+
+    def set(self, node_id: str, hash_key: int, value: Any, size: int) -> None:
+        with self._lock:
+            node_variables = self._layer.get(node_id)
+            if node_variables is None:
+                node_variables = self._layer[node_id] = {}
+            node_variables[hash_key] = value
+        self._memory_usage.add(size)
+
+    def get(self, node_id: str, hash_key: int) -> Segment | None:
+        node_variables = self._layer.get(node_id)
+        if node_variables is not None and not self._frozen_layers:
+            # fast path of pools never forked
+            value = node_variables.get(hash_key)
+        else:
+            value = self._lookup(node_id, hash_key)
+
+        if type(value) in _LAZY_SEGMENT_TYPES:
+            return self._build_segment(node_id, hash_key, value)
+
+        return value
+
+    def remove(self, node_id: str, hash_key: int) -> None:
+        with self._lock:
+            if self._frozen_layers:
+                self._layer.setdefault(node_id, {})[hash_key] = _REMOVED
+            else:
+                self._layer.get(node_id, {}).pop(hash_key, None)
+
+    def remove_node(self, node_id: str) -> None:
+        with self._lock:
+            if self._frozen_layers:
+                self._layer[node_id] = {_NODE_RESET: True}
+            else:
+                self._layer.pop(node_id, None)
+
+    def fork(self) -> "VariableLayers":
+        with self._lock:
+            if self._layer:
+                self._frozen_layers = (*self._frozen_layers, self._layer)
+                self._layer = {}
+                if len(self._frozen_layers) > MAX_LAYER_DEPTH:
+                    self._frozen_layers = (self._merge_layers(self._frozen_layers),)
+
+            return VariableLayers(frozen_layers=self._frozen_layers, memory_usage=self._memory_usage)
+
+    def get_memory_usage(self) -> dict[str, int]:
+        return {
+            "variables": self._memory_usage.variables,
+            "bytes": self._memory_usage.bytes,
+            "layers": self.depth,
+        }
+
+    def _lookup(self, node_id: str, hash_key: int) -> Any:
+        for layer in (self._layer, *reversed(self._frozen_layers)):
+            node_variables = layer.get(node_id)
+            if node_variables is None:
+                continue
+
+            value = node_variables.get(hash_key, _MISSING)
+            if value is _MISSING:
+                if _NODE_RESET in node_variables:
+                    return None
+                continue
+
+            return None if value is _REMOVED else value
+
+        return None
+
+    def _build_segment(self, node_id: str, hash_key: int, value: Any) -> Segment:
+        segment = factory.build_segment(value)
+        # kept in place of the raw value in the layer holding it, whichever pool sharing the layer
+        # builds it first, later reads of the raw value are replaced by the same segment
+        for layer in (self._layer, *reversed(self._frozen_layers)):
+            node_variables = layer.get(node_id)
+            if node_variables is not None and node_variables.get(hash_key) is value:
+                node_variables[hash_key] = segment
+                break
+
+        return segment
+
+    @staticmethod
+    def _merge_layers(layers: Sequence[dict[str, dict]]) -> dict[str, dict]:
+        merged: dict[str, dict] = {}
+        for layer in layers:
+            for node_id, node_variables in layer.items():
+                if _NODE_RESET in node_variables:
+                    merged[node_id] = {}
+                merged_node_variables = merged.setdefault(node_id, {})
+                for hash_key, value in node_variables.items():
+                    if hash_key is _NODE_RESET:
+                        continue
+                    if value is _REMOVED:
+                        merged_node_variables.pop(hash_key, None)
+                    else:
+                        merged_node_variables[hash_key] = value
+
+        return merged
+
 
 class VariablePool(BaseModel):
-    # Variable dictionary is a dictionary for looking up variables by their selector.
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    # Variable layers are a dictionary for looking up variables by their selector.
     # The first element of the selector is the node id, it's the first-level key in the dictionary.
     # Other elements of the selector are the keys in the second-level dictionary. To get the key, we hash the
     # elements of the selector except the first one.
-    variable_dictionary: dict[str, dict[int, Segment]] = Field(
-        description="Variables mapping", default=defaultdict(dict)
+    variable_layers: VariableLayers = Field(
+        description="Variables mapping", default_factory=VariableLayers, exclude=True, repr=False
     )
 
     # TODO: This user inputs is not used for pool.
@@ -63,6 +213,9 @@ class VariablePool(BaseModel):
         """
         Adds a variable to the variable pool.
 
+        Lists and dicts are turned into segments on first read only, so large arrays passed from node
+        to node are not validated for each node output. They are shallow copied, as segments copy them.
+
         Args:
             selector (Sequence[str]): The selector for the variable.
             value (VariableValue): The value of the variable.
@@ -81,11 +234,17 @@ class VariablePool(BaseModel):
 
         if isinstance(value, Segment):
             v = value
+            size = value.size
+        elif type(value) in _LAZY_SEGMENT_TYPES:
+            # copied like the segments built from them, later changes of the caller are not seen by the pool
+            v = value.copy()
+            size = sys.getsizeof(value)
         else:
             v = factory.build_segment(value)
+            size = v.size
 
         hash_key = hash(tuple(selector[1:]))
-        self.variable_dictionary[selector[0]][hash_key] = v
+        self.variable_layers.set(selector[0], hash_key, v, size)
 
     def get(self, selector: Sequence[str], /) -> Segment | None:
         """
@@ -103,7 +262,7 @@ class VariablePool(BaseModel):
         if len(selector) < 2:
             raise ValueError("Invalid selector")
         hash_key = hash(tuple(selector[1:]))
-        value = self.variable_dictionary[selector[0]].get(hash_key)
+        value = self.variable_layers.get(selector[0], hash_key)
 
         return value
 
@@ -124,7 +283,7 @@ class VariablePool(BaseModel):
         if len(selector) < 2:
             raise ValueError("Invalid selector")
         hash_key = hash(tuple(selector[1:]))
-        value = self.variable_dictionary[selector[0]].get(hash_key)
+        value = self.variable_layers.get(selector[0], hash_key)
         return value.to_object() if value else None
 
     def remove(self, selector: Sequence[str], /):
@@ -140,10 +299,10 @@ class VariablePool(BaseModel):
         if not selector:
             return
         if len(selector) == 1:
-            self.variable_dictionary[selector[0]] = {}
+            self.variable_layers.remove_node(selector[0])
             return
         hash_key = hash(tuple(selector[1:]))
-        self.variable_dictionary[selector[0]].pop(hash_key, None)
+        self.variable_layers.remove(selector[0], hash_key)
 
     def remove_node(self, node_id: str, /):
         """
@@ -155,4 +314,25 @@ class VariablePool(BaseModel):
         Returns:
             None
         """
-        self.variable_dictionary.pop(node_id, None)
+        self.variable_layers.remove_node(node_id)
+
+    def fork(self) -> "VariablePool":
+        """
+        Create a copy-on-write view of the variable pool.
+
+        The current variables become a frozen layer shared by both pools, so forking takes constant time
+        and variables added to the fork are invisible to this pool, and the other way around.
+
+        Returns:
+            VariablePool: The forked variable pool.
+        """
+        return self.model_copy(update={"variable_layers": self.variable_layers.fork()})
+
+    def get_memory_usage(self) -> dict[str, int]:
+        """
+        Variables added to the pools of the run, this pool and its forks, with their shallow size in bytes.
+
+        Returns:
+            dict[str, int]: The number of variables, their size and the depth of the layers.
+        """
+        return self.variable_layers.get_memory_usage()
@@ -55,6 +55,8 @@ class BaseNodeEvent(GraphEngineEvent):
     """parent parallel start node id if node is in parallel"""
     in_iteration_id: Optional[str] = None
     """iteration id if node is in iteration"""
+    in_iteration_index: Optional[int] = None
+    """iteration item index if node is in iteration"""
 
 
 class NodeRunStartedEvent(BaseNodeEvent):
@@ -97,6 +99,8 @@ class BaseParallelBranchEvent(GraphEngineEvent):
     """parent parallel start node id if node is in parallel"""
     in_iteration_id: Optional[str] = None
     """iteration id if node is in iteration"""
+    in_iteration_index: Optional[int] = None
+    """iteration item index if node is in iteration"""
 
 
 class ParallelBranchRunStartedEvent(BaseParallelBranchEvent):
@@ -104,11 +108,12 @@ class ParallelBranchRunStartedEvent(BaseParallelBranchEvent):
 
 
 class ParallelBranchRunSucceededEvent(BaseParallelBranchEvent):
-    pass
+    elapsed_time: Optional[float] = Field(default=None, description="branch run time in seconds")
 
 
 class ParallelBranchRunFailedEvent(BaseParallelBranchEvent):
     error: str = Field(..., description="failed reason")
+    elapsed_time: Optional[float] = Field(default=None, description="branch run time in seconds")
 
 
 ###########################################
@@ -2,7 +2,7 @@ import uuid
 from collections.abc import Mapping
 from typing import Any, Optional, cast
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from core.workflow.entities.node_entities import NodeType
 from core.workflow.graph_engine.entities.run_condition import RunCondition
@@ -51,6 +51,9 @@ class Graph(BaseModel):
     answer_stream_generate_routes: AnswerStreamGenerateRoute = Field(..., description="answer stream generate routes")
     end_stream_param: EndStreamParam = Field(..., description="end stream param")
 
+    # Graphs shared across runs by the graph cache must not be modified.
+    _read_only: bool = PrivateAttr(default=False)
+
     @classmethod
     def init(cls, graph_config: Mapping[str, Any], root_node_id: Optional[str] = None) -> "Graph":
         """
@@ -201,6 +204,9 @@ class Graph(BaseModel):
         :param target_node_id: target node id
         :param run_condition: run condition
         """
+        if self._read_only:
+            raise ValueError("Graph is shared across workflow runs and can not be modified")
+
         if source_node_id not in self.node_ids or target_node_id not in self.node_ids:
             return
 
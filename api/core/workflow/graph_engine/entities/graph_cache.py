@@ -0,0 +1,93 @@
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Optional
+
+from configs import dify_config
+from core.workflow.graph_engine.entities.graph import Graph
+
+
+class GraphCache:
+    """
+    Process-wide LRU cache of the compiled graphs of workflows.
+
+    Compiling a graph (edge mappings, parallels, answer and end stream routes) is pure and depends on the
+    graph config only, so compiled graphs are shared across runs, keyed by workflow id, hash of the graph
+    config and root node id. Editing a draft workflow changes the hash, so stale graphs are never returned.
+
+    Cached graphs are shared and read-only.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._graphs: OrderedDict[tuple[str, str, Optional[str]], Graph] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get_or_init(
+        self, workflow_id: str, graph_config: Mapping[str, Any], root_node_id: Optional[str] = None
+    ) -> Graph:
+        """
+        Get the compiled graph of a workflow, compiling it on a cache miss.
+
+        :param workflow_id: workflow id
+        :param graph_config: graph config
+        :param root_node_id: root node id
+        :return: read-only graph
+        """
+        if self._max_size <= 0:
+            return Graph.init(graph_config=graph_config, root_node_id=root_node_id)
+
+        key = (workflow_id, self._hash_graph_config(graph_config), root_node_id)
+        with self._lock:
+            graph = self._graphs.get(key)
+            if graph is not None:
+                self._graphs.move_to_end(key)
+                self._hits += 1
+                return graph
+
+            self._misses += 1
+
+        # compiled outside of the lock, concurrent misses of the same graph compile it more than once,
+        # from a copy so that the node configs of the cached graph do not change with the caller's config
+        graph = Graph.init(graph_config=copy.deepcopy(graph_config), root_node_id=root_node_id)
+        graph._read_only = True
+
+        with self._lock:
+            self._graphs[key] = graph
+            while len(self._graphs) > self._max_size:
+                self._graphs.popitem(last=False)
+
+        return graph
+
+    def clear(self) -> None:
+        with self._lock:
+            self._graphs.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Size and hit rate of the cache in this process, for monitoring."""
+        with self._lock:
+            return {
+                "max_size": self._max_size,
+                "size": len(self._graphs),
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+    @staticmethod
+    def _hash_graph_config(graph_config: Mapping[str, Any]) -> str:
+        # only the parts of the graph config used to compile the graph
+        content = json.dumps(
+            {"nodes": graph_config.get("nodes"), "edges": graph_config.get("edges")},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+graph_cache = GraphCache(max_size=dify_config.WORKFLOW_GRAPH_CACHE_SIZE)
@@ -1,9 +1,7 @@
 import logging
-import queue
 import time
 import uuid
 from collections.abc import Generator, Mapping
-from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Any, Optional
 
 from flask import Flask, current_app
@@ -36,6 +34,7 @@ from core.workflow.graph_engine.entities.graph import Graph, GraphEdge
 from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
 from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
 from core.workflow.graph_engine.entities.runtime_route_state import RouteNodeState
+from core.workflow.graph_engine.parallel_branch_join import ParallelBranchCancelledError, ParallelBranchJoin
 from core.workflow.nodes.answer.answer_stream_processor import AnswerStreamProcessor
 from core.workflow.nodes.base_node import BaseNode
 from core.workflow.nodes.end.end_stream_processor import EndStreamProcessor
@@ -47,32 +46,7 @@ from models.workflow import WorkflowNodeExecutionStatus, WorkflowType
 logger = logging.getLogger(__name__)
 
 
-class GraphEngineThreadPool(ThreadPoolExecutor):
-    def __init__(
-        self, max_workers=None, thread_name_prefix="", initializer=None, initargs=(), max_submit_count=100
-    ) -> None:
-        super().__init__(max_workers, thread_name_prefix, initializer, initargs)
-        self.max_submit_count = max_submit_count
-        self.submit_count = 0
-
-    def submit(self, fn, *args, **kwargs):
-        self.submit_count += 1
-        self.check_is_full()
-
-        return super().submit(fn, *args, **kwargs)
-
-    def task_done_callback(self, future):
-        self.submit_count -= 1
-
-    def check_is_full(self) -> None:
-        print(f"submit_count: {self.submit_count}, max_submit_count: {self.max_submit_count}")
-        if self.submit_count > self.max_submit_count:
-            raise ValueError(f"Max submit count {self.max_submit_count} of workflow thread pool reached.")
-
-
 class GraphEngine:
-    workflow_thread_pool_mapping: dict[str, GraphEngineThreadPool] = {}
-
     def __init__(
         self,
         tenant_id: str,
@@ -90,24 +64,9 @@ class GraphEngine:
         max_execution_time: int,
         thread_pool_id: Optional[str] = None,
     ) -> None:
-        thread_pool_max_submit_count = 100
-        thread_pool_max_workers = 10
-
-        # init thread pool
-        if thread_pool_id:
-            if thread_pool_id not in GraphEngine.workflow_thread_pool_mapping:
-                raise ValueError(f"Max submit count {thread_pool_max_submit_count} of workflow thread pool reached.")
-
-            self.thread_pool_id = thread_pool_id
-            self.thread_pool = GraphEngine.workflow_thread_pool_mapping[thread_pool_id]
-            self.is_main_thread_pool = False
-        else:
-            self.thread_pool = GraphEngineThreadPool(
-                max_workers=thread_pool_max_workers, max_submit_count=thread_pool_max_submit_count
-            )
-            self.thread_pool_id = str(uuid.uuid4())
-            self.is_main_thread_pool = True
-            GraphEngine.workflow_thread_pool_mapping[self.thread_pool_id] = self.thread_pool
+        # parallel branches run on the process-wide scheduler, the thread pool id identifies the outermost run
+        # for the scheduler quotas and is shared by the nested graph engines (iterations, workflow tools)
+        self.thread_pool_id = thread_pool_id or str(uuid.uuid4())
 
         self.graph = graph
         self.init_params = GraphInitParams(
@@ -180,21 +139,14 @@ class GraphEngine:
 
             # trigger graph run success event
             yield GraphRunSucceededEvent(outputs=self.graph_runtime_state.outputs)
-            self._release_thread()
         except GraphRunFailedError as e:
             yield GraphRunFailedEvent(error=e.error)
-            self._release_thread()
             return
         except Exception as e:
             logger.exception("Unknown Error when graph running")
             yield GraphRunFailedEvent(error=str(e))
-            self._release_thread()
             raise e
 
-    def _release_thread(self):
-        if self.is_main_thread_pool and self.thread_pool_id in GraphEngine.workflow_thread_pool_mapping:
-            del GraphEngine.workflow_thread_pool_mapping[self.thread_pool_id]
-
     def _run(
         self,
         start_node_id: str,
@@ -419,13 +371,13 @@ class GraphEngine:
         if not parallel:
             raise GraphRunFailedError(f"Parallel {parallel_id} not found.")
 
-        # run parallel nodes, run in new thread and use queue to get results
-        q: queue.Queue = queue.Queue()
-
-        # Create a list to store the threads
-        futures = []
-
-        # new thread
+        # run parallel branches on the scheduler, their events are handed over through the join
+        join = ParallelBranchJoin(
+            tenant_id=self.init_params.tenant_id,
+            run_id=self.thread_pool_id,
+            parent=ParallelBranchJoin.current(),
+        )
+        flask_app = current_app._get_current_object()  # type: ignore[attr-defined]
         for edge in edge_mappings:
             if (
                 edge.target_node_id not in self.graph.node_parallel_mapping
@@ -433,44 +385,25 @@ class GraphEngine:
             ):
                 continue
 
-            future = self.thread_pool.submit(
+            join.submit(
                 self._run_parallel_node,
-                **{
-                    "flask_app": current_app._get_current_object(),  # type: ignore[attr-defined]
-                    "q": q,
-                    "parallel_id": parallel_id,
-                    "parallel_start_node_id": edge.target_node_id,
-                    "parent_parallel_id": in_parallel_id,
-                    "parent_parallel_start_node_id": parallel_start_node_id,
-                },
+                flask_app=flask_app,
+                join=join,
+                parallel_id=parallel_id,
+                parallel_start_node_id=edge.target_node_id,
+                parent_parallel_id=in_parallel_id,
+                parent_parallel_start_node_id=parallel_start_node_id,
             )
 
-            future.add_done_callback(self.thread_pool.task_done_callback)
-
-            futures.append(future)
-
-        succeeded_count = 0
-        while True:
-            try:
-                event = q.get(timeout=1)
-                if event is None:
-                    break
-
+        try:
+            for event in join.events():
                 yield event
-                if event.parallel_id == parallel_id:
-                    if isinstance(event, ParallelBranchRunSucceededEvent):
-                        succeeded_count += 1
-                        if succeeded_count == len(futures):
-                            q.put(None)
-
-                        continue
-                    elif isinstance(event, ParallelBranchRunFailedEvent):
-                        raise GraphRunFailedError(event.error)
-            except queue.Empty:
-                continue
-
-        # wait all threads
-        wait(futures)
+                if event.parallel_id == parallel_id and isinstance(event, ParallelBranchRunFailedEvent):
+                    raise GraphRunFailedError(event.error)
+        except BaseException:
+            # stop the sibling branches instead of letting them run to completion
+            join.cancel()
+            raise
 
         # get final node id
         final_node_id = parallel.end_to_node_id
@@ -480,7 +413,7 @@ class GraphEngine:
     def _run_parallel_node(
         self,
         flask_app: Flask,
-        q: queue.Queue,
+        join: ParallelBranchJoin,
         parallel_id: str,
         parallel_start_node_id: str,
         parent_parallel_id: Optional[str] = None,
@@ -489,9 +422,10 @@ class GraphEngine:
         """
         Run parallel nodes
         """
+        start_at = time.perf_counter()
         with flask_app.app_context():
             try:
-                q.put(
+                join.put(
                     ParallelBranchRunStartedEvent(
                         parallel_id=parallel_id,
                         parallel_start_node_id=parallel_start_node_id,
@@ -508,37 +442,47 @@ class GraphEngine:
                     parent_parallel_start_node_id=parent_parallel_start_node_id,
                 )
 
-                for item in generator:
-                    q.put(item)
+                try:
+                    for item in generator:
+                        if not join.put(item):
+                            # a sibling branch failed
+                            return
+                finally:
+                    generator.close()
 
                 # trigger graph run success event
-                q.put(
+                join.put(
                     ParallelBranchRunSucceededEvent(
                         parallel_id=parallel_id,
                         parallel_start_node_id=parallel_start_node_id,
                         parent_parallel_id=parent_parallel_id,
                         parent_parallel_start_node_id=parent_parallel_start_node_id,
+                        elapsed_time=time.perf_counter() - start_at,
                     )
                 )
+            except ParallelBranchCancelledError:
+                pass
             except GraphRunFailedError as e:
-                q.put(
+                join.put(
                     ParallelBranchRunFailedEvent(
                         parallel_id=parallel_id,
                         parallel_start_node_id=parallel_start_node_id,
                         parent_parallel_id=parent_parallel_id,
                         parent_parallel_start_node_id=parent_parallel_start_node_id,
                         error=e.error,
+                        elapsed_time=time.perf_counter() - start_at,
                     )
                 )
             except Exception as e:
                 logger.exception("Unknown Error when generating in parallel")
-                q.put(
+                join.put(
                     ParallelBranchRunFailedEvent(
                         parallel_id=parallel_id,
                         parallel_start_node_id=parallel_start_node_id,
                         parent_parallel_id=parent_parallel_id,
                         parent_parallel_start_node_id=parent_parallel_start_node_id,
                         error=str(e),
+                        elapsed_time=time.perf_counter() - start_at,
                     )
                 )
             finally:
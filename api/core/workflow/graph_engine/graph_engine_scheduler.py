@@ -0,0 +1,267 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Callable, Generator
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Optional
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+
+class _Task:
+    __slots__ = ("future", "fn", "args", "kwargs", "tenant_id", "run_id", "submitted_at")
+
+    def __init__(self, tenant_id: str, run_id: str, fn: Callable, args: tuple, kwargs: dict) -> None:
+        self.future: Future = Future()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.tenant_id = tenant_id
+        self.run_id = run_id
+        self.submitted_at = time.perf_counter()
+
+
+class GraphEngineScheduler:
+    """
+    Process-wide bounded scheduler running the parallel branches of all graph engine runs.
+
+    Queued branches are dispatched round-robin across tenants, and across the runs of each tenant,
+    as long as the tenant and the run are below their quota of running branches. A run with too many
+    queued branches makes `submit` wait for room instead of failing.
+
+    A branch waiting for other branches (see `blocking`) gives its slot back while it waits, so nested
+    parallel branches can not exhaust the workers and deadlock.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_workers_per_tenant: int,
+        max_workers_per_run: int,
+        max_queued_per_run: int,
+        idle_timeout: float = 60.0,
+    ) -> None:
+        self._max_workers = max_workers
+        self._max_workers_per_tenant = max_workers_per_tenant
+        self._max_workers_per_run = max_workers_per_run
+        self._max_queued_per_run = max_queued_per_run
+        self._idle_timeout = idle_timeout
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._pid: Optional[int] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        # tenant id -> run id -> queued tasks, dicts keep the round-robin order of tenants and runs
+        self._queued: dict[str, dict[str, deque[_Task]]] = {}
+        self._queued_by_run: Counter[str] = Counter()
+        self._running = 0
+        self._running_by_tenant: Counter[str] = Counter()
+        self._running_by_run: Counter[str] = Counter()
+        self._threads = 0
+        self._idle_threads = 0
+        self._blocked_threads = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "cancelled": 0,
+            "throttled": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    def submit(self, tenant_id: str, run_id: str, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        """
+        Queue a branch of a graph engine run, waiting while the run already has too many queued branches.
+        :param tenant_id: tenant id, running branches are limited per tenant
+        :param run_id: id of the outermost graph engine run, running and queued branches are limited per run
+        :param fn: branch function
+
+        :return: future of the branch, it can be cancelled as long as the branch is queued
+        """
+        task = _Task(tenant_id=tenant_id, run_id=run_id, fn=fn, args=args, kwargs=kwargs)
+        with self._cond:
+            if self._pid != os.getpid():
+                # worker threads do not survive a fork
+                self._reset()
+                self._pid = os.getpid()
+
+            if self._queued_by_run[run_id] >= self._max_queued_per_run:
+                self._stats["throttled"] += 1
+                current_task = self._get_current_task()
+                self._block(current_task)
+                while self._queued_by_run[run_id] >= self._max_queued_per_run:
+                    self._cond.wait()
+                self._unblock(current_task)
+
+            self._queued.setdefault(tenant_id, {}).setdefault(run_id, deque()).append(task)
+            self._queued_by_run[run_id] += 1
+            self._stats["submitted"] += 1
+            self._dispatch()
+
+        return task.future
+
+    @contextmanager
+    def blocking(self) -> Generator[None, None, None]:
+        """
+        Wrap the waits of a branch for other branches, its slot is given back to the scheduler meanwhile.
+        It does nothing outside of the scheduler threads.
+        """
+        current_task = self._get_current_task()
+        if current_task is None:
+            yield
+            return
+
+        with self._cond:
+            self._block(current_task)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._unblock(current_task)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Queue depth, running branches and accumulated branch wait time of this process, for monitoring."""
+        with self._cond:
+            return {
+                "max_workers": self._max_workers,
+                "threads": self._threads,
+                "running": self._running,
+                "blocked": self._blocked_threads,
+                "queued": sum(self._queued_by_run.values()),
+                "queued_by_tenant": {
+                    tenant_id: sum(len(tasks) for tasks in runs.values()) for tenant_id, runs in self._queued.items()
+                },
+                **self._stats,
+            }
+
+    def _get_current_task(self) -> Optional[_Task]:
+        return getattr(self._local, "task", None)
+
+    def _block(self, task: Optional[_Task]) -> None:
+        # called with the lock held, a blocked task does not count against the quotas
+        if task is None:
+            return
+
+        self._release_slot(task)
+        self._blocked_threads += 1
+        self._dispatch()
+
+    def _unblock(self, task: Optional[_Task]) -> None:
+        # called with the lock held, the slot is taken back even above the quotas as the task is already running
+        if task is None:
+            return
+
+        self._blocked_threads -= 1
+        self._acquire_slot(task)
+
+    def _acquire_slot(self, task: _Task) -> None:
+        self._running += 1
+        self._running_by_tenant[task.tenant_id] += 1
+        self._running_by_run[task.run_id] += 1
+
+    def _release_slot(self, task: _Task) -> None:
+        self._running -= 1
+        self._decrement(self._running_by_tenant, task.tenant_id)
+        self._decrement(self._running_by_run, task.run_id)
+
+    @staticmethod
+    def _decrement(counter: Counter[str], key: str) -> None:
+        counter[key] -= 1
+        if counter[key] <= 0:
+            del counter[key]
+
+    def _dispatch(self) -> None:
+        # called with the lock held, wakes up the waiters and starts a new worker if the idle ones,
+        # which stay counted until they wake up, can not take all the queued tasks
+        self._cond.notify_all()
+        if (
+            sum(self._queued_by_run.values()) > self._idle_threads
+            and self._threads - self._blocked_threads < self._max_workers
+        ):
+            self._threads += 1
+            threading.Thread(target=self._work, name=f"graph-engine-{self._threads}", daemon=True).start()
+
+    def _next_task(self) -> Optional[_Task]:
+        # called with the lock held, round-robin over tenants then runs within their quotas
+        if self._running >= self._max_workers:
+            return None
+
+        for tenant_id in list(self._queued):
+            if self._running_by_tenant[tenant_id] >= self._max_workers_per_tenant:
+                continue
+
+            runs = self._queued[tenant_id]
+            for run_id in list(runs):
+                if self._running_by_run[run_id] >= self._max_workers_per_run:
+                    continue
+
+                tasks = runs.pop(run_id)
+                task = tasks.popleft()
+                self._decrement(self._queued_by_run, run_id)
+                if tasks:
+                    runs[run_id] = tasks
+
+                del self._queued[tenant_id]
+                if runs:
+                    self._queued[tenant_id] = runs
+
+                return task
+
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                task = self._next_task()
+                while task is None:
+                    self._idle_threads += 1
+                    notified = self._cond.wait(timeout=self._idle_timeout)
+                    self._idle_threads -= 1
+                    task = self._next_task()
+                    if task is None and not notified:
+                        self._threads -= 1
+                        return
+
+                self._acquire_slot(task)
+                # room in the queue of the run for throttled submissions
+                self._cond.notify_all()
+
+            self._run_task(task)
+
+    def _run_task(self, task: _Task) -> None:
+        started_at = time.perf_counter()
+        if task.future.set_running_or_notify_cancel():
+            self._local.task = task
+            try:
+                result = task.fn(*task.args, **task.kwargs)
+            except BaseException as e:
+                task.future.set_exception(e)
+            else:
+                task.future.set_result(result)
+            finally:
+                self._local.task = None
+
+        with self._cond:
+            self._release_slot(task)
+            wait_seconds = started_at - task.submitted_at
+            if task.future.cancelled():
+                self._stats["cancelled"] += 1
+            else:
+                self._stats["completed"] += 1
+                self._stats["wait_seconds"] += wait_seconds
+                self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], wait_seconds)
+            self._dispatch()
+
+
+graph_engine_scheduler = GraphEngineScheduler(
+    max_workers=dify_config.WORKFLOW_PARALLEL_MAX_WORKERS,
+    max_workers_per_tenant=dify_config.WORKFLOW_PARALLEL_MAX_WORKERS_PER_TENANT,
+    max_workers_per_run=dify_config.WORKFLOW_PARALLEL_MAX_WORKERS_PER_RUN,
+    max_queued_per_run=dify_config.WORKFLOW_PARALLEL_MAX_QUEUED_BRANCHES_PER_RUN,
+)
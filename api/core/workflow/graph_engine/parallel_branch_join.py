@@ -0,0 +1,129 @@
+import queue
+import threading
+from collections.abc import Callable, Generator
+from concurrent.futures import Future
+from typing import Any, Optional
+
+from core.workflow.graph_engine.graph_engine_scheduler import graph_engine_scheduler
+
+# queue markers, a branch finished (whatever the outcome) or the join was cancelled
+_BRANCH_DONE = object()
+_CANCELLED = object()
+
+_local = threading.local()
+
+
+class ParallelBranchCancelledError(Exception):
+    """Raised in the branches of a join cancelled while they were waiting for their own nested branches."""
+
+
+class ParallelBranchJoin:
+    """
+    Fan-out / fan-in of the branches of a parallel.
+
+    Branches put their events with `put` and the join yields them from `events` as soon as they arrive,
+    waking up on each event and on the completion of each branch, whatever its outcome, without polling.
+
+    `cancel` stops all the branches: queued branches never start, running branches stop at their next
+    event (`put` returns False), and joins of nested parallels started by the branches are cancelled too.
+    """
+
+    def __init__(self, tenant_id: str, run_id: str, parent: Optional["ParallelBranchJoin"] = None) -> None:
+        self._tenant_id = tenant_id
+        self._run_id = run_id
+        self._queue: queue.Queue = queue.Queue()
+        self._futures: list[Future] = []
+        self._children: list[ParallelBranchJoin] = []
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        if parent is not None:
+            parent._add_child(self)
+
+    @staticmethod
+    def current() -> Optional["ParallelBranchJoin"]:
+        """Join of the branch running in the current thread, if any."""
+        return getattr(_local, "join", None)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def submit(self, fn: Callable, /, **kwargs: Any) -> Future:
+        """
+        Run a branch on the graph engine scheduler.
+        :param fn: branch function, it puts its events with `put`
+        :return: future of the branch
+        """
+        future = graph_engine_scheduler.submit(self._tenant_id, self._run_id, self._run_branch, fn, kwargs)
+        future.add_done_callback(lambda _: self._queue.put(_BRANCH_DONE))
+        with self._lock:
+            self._futures.append(future)
+            if self._cancelled.is_set():
+                future.cancel()
+
+        return future
+
+    def put(self, event: Any) -> bool:
+        """
+        Hand an event of a branch over to the join.
+        :param event: event
+        :return: False if the join is cancelled, the branch must stop
+        """
+        if self._cancelled.is_set():
+            return False
+
+        self._queue.put(event)
+        return True
+
+    def events(self) -> Generator[Any, None, None]:
+        """
+        Yield the events of the branches until all of them are done, the slot of the current branch is given
+        back to the scheduler while waiting.
+
+        :raises ParallelBranchCancelledError: if the join is cancelled
+        """
+        done_count = 0
+        while done_count < len(self._futures):
+            with graph_engine_scheduler.blocking():
+                event = self._queue.get()
+
+            if event is _BRANCH_DONE:
+                done_count += 1
+            elif event is _CANCELLED:
+                raise ParallelBranchCancelledError()
+            else:
+                yield event
+
+    def cancel(self) -> None:
+        """Stop all the branches of the join and of its nested joins, it does not wait for them."""
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+
+            self._cancelled.set()
+            futures = list(self._futures)
+            children = list(self._children)
+
+        for future in futures:
+            future.cancel()
+
+        for child in children:
+            child.cancel()
+
+        self._queue.put(_CANCELLED)
+
+    def _add_child(self, child: "ParallelBranchJoin") -> None:
+        with self._lock:
+            self._children.append(child)
+            cancelled = self._cancelled.is_set()
+
+        if cancelled:
+            child.cancel()
+
+    def _run_branch(self, fn: Callable, kwargs: dict[str, Any]) -> Any:
+        previous = getattr(_local, "join", None)
+        _local.join = self
+        try:
+            return fn(**kwargs)
+        finally:
+            _local.join = previous
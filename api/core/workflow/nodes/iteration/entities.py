@@ -1,8 +1,18 @@
+from enum import Enum
 from typing import Any, Optional
 
 from core.workflow.entities.base_node_data_entities import BaseIterationNodeData, BaseIterationState, BaseNodeData
 
 
+class ErrorHandleMode(str, Enum):
+    """
+    How a parallel iteration handles the failure of an item.
+    """
+
+    TERMINATED = "terminated"  # stop the iteration on the first failed item
+    CONTINUE_ON_ERROR = "continue-on-error"  # run all items, failed items output None and their errors are collected
+
+
 class IterationNodeData(BaseIterationNodeData):
     """
     Iteration Node Data.
@@ -11,6 +21,9 @@ class IterationNodeData(BaseIterationNodeData):
     parent_loop_id: Optional[str] = None  # redundant field, not used currently
     iterator_selector: list[str]  # variable selector
     output_selector: list[str]  # output selector
+    is_parallel: bool = False  # run the items in parallel
+    parallel_nums: int = 10  # max number of items run at the same time in parallel mode
+    error_handle_mode: ErrorHandleMode = ErrorHandleMode.TERMINATED  # failure handling in parallel mode
 
 
 class IterationStartNodeData(BaseNodeData):
@@ -1,7 +1,12 @@
 import logging
+import queue
+import threading
 from collections.abc import Generator, Mapping, Sequence
+from concurrent.futures import Future
 from datetime import datetime, timezone
-from typing import Any, cast
+from typing import TYPE_CHECKING, Any, Optional, cast
+
+from flask import Flask, current_app
 
 from configs import dify_config
 from core.model_runtime.utils.encoders import jsonable_encoder
@@ -10,6 +15,7 @@ from core.workflow.graph_engine.entities.event import (
     BaseGraphEvent,
     BaseNodeEvent,
     BaseParallelBranchEvent,
+    GraphEngineEvent,
     GraphRunFailedEvent,
     InNodeEvent,
     IterationRunFailedEvent,
@@ -20,11 +26,16 @@ from core.workflow.graph_engine.entities.event import (
     NodeRunSucceededEvent,
 )
 from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.entities.graph_cache import graph_cache
+from core.workflow.graph_engine.graph_engine_scheduler import graph_engine_scheduler
 from core.workflow.nodes.base_node import BaseNode
 from core.workflow.nodes.event import RunCompletedEvent, RunEvent
-from core.workflow.nodes.iteration.entities import IterationNodeData
+from core.workflow.nodes.iteration.entities import ErrorHandleMode, IterationNodeData
 from models.workflow import WorkflowNodeExecutionStatus
 
+if TYPE_CHECKING:
+    from core.workflow.graph_engine.graph_engine import GraphEngine
+
 logger = logging.getLogger(__name__)
 
 
@@ -61,11 +72,27 @@ class IterationNode(BaseNode):
         root_node_id = self.node_data.start_node_id
 
         # init graph
-        iteration_graph = Graph.init(graph_config=graph_config, root_node_id=root_node_id)
+        iteration_graph = graph_cache.get_or_init(
+            workflow_id=self.workflow_id, graph_config=graph_config, root_node_id=root_node_id
+        )
 
         if not iteration_graph:
             raise ValueError("iteration graph not found")
 
+        if self.node_data.is_parallel:
+            # the items run on forks of the variable pool, the conversation variables they assign would be lost
+            for sub_node_config in iteration_graph.node_id_config_mapping.values():
+                if sub_node_config.get("data", {}).get("type") == NodeType.CONVERSATION_VARIABLE_ASSIGNER.value:
+                    raise ValueError(
+                        f"variable assigner node {sub_node_config.get('id')} is not supported "
+                        f"in parallel iteration {self.node_id}, please run the iteration sequentially"
+                    )
+
+            yield from self._run_parallel(
+                iteration_graph=iteration_graph, iterator_list_value=iterator_list_value, inputs=inputs
+            )
+            return
+
         variable_pool = self.graph_runtime_state.variable_pool
 
         # append iteration variable (item, index) to variable pool
@@ -116,35 +143,15 @@ class IterationNode(BaseNode):
 
         outputs: list[Any] = []
         try:
-            for _ in range(len(iterator_list_value)):
+            for index in range(len(iterator_list_value)):
                 # run workflow
                 rst = graph_engine.run()
                 for event in rst:
-                    if isinstance(event, (BaseNodeEvent | BaseParallelBranchEvent)) and not event.in_iteration_id:
-                        event.in_iteration_id = self.node_id
-
-                    if (
-                        isinstance(event, BaseNodeEvent)
-                        and event.node_type == NodeType.ITERATION_START
-                        and not isinstance(event, NodeRunStreamChunkEvent)
-                    ):
+                    event = self._handle_event_metadata(event, index)
+                    if event is None:
                         continue
 
-                    if isinstance(event, NodeRunSucceededEvent):
-                        if event.route_node_state.node_run_result:
-                            metadata = event.route_node_state.node_run_result.metadata
-                            if not metadata:
-                                metadata = {}
-
-                            if NodeRunMetadataKey.ITERATION_ID not in metadata:
-                                metadata[NodeRunMetadataKey.ITERATION_ID] = self.node_id
-                                metadata[NodeRunMetadataKey.ITERATION_INDEX] = variable_pool.get_any(
-                                    [self.node_id, "index"]
-                                )
-                                event.route_node_state.node_run_result.metadata = metadata
-
-                        yield event
-                    elif isinstance(event, BaseGraphEvent):
+                    if isinstance(event, BaseGraphEvent):
                         if isinstance(event, GraphRunFailedEvent):
                             # iteration run failed
                             yield IterationRunFailedEvent(
@@ -245,6 +252,255 @@ class IterationNode(BaseNode):
             variable_pool.remove([self.node_id, "index"])
             variable_pool.remove([self.node_id, "item"])
 
+    def _run_parallel(
+        self, iteration_graph: Graph, iterator_list_value: list[Any], inputs: dict[str, Any]
+    ) -> Generator[RunEvent | InNodeEvent, None, None]:
+        """
+        Run the items of the iteration in parallel, each item on its own copy-on-write view of the variable pool.
+        """
+        items_count = len(iterator_list_value)
+        parallel_nums = max(
+            min(self.node_data.parallel_nums, dify_config.WORKFLOW_MAX_ITERATION_PARALLEL_NUMS, items_count), 1
+        )
+
+        start_at = datetime.now(timezone.utc).replace(tzinfo=None)
+
+        yield IterationRunStartedEvent(
+            iteration_id=self.id,
+            iteration_node_id=self.node_id,
+            iteration_node_type=self.node_type,
+            iteration_node_data=self.node_data,
+            start_at=start_at,
+            inputs=inputs,
+            metadata={"iterator_length": items_count},
+            predecessor_node_id=self.previous_node_id,
+        )
+
+        yield IterationRunNextEvent(
+            iteration_id=self.id,
+            iteration_node_id=self.node_id,
+            iteration_node_type=self.node_type,
+            iteration_node_data=self.node_data,
+            index=0,
+            pre_iteration_output=None,
+        )
+
+        # items run on the graph engine scheduler and put their events into the queue,
+        # the outputs keep the order of the items
+        q: queue.Queue = queue.Queue()
+        stop_event = threading.Event()
+        futures: list[Future] = []
+        flask_app = current_app._get_current_object()  # type: ignore[attr-defined]
+        graph_engines: dict[int, GraphEngine] = {}
+        outputs: list[Any] = [None] * items_count
+        errors: dict[int, str] = {}
+        total_tokens = 0
+        submitted_count = 0
+        completed_count = 0
+        try:
+            while completed_count < items_count:
+                while submitted_count < items_count and len(graph_engines) < parallel_nums:
+                    graph_engine = self._create_parallel_graph_engine(
+                        iteration_graph=iteration_graph,
+                        index=submitted_count,
+                        item=iterator_list_value[submitted_count],
+                    )
+                    graph_engines[submitted_count] = graph_engine
+                    future = graph_engine_scheduler.submit(
+                        self.tenant_id,
+                        self.thread_pool_id or self.id,
+                        self._run_parallel_item,
+                        flask_app=flask_app,
+                        q=q,
+                        stop_event=stop_event,
+                        index=submitted_count,
+                        graph_engine=graph_engine,
+                    )
+                    futures.append(future)
+                    submitted_count += 1
+
+                with graph_engine_scheduler.blocking():
+                    index, event = q.get()
+                if event is None:
+                    # item completed
+                    completed_count += 1
+                    graph_engine = graph_engines.pop(index)
+                    total_tokens += graph_engine.graph_runtime_state.total_tokens
+                    if index not in errors:
+                        outputs[index] = graph_engine.graph_runtime_state.variable_pool.get_any(
+                            self.node_data.output_selector
+                        )
+
+                    # the items complete out of order, the index is the one of the completed item
+                    yield IterationRunNextEvent(
+                        iteration_id=self.id,
+                        iteration_node_id=self.node_id,
+                        iteration_node_type=self.node_type,
+                        iteration_node_data=self.node_data,
+                        index=index,
+                        pre_iteration_output=jsonable_encoder(outputs[index]) if outputs[index] else None,
+                    )
+                    continue
+
+                event = self._handle_event_metadata(event, index)
+                if event is None:
+                    continue
+
+                if isinstance(event, GraphRunFailedEvent):
+                    errors[index] = event.error
+                    if self.node_data.error_handle_mode == ErrorHandleMode.CONTINUE_ON_ERROR:
+                        continue
+
+                    # iteration run failed, stop the running items
+                    stop_event.set()
+                    yield IterationRunFailedEvent(
+                        iteration_id=self.id,
+                        iteration_node_id=self.node_id,
+                        iteration_node_type=self.node_type,
+                        iteration_node_data=self.node_data,
+                        start_at=start_at,
+                        inputs=inputs,
+                        outputs={"output": jsonable_encoder(outputs)},
+                        steps=items_count,
+                        metadata={"total_tokens": total_tokens},
+                        error=event.error,
+                    )
+
+                    yield RunCompletedEvent(
+                        run_result=NodeRunResult(
+                            status=WorkflowNodeExecutionStatus.FAILED,
+                            error=event.error,
+                        )
+                    )
+                    return
+                elif not isinstance(event, BaseGraphEvent):
+                    yield event
+
+            metadata: dict[str, Any] = {"total_tokens": total_tokens}
+            if errors:
+                metadata["errors"] = [{"index": index, "error": error} for index, error in sorted(errors.items())]
+
+            yield IterationRunSucceededEvent(
+                iteration_id=self.id,
+                iteration_node_id=self.node_id,
+                iteration_node_type=self.node_type,
+                iteration_node_data=self.node_data,
+                start_at=start_at,
+                inputs=inputs,
+                outputs={"output": jsonable_encoder(outputs)},
+                steps=items_count,
+                metadata=metadata,
+            )
+
+            yield RunCompletedEvent(
+                run_result=NodeRunResult(
+                    status=WorkflowNodeExecutionStatus.SUCCEEDED, outputs={"output": jsonable_encoder(outputs)}
+                )
+            )
+        except Exception as e:
+            # iteration run failed
+            logger.exception("Iteration run failed")
+            stop_event.set()
+            yield IterationRunFailedEvent(
+                iteration_id=self.id,
+                iteration_node_id=self.node_id,
+                iteration_node_type=self.node_type,
+                iteration_node_data=self.node_data,
+                start_at=start_at,
+                inputs=inputs,
+                outputs={"output": jsonable_encoder(outputs)},
+                steps=items_count,
+                metadata={"total_tokens": total_tokens},
+                error=str(e),
+            )
+
+            yield RunCompletedEvent(
+                run_result=NodeRunResult(
+                    status=WorkflowNodeExecutionStatus.FAILED,
+                    error=str(e),
+                )
+            )
+        finally:
+            stop_event.set()
+            for future in futures:
+                future.cancel()
+
+    def _create_parallel_graph_engine(self, iteration_graph: Graph, index: int, item: Any) -> "GraphEngine":
+        """
+        Create the graph engine running an item of the parallel iteration on a fork of the variable pool
+        """
+        from core.workflow.graph_engine.graph_engine import GraphEngine
+
+        variable_pool = self.graph_runtime_state.variable_pool.fork()
+        variable_pool.add([self.node_id, "index"], index)
+        variable_pool.add([self.node_id, "item"], item)
+
+        return GraphEngine(
+            tenant_id=self.tenant_id,
+            app_id=self.app_id,
+            workflow_type=self.workflow_type,
+            workflow_id=self.workflow_id,
+            user_id=self.user_id,
+            user_from=self.user_from,
+            invoke_from=self.invoke_from,
+            call_depth=self.workflow_call_depth,
+            graph=iteration_graph,
+            graph_config=self.graph_config,
+            variable_pool=variable_pool,
+            max_execution_steps=dify_config.WORKFLOW_MAX_EXECUTION_STEPS,
+            max_execution_time=dify_config.WORKFLOW_MAX_EXECUTION_TIME,
+            thread_pool_id=self.thread_pool_id,
+        )
+
+    def _run_parallel_item(
+        self, flask_app: Flask, q: queue.Queue, stop_event: threading.Event, index: int, graph_engine: "GraphEngine"
+    ) -> None:
+        """
+        Run an item of the parallel iteration, put (index, event) into the queue and (index, None) once completed
+        """
+        with flask_app.app_context():
+            failed = False
+            try:
+                for event in graph_engine.run():
+                    if stop_event.is_set():
+                        break
+
+                    failed = failed or isinstance(event, GraphRunFailedEvent)
+                    q.put((index, event))
+            except Exception as e:
+                if not failed:
+                    logger.exception("Iteration item run failed")
+                    q.put((index, GraphRunFailedEvent(error=str(e))))
+            finally:
+                q.put((index, None))
+
+    def _handle_event_metadata(self, event: GraphEngineEvent, iter_index: int) -> Optional[GraphEngineEvent]:
+        """
+        Attach the iteration to the events of the iteration graph, None for the events not to be yielded
+        """
+        if isinstance(event, (BaseNodeEvent | BaseParallelBranchEvent)) and not event.in_iteration_id:
+            event.in_iteration_id = self.node_id
+            event.in_iteration_index = iter_index
+
+        if (
+            isinstance(event, BaseNodeEvent)
+            and event.node_type == NodeType.ITERATION_START
+            and not isinstance(event, NodeRunStreamChunkEvent)
+        ):
+            return None
+
+        if isinstance(event, NodeRunSucceededEvent) and event.route_node_state.node_run_result:
+            metadata = event.route_node_state.node_run_result.metadata
+            if not metadata:
+                metadata = {}
+
+            if NodeRunMetadataKey.ITERATION_ID not in metadata:
+                metadata[NodeRunMetadataKey.ITERATION_ID] = self.node_id
+                metadata[NodeRunMetadataKey.ITERATION_INDEX] = iter_index
+                event.route_node_state.node_run_result.metadata = metadata
+
+        return event
+
     @classmethod
     def _extract_variable_selector_to_variable_mapping(
         cls, graph_config: Mapping[str, Any], node_id: str, node_data: IterationNodeData
@@ -16,6 +16,7 @@ from core.workflow.entities.variable_pool import VariablePool
 from core.workflow.errors import WorkflowNodeRunFailedError
 from core.workflow.graph_engine.entities.event import GraphEngineEvent, GraphRunFailedEvent, InNodeEvent
 from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.entities.graph_cache import graph_cache
 from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
 from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
 from core.workflow.graph_engine.graph_engine import GraphEngine
@@ -111,6 +112,11 @@ class WorkflowEntry:
                 for callback in callbacks:
                     callback.on_event(event=GraphRunFailedEvent(error=str(e)))
             return
+        finally:
+            logger.debug(
+                f"workflow {graph_engine.init_params.workflow_id} variable pool usage: "
+                f"{graph_engine.graph_runtime_state.variable_pool.get_memory_usage()}"
+            )
 
     @classmethod
     def single_step_run(
@@ -159,7 +165,7 @@ class WorkflowEntry:
         )
 
         # init graph
-        graph = Graph.init(graph_config=workflow.graph_dict)
+        graph = graph_cache.get_or_init(workflow_id=workflow.id, graph_config=workflow.graph_dict)
 
         # init workflow run state
         node_instance: BaseNode = node_cls(
@@ -53,6 +53,7 @@ def init_app(app: Flask) -> Celery:
     imports = [
         "schedule.clean_embedding_cache_task",
         "schedule.clean_unused_datasets_task",
+        "schedule.clean_indexing_checkpoints_task",
     ]
     day = app.config.get("CELERY_BEAT_SCHEDULER_TIME")
     beat_schedule = {
@@ -64,6 +65,10 @@ def init_app(app: Flask) -> Celery:
             "task": "schedule.clean_unused_datasets_task.clean_unused_datasets_task",
             "schedule": timedelta(days=day),
         },
+        "clean_indexing_checkpoints_task": {
+            "task": "schedule.clean_indexing_checkpoints_task.clean_indexing_checkpoints_task",
+            "schedule": timedelta(days=day),
+        },
     }
     celery_app.conf.update(beat_schedule=beat_schedule, imports=imports)
 
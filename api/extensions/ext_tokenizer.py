@@ -0,0 +1,11 @@
+from flask import Flask
+
+from configs import dify_config
+from core.model_runtime.model_providers.__base.tokenizers.gpt2_tokenzier import GPT2Tokenizer
+
+
+def init_app(app: Flask):
+    GPT2Tokenizer.set_backend(dify_config.GPT2_TOKENIZER_BACKEND)
+    # the app is created before gunicorn and celery fork their workers, which share the loaded tokenizer
+    if dify_config.GPT2_TOKENIZER_WARMUP_ENABLED:
+        GPT2Tokenizer.warm_up()
@@ -283,6 +283,7 @@ class Document(db.Model):
     # indexing
     tokens = db.Column(db.Integer, nullable=True)
     indexing_latency = db.Column(db.Float, nullable=True)
+    indexing_metadata = db.Column(db.JSON, nullable=True)
     completed_at = db.Column(db.DateTime, nullable=True)
 
     # pause
@@ -418,6 +419,7 @@ class Document(db.Model):
             "splitting_completed_at": self.splitting_completed_at,
             "tokens": self.tokens,
             "indexing_latency": self.indexing_latency,
+            "indexing_metadata": self.indexing_metadata,
             "completed_at": self.completed_at,
             "is_paused": self.is_paused,
             "paused_by": self.paused_by,
@@ -470,6 +472,7 @@ class Document(db.Model):
             splitting_completed_at=data.get("splitting_completed_at"),
             tokens=data.get("tokens"),
             indexing_latency=data.get("indexing_latency"),
+            indexing_metadata=data.get("indexing_metadata"),
             completed_at=data.get("completed_at"),
             is_paused=data.get("is_paused"),
             paused_by=data.get("paused_by"),
@@ -653,6 +656,9 @@ class DatasetKeywordTable(db.Model):
             return None
         if self.data_source_type == "database":
             return json.loads(self.keyword_table, cls=SetDecoder) if self.keyword_table else None
+        elif self.data_source_type == "postings":
+            # postings are stored in dataset_keyword_postings, there is no keyword table blob
+            return None
         else:
             file_key = "keyword_files/" + dataset.tenant_id + "/" + self.dataset_id + ".txt"
             try:
@@ -665,6 +671,21 @@ class DatasetKeywordTable(db.Model):
                 return None
 
 
+class DatasetKeywordPosting(db.Model):
+    __tablename__ = "dataset_keyword_postings"
+    __table_args__ = (
+        db.PrimaryKeyConstraint("id", name="dataset_keyword_posting_pkey"),
+        db.UniqueConstraint("dataset_id", "keyword", "index_node_id", name="dataset_keyword_posting_unique_idx"),
+        db.Index("dataset_keyword_posting_node_idx", "dataset_id", "index_node_id"),
+    )
+
+    id = db.Column(StringUUID, primary_key=True, server_default=db.text("uuid_generate_v4()"))
+    dataset_id = db.Column(StringUUID, nullable=False)
+    keyword = db.Column(db.String(255), nullable=False)
+    index_node_id = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.text("CURRENT_TIMESTAMP(0)"))
+
+
 class Embedding(db.Model):
     __tablename__ = "embeddings"
     __table_args__ = (
@@ -1,3 +1,4 @@
+import functools
 import json
 import re
 import uuid
@@ -19,6 +20,28 @@ from .account import Account, Tenant
 from .types import StringUUID
 
 
+def prefetchable_property(func):
+    """
+    Property querying the database for a single row. Its value can be attached to a page of rows up front
+    with `set_prefetched` to skip the query, see `services.prefetch_service.PrefetchService`.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    def getter(self):
+        prefetched = self.__dict__.get("_prefetched")
+        if prefetched is not None and name in prefetched:
+            return prefetched[name]
+        return func(self)
+
+    return property(getter)
+
+
+def set_prefetched(instance: db.Model, name: str, value) -> None:
+    """Attach the value of the prefetchable property `name` to a row."""
+    instance.__dict__.setdefault("_prefetched", {})[name] = value
+
+
 class DifySetup(db.Model):
     __tablename__ = "dify_setups"
     __table_args__ = (db.PrimaryKeyConstraint("version", name="dify_setup_pkey"),)
@@ -276,7 +299,7 @@ class AppModelConfig(db.Model):
     def retriever_resource_dict(self) -> dict:
         return json.loads(self.retriever_resource) if self.retriever_resource else {"enabled": True}
 
-    @property
+    @prefetchable_property
     def annotation_reply_dict(self) -> dict:
         annotation_setting = (
             db.session.query(AppAnnotationSetting).filter(AppAnnotationSetting.app_id == self.app_id).first()
@@ -570,17 +593,17 @@ class Conversation(db.Model):
                 else:
                     model_config["configs"] = override_model_configs
             else:
-                app_model_config = (
-                    db.session.query(AppModelConfig).filter(AppModelConfig.id == self.app_model_config_id).first()
-                )
-
-                model_config = app_model_config.to_dict()
+                model_config = self.app_model_config.to_dict()
 
         model_config["model_id"] = self.model_id
         model_config["provider"] = self.model_provider
 
         return model_config
 
+    @prefetchable_property
+    def app_model_config(self):
+        return db.session.query(AppModelConfig).filter(AppModelConfig.id == self.app_model_config_id).first()
+
     @property
     def summary_or_query(self):
         if self.summary:
@@ -592,19 +615,24 @@ class Conversation(db.Model):
             else:
                 return ""
 
-    @property
+    @prefetchable_property
     def annotated(self):
         return db.session.query(MessageAnnotation).filter(MessageAnnotation.conversation_id == self.id).count() > 0
 
-    @property
+    @prefetchable_property
     def annotation(self):
-        return db.session.query(MessageAnnotation).filter(MessageAnnotation.conversation_id == self.id).first()
+        return (
+            db.session.query(MessageAnnotation)
+            .filter(MessageAnnotation.conversation_id == self.id)
+            .order_by(MessageAnnotation.created_at.asc())
+            .first()
+        )
 
-    @property
+    @prefetchable_property
     def message_count(self):
         return db.session.query(Message).filter(Message.conversation_id == self.id).count()
 
-    @property
+    @prefetchable_property
     def user_feedback_stats(self):
         like = (
             db.session.query(MessageFeedback)
@@ -628,7 +656,7 @@ class Conversation(db.Model):
 
         return {"like": like, "dislike": dislike}
 
-    @property
+    @prefetchable_property
     def admin_feedback_stats(self):
         like = (
             db.session.query(MessageFeedback)
@@ -652,15 +680,20 @@ class Conversation(db.Model):
 
         return {"like": like, "dislike": dislike}
 
-    @property
+    @prefetchable_property
     def first_message(self):
-        return db.session.query(Message).filter(Message.conversation_id == self.id).first()
+        return (
+            db.session.query(Message)
+            .filter(Message.conversation_id == self.id)
+            .order_by(Message.created_at.asc())
+            .first()
+        )
 
     @property
     def app(self):
         return db.session.query(App).filter(App.id == self.app_id).first()
 
-    @property
+    @prefetchable_property
     def from_end_user_session_id(self):
         if self.from_end_user_id:
             end_user = db.session.query(EndUser).filter(EndUser.id == self.from_end_user_id).first()
@@ -669,7 +702,7 @@ class Conversation(db.Model):
 
         return None
 
-    @property
+    @prefetchable_property
     def from_account_name(self):
         if self.from_account_id:
             account = db.session.query(Account).filter(Account.id == self.from_account_id).first()
@@ -790,7 +823,7 @@ class Message(db.Model):
 
         return re_sign_file_url_answer
 
-    @property
+    @prefetchable_property
     def user_feedback(self):
         feedback = (
             db.session.query(MessageFeedback)
@@ -799,7 +832,7 @@ class Message(db.Model):
         )
         return feedback
 
-    @property
+    @prefetchable_property
     def admin_feedback(self):
         feedback = (
             db.session.query(MessageFeedback)
@@ -808,20 +841,28 @@ class Message(db.Model):
         )
         return feedback
 
-    @property
+    @prefetchable_property
     def feedbacks(self):
         feedbacks = db.session.query(MessageFeedback).filter(MessageFeedback.message_id == self.id).all()
         return feedbacks
 
-    @property
+    @prefetchable_property
     def annotation(self):
-        annotation = db.session.query(MessageAnnotation).filter(MessageAnnotation.message_id == self.id).first()
+        annotation = (
+            db.session.query(MessageAnnotation)
+            .filter(MessageAnnotation.message_id == self.id)
+            .order_by(MessageAnnotation.created_at.asc())
+            .first()
+        )
         return annotation
 
-    @property
+    @prefetchable_property
     def annotation_hit_history(self):
         annotation_history = (
-            db.session.query(AppAnnotationHitHistory).filter(AppAnnotationHitHistory.message_id == self.id).first()
+            db.session.query(AppAnnotationHitHistory)
+            .filter(AppAnnotationHitHistory.message_id == self.id)
+            .order_by(AppAnnotationHitHistory.created_at.asc())
+            .first()
         )
         if annotation_history:
             annotation = (
@@ -850,7 +891,7 @@ class Message(db.Model):
     def message_metadata_dict(self) -> dict:
         return json.loads(self.message_metadata) if self.message_metadata else {}
 
-    @property
+    @prefetchable_property
     def agent_thoughts(self):
         return (
             db.session.query(MessageAgentThought)
@@ -868,7 +909,7 @@ class Message(db.Model):
             .all()
         )
 
-    @property
+    @prefetchable_property
     def message_files(self):
         return db.session.query(MessageFile).filter(MessageFile.message_id == self.id).all()
 
@@ -881,11 +922,7 @@ class Message(db.Model):
             url = message_file.url
             if message_file.type == "image":
                 if message_file.transfer_method == "local_file":
-                    upload_file = (
-                        db.session.query(UploadFile).filter(UploadFile.id == message_file.upload_file_id).first()
-                    )
-
-                    url = UploadFileParser.get_image_data(upload_file=upload_file, force_url=True)
+                    url = UploadFileParser.get_image_data(upload_file=message_file.upload_file, force_url=True)
                 if message_file.transfer_method == "tool_file":
                     # get tool file id
                     tool_file_id = message_file.url.split("/")[-1]
@@ -989,7 +1026,7 @@ class MessageFeedback(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, server_default=db.text("CURRENT_TIMESTAMP(0)"))
     updated_at = db.Column(db.DateTime, nullable=False, server_default=db.text("CURRENT_TIMESTAMP(0)"))
 
-    @property
+    @prefetchable_property
     def from_account(self):
         account = db.session.query(Account).filter(Account.id == self.from_account_id).first()
         return account
@@ -1014,6 +1051,10 @@ class MessageFile(db.Model):
     created_by = db.Column(StringUUID, nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, server_default=db.text("CURRENT_TIMESTAMP(0)"))
 
+    @prefetchable_property
+    def upload_file(self):
+        return db.session.query(UploadFile).filter(UploadFile.id == self.upload_file_id).first()
+
 
 class MessageAnnotation(db.Model):
     __tablename__ = "message_annotations"
@@ -1035,12 +1076,12 @@ class MessageAnnotation(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, server_default=db.text("CURRENT_TIMESTAMP(0)"))
     updated_at = db.Column(db.DateTime, nullable=False, server_default=db.text("CURRENT_TIMESTAMP(0)"))
 
-    @property
+    @prefetchable_property
     def account(self):
         account = db.session.query(Account).filter(Account.id == self.account_id).first()
         return account
 
-    @property
+    @prefetchable_property
     def annotation_create_account(self):
         account = db.session.query(Account).filter(Account.id == self.account_id).first()
         return account
@@ -2,8 +2,7 @@ import datetime
 import time
 
 import click
-from sqlalchemy import text
-from werkzeug.exceptions import NotFound
+from sqlalchemy import delete, select, tuple_
 
 import app
 from configs import dify_config
@@ -15,28 +14,38 @@ from models.dataset import Embedding
 def clean_embedding_cache_task():
     click.echo(click.style("Start clean embedding cache.", fg="green"))
     clean_days = int(dify_config.CLEAN_DAY_SETTING)
+    batch_size = dify_config.CLEAN_EMBEDDING_CACHE_BATCH_SIZE
     start_at = time.perf_counter()
     thirty_days_ago = datetime.datetime.now() - datetime.timedelta(days=clean_days)
+    deleted_count = 0
+    last_key = None
     while True:
-        try:
-            embedding_ids = (
-                db.session.query(Embedding.id)
-                .filter(Embedding.created_at < thirty_days_ago)
-                .order_by(Embedding.created_at.desc())
-                .limit(100)
-                .all()
-            )
-            embedding_ids = [embedding_id[0] for embedding_id in embedding_ids]
-        except NotFound:
+        # keyset pagination on the created_at index, the scan continues after the rows already deleted
+        query = select(Embedding.created_at, Embedding.id).where(Embedding.created_at < thirty_days_ago)
+        if last_key:
+            query = query.where(tuple_(Embedding.created_at, Embedding.id) > last_key)
+        rows = db.session.execute(query.order_by(Embedding.created_at, Embedding.id).limit(batch_size)).all()
+        if not rows:
             break
-        if embedding_ids:
-            for embedding_id in embedding_ids:
-                db.session.execute(
-                    text("DELETE FROM embeddings WHERE id = :embedding_id"), {"embedding_id": embedding_id}
-                )
+        last_key = tuple(rows[-1])
 
-            db.session.commit()
-        else:
+        # one statement per batch, the transaction and its locks only last for the batch
+        db.session.execute(delete(Embedding).where(Embedding.id.in_([row.id for row in rows])))
+        db.session.commit()
+
+        deleted_count += len(rows)
+        latency = time.perf_counter() - start_at
+        click.echo(
+            "Deleted {} expired embedding cache rows, {:.0f} rows/s.".format(deleted_count, deleted_count / latency)
+        )
+        if len(rows) < batch_size:
             break
+        time.sleep(dify_config.CLEAN_BATCH_INTERVAL)
+
     end_at = time.perf_counter()
-    click.echo(click.style("Cleaned embedding cache from db success latency: {}".format(end_at - start_at), fg="green"))
+    click.echo(
+        click.style(
+            "Cleaned {} embedding cache rows from db success latency: {}".format(deleted_count, end_at - start_at),
+            fg="green",
+        )
+    )
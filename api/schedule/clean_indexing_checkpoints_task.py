@@ -0,0 +1,24 @@
+import datetime
+import time
+
+import click
+
+import app
+from configs import dify_config
+from core.rag.index_processor.indexing_checkpoint import IndexingCheckpoint
+
+
+@app.celery.task(queue="dataset")
+def clean_indexing_checkpoints_task():
+    click.echo(click.style("Start clean indexing checkpoints.", fg="green"))
+    start_at = time.perf_counter()
+    # checkpoints of documents deleted or never indexed successfully, not used for the retention days
+    expired_before = datetime.datetime.now() - datetime.timedelta(days=dify_config.INDEXING_CHECKPOINT_RETENTION_DAYS)
+    deleted_count = IndexingCheckpoint.delete_expired_checkpoints(expired_before.timestamp())
+    end_at = time.perf_counter()
+    click.echo(
+        click.style(
+            "Cleaned {} indexing checkpoints from storage success latency: {}".format(deleted_count, end_at - start_at),
+            fg="green",
+        )
+    )
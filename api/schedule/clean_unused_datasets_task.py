@@ -2,8 +2,7 @@ import datetime
 import time
 
 import click
-from sqlalchemy import func
-from werkzeug.exceptions import NotFound
+from sqlalchemy import exists, select, tuple_, update
 
 import app
 from configs import dify_config
@@ -18,75 +17,76 @@ def clean_unused_datasets_task():
     clean_days = dify_config.CLEAN_DAY_SETTING
     start_at = time.perf_counter()
     thirty_days_ago = datetime.datetime.now() - datetime.timedelta(days=clean_days)
-    page = 1
+
+    def completed_documents_exist(*criteria):
+        return exists().where(
+            Document.dataset_id == Dataset.id,
+            Document.indexing_status == "completed",
+            Document.enabled == True,
+            Document.archived == False,
+            *criteria,
+        )
+
+    # datasets with only old documents, not queried since
+    unused_datasets_query = select(Dataset).where(
+        Dataset.created_at < thirty_days_ago,
+        ~completed_documents_exist(Document.updated_at > thirty_days_ago),
+        completed_documents_exist(Document.updated_at < thirty_days_ago),
+        ~exists().where(DatasetQuery.dataset_id == Dataset.id, DatasetQuery.created_at > thirty_days_ago),
+    )
+
+    checked_count = 0
+    cleaned_count = 0
+    failed_count = 0
+    last_key = None
     while True:
-        try:
-            # Subquery for counting new documents
-            document_subquery_new = (
-                db.session.query(Document.dataset_id, func.count(Document.id).label("document_count"))
-                .filter(
-                    Document.indexing_status == "completed",
-                    Document.enabled == True,
-                    Document.archived == False,
-                    Document.updated_at > thirty_days_ago,
-                )
-                .group_by(Document.dataset_id)
-                .subquery()
+        # keyset pagination, cleaned datasets leave the result without shifting the next batch
+        query = unused_datasets_query
+        if last_key:
+            query = query.where(tuple_(Dataset.created_at, Dataset.id) < last_key)
+        datasets = db.session.scalars(
+            query.order_by(Dataset.created_at.desc(), Dataset.id.desc()).limit(
+                dify_config.CLEAN_UNUSED_DATASETS_BATCH_SIZE
             )
+        ).all()
+        if not datasets:
+            break
+        last_key = (datasets[-1].created_at, datasets[-1].id)
+        checked_count += len(datasets)
 
-            # Subquery for counting old documents
-            document_subquery_old = (
-                db.session.query(Document.dataset_id, func.count(Document.id).label("document_count"))
-                .filter(
-                    Document.indexing_status == "completed",
-                    Document.enabled == True,
-                    Document.archived == False,
-                    Document.updated_at < thirty_days_ago,
+        cleaned_dataset_ids = []
+        for dataset in datasets:
+            try:
+                # remove index
+                index_processor = IndexProcessorFactory(dataset.doc_form).init_index_processor()
+                index_processor.clean(dataset, None)
+                cleaned_dataset_ids.append(dataset.id)
+                click.echo(click.style("Cleaned unused dataset {} index success!".format(dataset.id), fg="green"))
+            except Exception as e:
+                failed_count += 1
+                click.echo(
+                    click.style("clean dataset index error: {} {}".format(e.__class__.__name__, str(e)), fg="red")
                 )
-                .group_by(Document.dataset_id)
-                .subquery()
-            )
 
-            # Main query with join and filter
-            datasets = (
-                db.session.query(Dataset)
-                .outerjoin(document_subquery_new, Dataset.id == document_subquery_new.c.dataset_id)
-                .outerjoin(document_subquery_old, Dataset.id == document_subquery_old.c.dataset_id)
-                .filter(
-                    Dataset.created_at < thirty_days_ago,
-                    func.coalesce(document_subquery_new.c.document_count, 0) == 0,
-                    func.coalesce(document_subquery_old.c.document_count, 0) > 0,
-                )
-                .order_by(Dataset.created_at.desc())
-                .paginate(page=page, per_page=50)
+        if cleaned_dataset_ids:
+            # update documents
+            db.session.execute(
+                update(Document).where(Document.dataset_id.in_(cleaned_dataset_ids)).values(enabled=False)
             )
+        db.session.commit()
+        cleaned_count += len(cleaned_dataset_ids)
 
-        except NotFound:
-            break
-        if datasets.items is None or len(datasets.items) == 0:
-            break
-        page += 1
-        for dataset in datasets:
-            dataset_query = (
-                db.session.query(DatasetQuery)
-                .filter(DatasetQuery.created_at > thirty_days_ago, DatasetQuery.dataset_id == dataset.id)
-                .all()
+        click.echo(
+            "Checked {} datasets, cleaned {}, failed {}, latency: {}".format(
+                checked_count, cleaned_count, failed_count, time.perf_counter() - start_at
             )
-            if not dataset_query or len(dataset_query) == 0:
-                try:
-                    # remove index
-                    index_processor = IndexProcessorFactory(dataset.doc_form).init_index_processor()
-                    index_processor.clean(dataset, None)
-
-                    # update document
-                    update_params = {Document.enabled: False}
+        )
+        time.sleep(dify_config.CLEAN_BATCH_INTERVAL)
 
-                    Document.query.filter_by(dataset_id=dataset.id).update(update_params)
-                    db.session.commit()
-                    click.echo(click.style("Cleaned unused dataset {} from db success!".format(dataset.id), fg="green"))
-                except Exception as e:
-                    click.echo(
-                        click.style("clean dataset index error: {} {}".format(e.__class__.__name__, str(e)), fg="red")
-                    )
     end_at = time.perf_counter()
-    click.echo(click.style("Cleaned unused dataset from db success latency: {}".format(end_at - start_at), fg="green"))
+    click.echo(
+        click.style(
+            "Cleaned {} unused datasets from db success latency: {}".format(cleaned_count, end_at - start_at),
+            fg="green",
+        )
+    )
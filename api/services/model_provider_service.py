@@ -420,8 +420,7 @@ class ModelProviderService:
         :param lang: language (zh_Hans or en_US)
         :return:
         """
-        provider_instance = model_provider_factory.get_provider_instance(provider)
-        provider_schema = provider_instance.get_provider_schema()
+        provider_schema = model_provider_factory.get_provider_schema(provider)
 
         if icon_type.lower() == "icon_small":
             if not provider_schema.icon_small:
@@ -441,9 +440,7 @@ class ModelProviderService:
                 file_name = provider_schema.icon_large.en_US
 
         root_path = current_app.root_path
-        provider_instance_path = os.path.dirname(
-            os.path.join(root_path, provider_instance.__class__.__module__.replace(".", "/"))
-        )
+        provider_instance_path = os.path.join(root_path, "core", "model_runtime", "model_providers", provider)
         file_path = os.path.join(provider_instance_path, "_assets")
         file_path = os.path.join(file_path, file_name)
 
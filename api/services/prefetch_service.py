@@ -0,0 +1,265 @@
+from collections import defaultdict
+from collections.abc import Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+
+from extensions.ext_database import db
+from models.account import Account
+from models.model import (
+    AppAnnotationHitHistory,
+    AppModelConfig,
+    Conversation,
+    EndUser,
+    Message,
+    MessageAgentThought,
+    MessageAnnotation,
+    MessageFeedback,
+    MessageFile,
+    UploadFile,
+    set_prefetched,
+)
+
+
+class PrefetchService:
+    """
+    Load the aggregates serialized for a page of conversations or messages with one grouped query per
+    aggregate, instead of the queries of the properties for each row.
+
+    The values are attached to the rows, a later change of the database is not seen by the rows.
+    """
+
+    @classmethod
+    def prefetch_conversations(cls, conversations: Sequence[Conversation]) -> None:
+        """
+        Prefetch the message count, first message, annotation, feedback stats, end user session id, account
+        name and app model config of conversations.
+        :param conversations: conversations of a page
+        """
+        if not conversations:
+            return
+
+        conversation_ids = [conversation.id for conversation in conversations]
+
+        message_counts = dict(
+            db.session.execute(
+                select(Message.conversation_id, func.count(Message.id))
+                .where(Message.conversation_id.in_(conversation_ids))
+                .group_by(Message.conversation_id)
+            ).all()
+        )
+
+        first_messages = {
+            message.conversation_id: message
+            for message in cls._first_rows(
+                Message, Message.conversation_id, conversation_ids, order_by=Message.created_at
+            )
+        }
+
+        annotations = {
+            annotation.conversation_id: annotation
+            for annotation in cls._first_rows(
+                MessageAnnotation,
+                MessageAnnotation.conversation_id,
+                conversation_ids,
+                order_by=MessageAnnotation.created_at,
+            )
+        }
+
+        feedback_stats: dict[tuple[str, str], dict[str, int]] = defaultdict(lambda: {"like": 0, "dislike": 0})
+        feedback_counts = db.session.execute(
+            select(
+                MessageFeedback.conversation_id,
+                MessageFeedback.from_source,
+                MessageFeedback.rating,
+                func.count(MessageFeedback.id),
+            )
+            .where(MessageFeedback.conversation_id.in_(conversation_ids))
+            .group_by(MessageFeedback.conversation_id, MessageFeedback.from_source, MessageFeedback.rating)
+        ).all()
+        for conversation_id, from_source, rating, count in feedback_counts:
+            if rating in {"like", "dislike"}:
+                feedback_stats[(conversation_id, from_source)][rating] = count
+
+        end_user_ids = {
+            conversation.from_end_user_id for conversation in conversations if conversation.from_end_user_id
+        }
+        end_user_session_ids = {}
+        if end_user_ids:
+            end_user_session_ids = dict(
+                db.session.execute(select(EndUser.id, EndUser.session_id).where(EndUser.id.in_(end_user_ids))).all()
+            )
+
+        accounts = cls._get_accounts(
+            [conversation.from_account_id for conversation in conversations]
+            + [annotation.account_id for annotation in annotations.values()]
+        )
+
+        app_model_config_ids = {
+            conversation.app_model_config_id
+            for conversation in conversations
+            if conversation.app_model_config_id and not conversation.override_model_configs
+        }
+        app_model_configs = {}
+        if app_model_config_ids:
+            app_model_configs = {
+                app_model_config.id: app_model_config
+                for app_model_config in db.session.scalars(
+                    select(AppModelConfig).where(AppModelConfig.id.in_(app_model_config_ids))
+                )
+            }
+
+        # the annotation reply setting of the model configs is a setting of their app
+        annotation_replies: dict[str, dict] = {}
+        for app_model_config in app_model_configs.values():
+            if app_model_config.app_id not in annotation_replies:
+                annotation_replies[app_model_config.app_id] = app_model_config.annotation_reply_dict
+            set_prefetched(app_model_config, "annotation_reply_dict", annotation_replies[app_model_config.app_id])
+
+        for annotation in annotations.values():
+            cls._set_annotation_accounts(annotation, accounts)
+
+        for conversation in conversations:
+            annotation = annotations.get(conversation.id)
+            from_account = accounts.get(conversation.from_account_id)
+            set_prefetched(conversation, "message_count", message_counts.get(conversation.id, 0))
+            set_prefetched(conversation, "first_message", first_messages.get(conversation.id))
+            set_prefetched(conversation, "annotation", annotation)
+            set_prefetched(conversation, "annotated", annotation is not None)
+            set_prefetched(conversation, "user_feedback_stats", dict(feedback_stats[(conversation.id, "user")]))
+            set_prefetched(conversation, "admin_feedback_stats", dict(feedback_stats[(conversation.id, "admin")]))
+            set_prefetched(
+                conversation, "from_end_user_session_id", end_user_session_ids.get(conversation.from_end_user_id)
+            )
+            set_prefetched(conversation, "from_account_name", from_account.name if from_account else None)
+            if conversation.app_model_config_id in app_model_configs:
+                set_prefetched(conversation, "app_model_config", app_model_configs[conversation.app_model_config_id])
+
+    @classmethod
+    def prefetch_messages(cls, messages: Sequence[Message]) -> None:
+        """
+        Prefetch the feedbacks, annotation, annotation hit history, agent thoughts and files of messages.
+        :param messages: messages of a page
+        """
+        if not messages:
+            return
+
+        message_ids = [message.id for message in messages]
+
+        feedbacks: dict[str, list[MessageFeedback]] = defaultdict(list)
+        for feedback in db.session.scalars(
+            select(MessageFeedback)
+            .where(MessageFeedback.message_id.in_(message_ids))
+            .order_by(MessageFeedback.created_at.asc())
+        ):
+            feedbacks[feedback.message_id].append(feedback)
+
+        annotations = {
+            annotation.message_id: annotation
+            for annotation in cls._first_rows(
+                MessageAnnotation, MessageAnnotation.message_id, message_ids, order_by=MessageAnnotation.created_at
+            )
+        }
+
+        hit_annotation_ids = {
+            hit_history.message_id: hit_history.annotation_id
+            for hit_history in cls._first_rows(
+                AppAnnotationHitHistory,
+                AppAnnotationHitHistory.message_id,
+                message_ids,
+                order_by=AppAnnotationHitHistory.created_at,
+            )
+        }
+        hit_annotations = {}
+        if hit_annotation_ids:
+            hit_annotations = {
+                annotation.id: annotation
+                for annotation in db.session.scalars(
+                    select(MessageAnnotation).where(MessageAnnotation.id.in_(set(hit_annotation_ids.values())))
+                )
+            }
+
+        agent_thoughts: dict[str, list[MessageAgentThought]] = defaultdict(list)
+        for agent_thought in db.session.scalars(
+            select(MessageAgentThought)
+            .where(MessageAgentThought.message_id.in_(message_ids))
+            .order_by(MessageAgentThought.position.asc())
+        ):
+            agent_thoughts[agent_thought.message_id].append(agent_thought)
+
+        message_files: dict[str, list[MessageFile]] = defaultdict(list)
+        for message_file in db.session.scalars(select(MessageFile).where(MessageFile.message_id.in_(message_ids))):
+            message_files[message_file.message_id].append(message_file)
+
+        upload_file_ids = {
+            message_file.upload_file_id
+            for files in message_files.values()
+            for message_file in files
+            if message_file.upload_file_id
+        }
+        upload_files = {}
+        if upload_file_ids:
+            upload_files = {
+                upload_file.id: upload_file
+                for upload_file in db.session.scalars(select(UploadFile).where(UploadFile.id.in_(upload_file_ids)))
+            }
+
+        accounts = cls._get_accounts(
+            [feedback.from_account_id for message_feedbacks in feedbacks.values() for feedback in message_feedbacks]
+            + [annotation.account_id for annotation in annotations.values()]
+            + [annotation.account_id for annotation in hit_annotations.values()]
+        )
+
+        for message_feedbacks in feedbacks.values():
+            for feedback in message_feedbacks:
+                set_prefetched(feedback, "from_account", accounts.get(feedback.from_account_id))
+        for annotation in [*annotations.values(), *hit_annotations.values()]:
+            cls._set_annotation_accounts(annotation, accounts)
+        for files in message_files.values():
+            for message_file in files:
+                set_prefetched(message_file, "upload_file", upload_files.get(message_file.upload_file_id))
+
+        for message in messages:
+            message_feedbacks = feedbacks.get(message.id, [])
+            set_prefetched(message, "feedbacks", message_feedbacks)
+            set_prefetched(
+                message,
+                "user_feedback",
+                next((feedback for feedback in message_feedbacks if feedback.from_source == "user"), None),
+            )
+            set_prefetched(
+                message,
+                "admin_feedback",
+                next((feedback for feedback in message_feedbacks if feedback.from_source == "admin"), None),
+            )
+            set_prefetched(message, "annotation", annotations.get(message.id))
+            set_prefetched(message, "annotation_hit_history", hit_annotations.get(hit_annotation_ids.get(message.id)))
+            set_prefetched(message, "agent_thoughts", agent_thoughts.get(message.id, []))
+            set_prefetched(message, "message_files", message_files.get(message.id, []))
+
+    @staticmethod
+    def _first_rows(model, group_column, group_ids: list[str], order_by) -> list:
+        # the first row of each group, ordered by `order_by`
+        row_number = (
+            func.row_number()
+            .over(partition_by=group_column, order_by=(order_by.asc(), model.id.asc()))
+            .label("row_number")
+        )
+        subquery = select(model, row_number).where(group_column.in_(group_ids)).subquery()
+        model_alias = aliased(model, subquery)
+        return list(db.session.scalars(select(model_alias).where(subquery.c.row_number == 1)))
+
+    @staticmethod
+    def _get_accounts(account_ids: list[str]) -> dict[str, Account]:
+        account_ids = {account_id for account_id in account_ids if account_id}
+        if not account_ids:
+            return {}
+        return {
+            account.id: account for account in db.session.scalars(select(Account).where(Account.id.in_(account_ids)))
+        }
+
+    @staticmethod
+    def _set_annotation_accounts(annotation: MessageAnnotation, accounts: dict[str, Account]) -> None:
+        account = accounts.get(annotation.account_id)
+        set_prefetched(annotation, "account", account)
+        set_prefetched(annotation, "annotation_create_account", account)
@@ -5,6 +5,7 @@ import click
 from celery import shared_task
 
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
+from core.rag.index_processor.indexing_checkpoint import IndexingCheckpoint
 from extensions.ext_database import db
 from extensions.ext_storage import storage
 from models.dataset import (
@@ -76,6 +77,7 @@ def clean_dataset_task(
         # delete files
         if documents:
             for document in documents:
+                IndexingCheckpoint.delete_document_checkpoints(document.id)
                 try:
                     if document.data_source_type == "upload_file":
                         if document.data_source_info:
@@ -6,6 +6,7 @@ import click
 from celery import shared_task
 
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
+from core.rag.index_processor.indexing_checkpoint import IndexingCheckpoint
 from extensions.ext_database import db
 from extensions.ext_storage import storage
 from models.dataset import Dataset, DocumentSegment
@@ -43,6 +44,7 @@ def clean_document_task(document_id: str, dataset_id: str, doc_form: str, file_i
                 db.session.delete(segment)
 
             db.session.commit()
+        IndexingCheckpoint.delete_document_checkpoints(document_id)
         if file_id:
             file = db.session.query(UploadFile).filter(UploadFile.id == file_id).first()
             if file:
@@ -56,8 +56,17 @@ def retry_document_indexing_task(dataset_id: str, document_ids: list[str]):
             db.session.query(Document).filter(Document.id == document_id, Document.dataset_id == dataset_id).first()
         )
         try:
-            if document:
-                # clean old data
+            if document and IndexingRunner.can_resume_indexing(document):
+                # keep the completed segments and index the rest
+                document.indexing_status = "indexing"
+                db.session.add(document)
+                db.session.commit()
+
+                indexing_runner = IndexingRunner()
+                indexing_runner.run_in_indexing_status(document)
+                redis_client.delete(retry_indexing_cache_key)
+            elif document:
+                # clean old data, the checkpoints of the document are kept to be reused by the new run
                 index_processor = IndexProcessorFactory(document.doc_form).init_index_processor()
 
                 segments = db.session.query(DocumentSegment).filter(DocumentSegment.document_id == document_id).all()
@@ -0,0 +1,139 @@
+import queue
+import time
+from collections.abc import Generator
+from unittest.mock import MagicMock
+
+import pytest
+
+from configs import dify_config
+from core.app.apps.base_app_queue_manager import AppQueueManager, PublishFrom
+from core.app.apps.message_based_app_queue_manager import MessageBasedAppQueueManager
+from core.app.apps.task_stop_subscriber import TaskStopSubscriber
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.entities.queue_entities import QueueLLMChunkEvent, QueuePingEvent, QueueStopEvent, QueueTextChunkEvent
+from core.model_runtime.entities.llm_entities import LLMResultChunk, LLMResultChunkDelta
+from core.model_runtime.entities.message_entities import AssistantPromptMessage, UserPromptMessage
+
+CHUNK_COUNT = 2000
+
+
+class LegacyQueueManager(MessageBasedAppQueueManager):
+    """Queue manager polling the queue every second and checking the stop flag in Redis on every message."""
+
+    def listen(self) -> Generator:
+        listen_timeout = dify_config.APP_MAX_EXECUTION_TIME
+        start_time = time.time()
+        last_ping_time = 0
+        while True:
+            try:
+                message = self._q.get(timeout=1)
+                if message is None:
+                    break
+
+                yield message
+            except queue.Empty:
+                continue
+            finally:
+                elapsed_time = time.time() - start_time
+                if elapsed_time >= listen_timeout or self._is_stopped():
+                    self.publish(
+                        QueueStopEvent(stopped_by=QueueStopEvent.StopBy.USER_MANUAL), PublishFrom.TASK_PIPELINE
+                    )
+
+                if elapsed_time // 10 > last_ping_time:
+                    self.publish(QueuePingEvent(), PublishFrom.TASK_PIPELINE)
+                    last_ping_time = elapsed_time // 10
+
+    def _is_stopped(self) -> bool:
+        return self._redis_client.get(AppQueueManager._generate_stopped_cache_key(self._task_id)) is not None
+
+
+@pytest.fixture
+def redis_client(mocker):
+    redis_client = MagicMock()
+    redis_client.get.return_value = None
+    mocker.patch("core.app.apps.base_app_queue_manager.redis_client", redis_client)
+    return redis_client
+
+
+@pytest.fixture(autouse=True)
+def subscriber(mocker):
+    subscriber = TaskStopSubscriber()
+    mocker.patch.object(subscriber, "_ensure_started")
+    mocker.patch.object(TaskStopSubscriber, "is_subscribed", True)
+    mocker.patch("core.app.apps.base_app_queue_manager.task_stop_subscriber", subscriber)
+    return subscriber
+
+
+def _stream(queue_manager_class: type[MessageBasedAppQueueManager], redis_client: MagicMock) -> int:
+    redis_client.reset_mock()
+    queue_manager = queue_manager_class(
+        task_id="task_id",
+        user_id="user_id",
+        invoke_from=InvokeFrom.WEB_APP,
+        conversation_id="conversation_id",
+        app_mode="chat",
+        message_id="message_id",
+    )
+    queue_manager._redis_client = redis_client
+
+    for _ in range(CHUNK_COUNT):
+        queue_manager.publish(QueueTextChunkEvent(text="chunk"), PublishFrom.APPLICATION_MANAGER)
+    queue_manager.stop_listen()
+
+    for _ in queue_manager.listen():
+        pass
+
+    return len(redis_client.mock_calls)
+
+
+def test_legacy_listen(benchmark, redis_client):
+    benchmark.group = f"stream {CHUNK_COUNT} chunks through the app queue"
+
+    redis_ops = benchmark.pedantic(_stream, args=(LegacyQueueManager, redis_client), rounds=5)
+
+    benchmark.extra_info["redis_ops_per_request"] = redis_ops
+
+
+def test_listen(benchmark, redis_client):
+    benchmark.group = f"stream {CHUNK_COUNT} chunks through the app queue"
+
+    redis_ops = benchmark.pedantic(_stream, args=(MessageBasedAppQueueManager, redis_client), rounds=5)
+
+    benchmark.extra_info["redis_ops_per_request"] = redis_ops
+    assert redis_ops <= 3
+
+
+def _publish_chunks(queue_manager: MessageBasedAppQueueManager, event: QueueLLMChunkEvent) -> None:
+    for _ in range(CHUNK_COUNT):
+        queue_manager.publish(event, PublishFrom.TASK_PIPELINE)
+    queue_manager._q.queue.clear()
+
+
+@pytest.fixture
+def llm_chunk_event() -> QueueLLMChunkEvent:
+    prompt_messages = [UserPromptMessage(content="question " * 200) for _ in range(20)]
+    return QueueLLMChunkEvent(
+        chunk=LLMResultChunk(
+            model="model",
+            prompt_messages=prompt_messages,
+            delta=LLMResultChunkDelta(index=0, message=AssistantPromptMessage(content="chunk")),
+        )
+    )
+
+
+@pytest.mark.parametrize("deep_check_enabled", [True, False], ids=["deep_check", "type_check"])
+def test_publish(benchmark, mocker, redis_client, llm_chunk_event, deep_check_enabled):
+    benchmark.group = f"publish {CHUNK_COUNT} llm chunk events"
+    dify_config = MagicMock(APP_QUEUE_EVENT_DEEP_CHECK_ENABLED=deep_check_enabled)
+    mocker.patch("core.app.apps.base_app_queue_manager.dify_config", dify_config)
+    queue_manager = MessageBasedAppQueueManager(
+        task_id="task_id",
+        user_id="user_id",
+        invoke_from=InvokeFrom.WEB_APP,
+        conversation_id="conversation_id",
+        app_mode="chat",
+        message_id="message_id",
+    )
+
+    benchmark.pedantic(_publish_chunks, args=(queue_manager, llm_chunk_event), rounds=5)
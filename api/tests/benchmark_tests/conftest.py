@@ -0,0 +1,56 @@
+import os
+
+import pytest
+from flask import Flask
+
+# Getting the absolute path of the current file's directory
+ABS_PATH = os.path.dirname(os.path.abspath(__file__))
+
+# Getting the absolute path of the project's root directory
+PROJECT_DIR = os.path.abspath(os.path.join(ABS_PATH, os.pardir, os.pardir))
+
+
+# Loading the .env file if it exists, benchmarks share the middleware settings of integration tests
+def _load_env() -> None:
+    dotenv_path = os.path.join(PROJECT_DIR, "tests", "integration_tests", ".env")
+    if os.path.exists(dotenv_path):
+        from dotenv import load_dotenv
+
+        load_dotenv(dotenv_path)
+
+
+_load_env()
+
+
+@pytest.fixture(scope="session")
+def app() -> Flask:
+    from configs import dify_config
+
+    app = Flask(__name__)
+    app.config.from_mapping(dify_config.model_dump())
+    app.config.update({"TESTING": True})
+    return app
+
+
+@pytest.fixture(scope="session")
+def database_app(app: Flask) -> Flask:
+    """App bound to the database configured by DB_* settings, a local Postgres is expected."""
+    from extensions import ext_database
+
+    ext_database.init_app(app)
+    return app
+
+
+@pytest.fixture(scope="session")
+def redis_app(app: Flask) -> Flask:
+    """App bound to the Redis configured by REDIS_* settings."""
+    from extensions import ext_redis
+
+    ext_redis.init_app(app)
+    return app
+
+
+@pytest.fixture(autouse=True)
+def _provide_app_context(app: Flask):
+    with app.app_context():
+        yield
@@ -0,0 +1,95 @@
+import uuid
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from core.embedding.cached_embedding import CacheEmbedding
+from core.model_runtime.entities.model_entities import ModelPropertyKey
+from core.model_runtime.entities.text_embedding_entities import EmbeddingUsage, TextEmbeddingResult
+from extensions.ext_database import db
+from libs import helper
+from models.dataset import Embedding
+
+# lookup timings are reported per 1k chunks
+CHUNK_COUNT = 1000
+DIMENSION = 1536
+
+
+def _mock_model_instance(model_name: str) -> MagicMock:
+    rng = np.random.default_rng(0)
+
+    def invoke_text_embedding(texts: list[str], **kwargs) -> TextEmbeddingResult:
+        return TextEmbeddingResult(
+            model=model_name,
+            embeddings=rng.random((len(texts), DIMENSION)).tolist(),
+            usage=EmbeddingUsage(
+                tokens=0,
+                total_tokens=0,
+                unit_price=0,
+                price_unit=0,
+                total_price=0,
+                currency="USD",
+                latency=0,
+            ),
+        )
+
+    model_instance = MagicMock()
+    model_instance.model = model_name
+    model_instance.provider = "benchmark"
+    model_instance.credentials = {}
+    model_instance.model_type_instance.get_model_schema.return_value.model_properties = {
+        ModelPropertyKey.MAX_CHUNKS: 32
+    }
+    model_instance.invoke_text_embedding.side_effect = invoke_text_embedding
+    return model_instance
+
+
+def _legacy_lookup(model_instance: MagicMock, texts: list[str]) -> int:
+    hits = 0
+    for text in texts:
+        embedding = (
+            db.session.query(Embedding)
+            .filter_by(
+                model_name=model_instance.model,
+                hash=helper.generate_text_hash(text),
+                provider_name=model_instance.provider,
+            )
+            .first()
+        )
+        if embedding:
+            embedding.get_embedding()
+            hits += 1
+    return hits
+
+
+@pytest.fixture
+def cached_texts(database_app):
+    Embedding.__table__.create(db.engine, checkfirst=True)
+    model_instance = _mock_model_instance(f"benchmark-{uuid.uuid4().hex}")
+    texts = [f"synthetic chunk {i} " + "lorem ipsum " * 40 for i in range(CHUNK_COUNT)]
+    # the first call embeds every chunk and writes the cache
+    CacheEmbedding(model_instance).embed_documents(texts)
+    model_instance.invoke_text_embedding.reset_mock()
+
+    yield model_instance, texts
+
+    db.session.query(Embedding).filter(Embedding.model_name == model_instance.model).delete()
+    db.session.commit()
+
+
+def test_legacy_cache_lookup(benchmark, cached_texts):
+    model_instance, texts = cached_texts
+    benchmark.group = "document embedding cache lookup per 1k chunks"
+
+    hits = benchmark.pedantic(_legacy_lookup, args=(model_instance, texts), rounds=5)
+    assert hits == CHUNK_COUNT
+
+
+def test_batched_cache_lookup(benchmark, cached_texts):
+    model_instance, texts = cached_texts
+    benchmark.group = "document embedding cache lookup per 1k chunks"
+
+    embeddings = benchmark.pedantic(CacheEmbedding(model_instance).embed_documents, args=(texts,), rounds=5)
+    assert len(embeddings) == CHUNK_COUNT
+    model_instance.invoke_text_embedding.assert_not_called()
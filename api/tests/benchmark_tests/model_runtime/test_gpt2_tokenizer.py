@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from core.model_runtime.model_providers.__base.tokenizers.gpt2_tokenzier import (
+    GPT2TokenizerBackend,
+    TiktokenGPT2TokenizerBackend,
+    TransformersGPT2TokenizerBackend,
+)
+
+TEXT_COUNT = 2000
+
+
+def _create_texts() -> list[str]:
+    rand = random.Random(42)
+    words = [f"term{index}" for index in range(2000)] + ["the", "a", "of", "and", "to", "in", "is", "中文", "😀"] * 100
+    return [" ".join(rand.choices(words, k=rand.randint(20, 200))) for _ in range(TEXT_COUNT)]
+
+
+def _encode_each(backend: GPT2TokenizerBackend, texts: list[str]) -> int:
+    return sum(len(backend.encode(text)) for text in texts)
+
+
+def _encode_batch(backend: GPT2TokenizerBackend, texts: list[str]) -> int:
+    return sum(len(tokens) for tokens in backend.encode_batch(texts))
+
+
+@pytest.mark.parametrize(
+    ("backend_class", "encode"),
+    [
+        (TransformersGPT2TokenizerBackend, _encode_each),
+        (TiktokenGPT2TokenizerBackend, _encode_each),
+        (TiktokenGPT2TokenizerBackend, _encode_batch),
+    ],
+    ids=["transformers", "tiktoken", "tiktoken batch"],
+)
+def test_gpt2_tokenizer(benchmark, backend_class, encode):
+    benchmark.group = f"gpt2 tokenizer, {TEXT_COUNT} texts"
+    backend = backend_class()
+    texts = _create_texts()
+
+    num_tokens = benchmark.pedantic(encode, args=(backend, texts), rounds=5)
+
+    benchmark.extra_info["tokens"] = num_tokens
+    benchmark.extra_info["tokens_per_second"] = round(num_tokens / benchmark.stats.stats.mean)
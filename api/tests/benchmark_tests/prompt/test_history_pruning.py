@@ -0,0 +1,62 @@
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.model_runtime.entities.message_entities import AssistantPromptMessage, PromptMessage, UserPromptMessage
+from core.model_runtime.model_providers.__base.tokenizers.gpt2_tokenzier import GPT2Tokenizer
+from core.prompt.utils.prompt_message_token_counter import PromptMessageTokenCounter
+
+MESSAGE_COUNT = 500
+MAX_TOKEN_LIMIT = 2000
+
+
+def _count_tokens(prompt_messages: list[PromptMessage]) -> int:
+    # token count of chat models, with the tokenizer of the providers without their own
+    return sum(GPT2Tokenizer.get_num_tokens(prompt_message.content) + 3 for prompt_message in prompt_messages) + 3
+
+
+def _create_history() -> tuple[list[PromptMessage], list[str]]:
+    prompt_messages = []
+    keys = []
+    for index in range(MESSAGE_COUNT // 2):
+        prompt_messages.append(UserPromptMessage(content=f"question {index} about the product " * 3))
+        prompt_messages.append(AssistantPromptMessage(content=f"answer {index} with some details " * 10))
+        keys.extend([f"{index}:query", f"{index}:answer"])
+    return prompt_messages, keys
+
+
+def _legacy_prune(prompt_messages: list[PromptMessage], keys: list[str], model_instance: MagicMock) -> None:
+    # pruning before the token counter: the remaining history is counted again after each dropped message
+    prompt_messages = list(prompt_messages)
+    curr_message_tokens = model_instance.get_llm_num_tokens(prompt_messages)
+    while curr_message_tokens > MAX_TOKEN_LIMIT and len(prompt_messages) > 1:
+        prompt_messages.pop(0)
+        curr_message_tokens = model_instance.get_llm_num_tokens(prompt_messages)
+
+
+def _prune(prompt_messages: list[PromptMessage], keys: list[str], model_instance: MagicMock) -> None:
+    PromptMessageTokenCounter(model_instance).prune(prompt_messages, MAX_TOKEN_LIMIT, keys=keys)
+
+
+def _mock_model_instance(model: str) -> MagicMock:
+    model_instance = MagicMock()
+    model_instance.provider = "openai"
+    model_instance.model = model
+    model_instance.credentials = {}
+    model_instance.get_llm_num_tokens.side_effect = _count_tokens
+    return model_instance
+
+
+@pytest.mark.parametrize(
+    ("prune", "cached", "rounds"),
+    [(_legacy_prune, False, 1), (_prune, False, 5), (_prune, True, 5)],
+    ids=["legacy", "prefix sums, first turn", "prefix sums, next turns"],
+)
+def test_history_pruning(benchmark, prune, cached, rounds):
+    benchmark.group = f"history pruning, {MESSAGE_COUNT} messages, {MAX_TOKEN_LIMIT} tokens"
+    prompt_messages, keys = _create_history()
+
+    # the messages of a conversation are cached after its first turn
+    setup = lambda: ((prompt_messages, keys, _mock_model_instance("gpt-4" if cached else str(uuid.uuid4()))), {})
+    benchmark.pedantic(prune, setup=setup, rounds=rounds)
@@ -0,0 +1,67 @@
+import random
+from collections import defaultdict
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.rag.datasource.keyword.jieba.jieba import Jieba
+
+KEYWORD_COUNT = 200_000
+NODE_COUNT = 100_000
+QUERY_COUNT = 20
+
+
+def _legacy_retrieve_ids_by_query(keyword_table: dict, keywords: set[str], k: int = 4) -> list[str]:
+    chunk_indices_count: dict[str, int] = defaultdict(int)
+    keywords = [keyword for keyword in keywords if keyword in set(keyword_table.keys())]
+    for keyword in keywords:
+        for node_id in keyword_table[keyword]:
+            chunk_indices_count[node_id] += 1
+
+    sorted_chunk_indices = sorted(
+        chunk_indices_count.keys(),
+        key=lambda x: chunk_indices_count[x],
+        reverse=True,
+    )
+
+    return sorted_chunk_indices[:k]
+
+
+@pytest.fixture(scope="module")
+def keyword_table() -> dict[str, set[str]]:
+    rng = random.Random(0)
+    return {
+        f"keyword-{i}": {f"node-{rng.randrange(NODE_COUNT)}" for _ in range(rng.randint(1, 8))}
+        for i in range(KEYWORD_COUNT)
+    }
+
+
+@pytest.fixture(scope="module")
+def queries() -> list[set[str]]:
+    rng = random.Random(1)
+    return [{f"keyword-{rng.randrange(KEYWORD_COUNT * 2)}" for _ in range(10)} for _ in range(QUERY_COUNT)]
+
+
+def test_legacy_retrieve_ids_by_query(benchmark, keyword_table, queries):
+    benchmark.group = f"keyword search over {KEYWORD_COUNT} keywords, {QUERY_COUNT} queries"
+
+    benchmark.pedantic(
+        lambda: [_legacy_retrieve_ids_by_query(keyword_table, keywords) for keywords in queries],
+        rounds=3,
+    )
+
+
+def test_retrieve_ids_by_query(benchmark, mocker, keyword_table, queries):
+    benchmark.group = f"keyword search over {KEYWORD_COUNT} keywords, {QUERY_COUNT} queries"
+    jieba = Jieba(dataset=MagicMock(id="dataset_id"))
+    extract_keywords = mocker.patch(
+        "core.rag.datasource.keyword.jieba.jieba.JiebaKeywordTableHandler.extract_keywords",
+        side_effect=lambda query: queries[int(query)],
+    )
+
+    results = benchmark.pedantic(
+        lambda: [jieba._retrieve_ids_by_query(keyword_table, str(i)) for i in range(QUERY_COUNT)],
+        rounds=3,
+    )
+    assert extract_keywords.call_count == QUERY_COUNT * 3
+    assert results == [_legacy_retrieve_ids_by_query(keyword_table, keywords) for keywords in queries]
@@ -0,0 +1,98 @@
+import math
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from core.rag.rerank.rerank_scoring import tfidf_cosine_scores, vector_cosine_scores
+
+DIMENSION = 1536
+
+
+def _legacy_keyword_scores(query_keywords: set[str], documents_keywords: list[set[str]]) -> list[float]:
+    query_keyword_counts = Counter(query_keywords)
+    total_documents = len(documents_keywords)
+
+    all_keywords = set()
+    for document_keywords in documents_keywords:
+        all_keywords.update(document_keywords)
+
+    keyword_idf = {}
+    for keyword in all_keywords:
+        doc_count_containing_keyword = sum(1 for doc_keywords in documents_keywords if keyword in doc_keywords)
+        keyword_idf[keyword] = math.log((1 + total_documents) / (1 + doc_count_containing_keyword)) + 1
+
+    query_tfidf = {keyword: count * keyword_idf.get(keyword, 0) for keyword, count in query_keyword_counts.items()}
+
+    documents_tfidf = []
+    for document_keywords in documents_keywords:
+        document_keyword_counts = Counter(document_keywords)
+        documents_tfidf.append(
+            {keyword: count * keyword_idf.get(keyword, 0) for keyword, count in document_keyword_counts.items()}
+        )
+
+    def cosine_similarity(vec1, vec2):
+        intersection = set(vec1.keys()) & set(vec2.keys())
+        numerator = sum(vec1[x] * vec2[x] for x in intersection)
+
+        sum1 = sum(vec1[x] ** 2 for x in vec1)
+        sum2 = sum(vec2[x] ** 2 for x in vec2)
+        denominator = math.sqrt(sum1) * math.sqrt(sum2)
+
+        if not denominator:
+            return 0.0
+        else:
+            return float(numerator) / denominator
+
+    return [cosine_similarity(query_tfidf, document_tfidf) for document_tfidf in documents_tfidf]
+
+
+def _legacy_vector_scores(query_vector: list[float], vectors: list[list[float]]) -> list[float]:
+    scores = []
+    for vector in vectors:
+        vec1 = np.array(query_vector)
+        vec2 = np.array(vector)
+        scores.append(np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2)))
+    return scores
+
+
+def _candidates(candidate_count: int):
+    rng = random.Random(candidate_count)
+    vocabulary_size = candidate_count * 4
+    documents_keywords = [
+        {f"keyword-{rng.randrange(vocabulary_size)}" for _ in range(rng.randint(5, 20))} for _ in range(candidate_count)
+    ]
+    query_keywords = {f"keyword-{rng.randrange(vocabulary_size)}" for _ in range(6)}
+    vectors = np.random.default_rng(candidate_count).random((candidate_count + 1, DIMENSION)).tolist()
+    return query_keywords, documents_keywords, vectors[0], vectors[1:]
+
+
+@pytest.mark.parametrize("candidate_count", [50, 500, 5000])
+def test_legacy_rerank_scoring(benchmark, candidate_count):
+    query_keywords, documents_keywords, query_vector, vectors = _candidates(candidate_count)
+    benchmark.group = f"weighted rerank scoring, {candidate_count} candidates"
+
+    def score():
+        return (
+            _legacy_keyword_scores(query_keywords, documents_keywords),
+            _legacy_vector_scores(query_vector, vectors),
+        )
+
+    benchmark.pedantic(score, rounds=3)
+
+
+@pytest.mark.parametrize("candidate_count", [50, 500, 5000])
+def test_vectorized_rerank_scoring(benchmark, candidate_count):
+    query_keywords, documents_keywords, query_vector, vectors = _candidates(candidate_count)
+    benchmark.group = f"weighted rerank scoring, {candidate_count} candidates"
+
+    def score():
+        return (
+            tfidf_cosine_scores(query_keywords, documents_keywords),
+            vector_cosine_scores(query_vector, vectors),
+        )
+
+    keyword_scores, vector_scores = benchmark.pedantic(score, rounds=3)
+    assert keyword_scores == pytest.approx(_legacy_keyword_scores(query_keywords, documents_keywords))
+    assert vector_scores == pytest.approx(_legacy_vector_scores(query_vector, vectors))
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from core.model_runtime.model_providers.__base.tokenizers.gpt2_tokenzier import GPT2Tokenizer
+from core.rag.splitter.fixed_text_splitter import FixedRecursiveCharacterTextSplitter
+
+PAGE_COUNT = 300
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+
+
+class _LegacyTextSplitter(FixedRecursiveCharacterTextSplitter):
+    # splitter before batched lengths: every fragment is tokenized on its own, each time it is measured
+    def _get_lengths(self, texts: list[str]) -> list[int]:
+        return [self._length_function(text) for text in texts]
+
+
+def _create_corpus() -> str:
+    rand = random.Random(42)
+    words = [f"term{index}" for index in range(2000)] + ["the", "a", "of", "and", "to", "in", "is"] * 100
+    pages = []
+    for _ in range(PAGE_COUNT):
+        paragraphs = []
+        for _ in range(rand.randint(4, 8)):
+            lines = [" ".join(rand.choices(words, k=rand.randint(8, 40))) + "." for _ in range(rand.randint(2, 6))]
+            paragraphs.append("\n".join(lines))
+        # headers and footers repeat on each page, as in extracted documents
+        pages.append("\n\n".join(["Annual report", *paragraphs, "Confidential"]))
+    return "\n\n".join(pages)
+
+
+def _create_splitter(batched: bool) -> FixedRecursiveCharacterTextSplitter:
+    splitter_class = FixedRecursiveCharacterTextSplitter if batched else _LegacyTextSplitter
+    return splitter_class.from_encoder(
+        embedding_model_instance=None,
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        fixed_separator="\n\n",
+        separators=["\n\n", "。", ". ", " ", ""],
+    )
+
+
+@pytest.mark.parametrize("batched", [False, True], ids=["legacy", "batched lengths"])
+def test_text_splitter(benchmark, batched):
+    benchmark.group = f"text splitter, {PAGE_COUNT} pages"
+    corpus = _create_corpus()
+    # load the tokenizer outside of the measured rounds
+    GPT2Tokenizer.get_num_tokens("warm up")
+
+    chunks = benchmark.pedantic(
+        lambda splitter: splitter.split_text(corpus),
+        setup=lambda: ((_create_splitter(batched),), {}),
+        rounds=5,
+    )
+
+    benchmark.extra_info["chunks"] = len(chunks)
+    benchmark.extra_info["chunks_per_second"] = round(len(chunks) / benchmark.stats.stats.mean)
@@ -0,0 +1,56 @@
+from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.entities.graph_cache import GraphCache
+
+# start -> STAGE_COUNT x (BRANCH_COUNT parallel branches of BRANCH_LENGTH nodes -> join node) -> end
+STAGE_COUNT = 4
+BRANCH_COUNT = 3
+BRANCH_LENGTH = 8
+
+
+def _build_graph_config() -> dict:
+    nodes = [{"id": "start", "data": {"type": "start", "title": "start"}}]
+    edges = []
+    previous_node_id = "start"
+    for stage in range(STAGE_COUNT):
+        join_node_id = f"join-{stage}"
+        for branch in range(BRANCH_COUNT):
+            source_node_id = previous_node_id
+            for position in range(BRANCH_LENGTH):
+                node_id = f"node-{stage}-{branch}-{position}"
+                nodes.append({"id": node_id, "data": {"type": "template-transform", "title": node_id}})
+                edges.append({"id": f"{source_node_id}-{node_id}", "source": source_node_id, "target": node_id})
+                source_node_id = node_id
+
+            edges.append({"id": f"{source_node_id}-{join_node_id}", "source": source_node_id, "target": join_node_id})
+
+        nodes.append({"id": join_node_id, "data": {"type": "template-transform", "title": join_node_id}})
+        previous_node_id = join_node_id
+
+    nodes.append({"id": "end", "data": {"type": "end", "title": "end", "outputs": []}})
+    edges.append({"id": f"{previous_node_id}-end", "source": previous_node_id, "target": "end"})
+    return {"nodes": nodes, "edges": edges}
+
+
+def test_graph_init(benchmark):
+    benchmark.group = "graph init, 100 nodes"
+    graph_config = _build_graph_config()
+
+    graph = benchmark.pedantic(Graph.init, kwargs={"graph_config": graph_config}, rounds=20)
+
+    benchmark.extra_info["node_count"] = len(graph.node_ids)
+    benchmark.extra_info["parallel_count"] = len(graph.parallel_mapping)
+    assert len(graph.node_ids) >= 100
+
+
+def test_graph_cache(benchmark):
+    benchmark.group = "graph init, 100 nodes"
+    graph_config = _build_graph_config()
+    cache = GraphCache(max_size=10)
+    cache.get_or_init(workflow_id="workflow", graph_config=graph_config)
+
+    graph = benchmark.pedantic(
+        cache.get_or_init, kwargs={"workflow_id": "workflow", "graph_config": graph_config}, rounds=20
+    )
+
+    benchmark.extra_info["node_count"] = len(graph.node_ids)
+    assert cache.get_stats()["misses"] == 1
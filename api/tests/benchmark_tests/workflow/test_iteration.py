@@ -0,0 +1,92 @@
+import time
+import uuid
+
+import pytest
+
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.workflow.entities.node_entities import NodeRunResult, UserFrom
+from core.workflow.entities.variable_pool import VariablePool
+from core.workflow.enums import SystemVariableKey
+from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
+from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
+from core.workflow.nodes.event import RunCompletedEvent
+from core.workflow.nodes.iteration.iteration_node import IterationNode
+from core.workflow.nodes.template_transform.template_transform_node import TemplateTransformNode
+from models.workflow import WorkflowNodeExecutionStatus, WorkflowType
+
+ITEM_COUNT = 20
+# latency of the mocked slow node, e.g. an LLM call
+NODE_LATENCY = 0.05
+
+
+def _slow_node_run(self):
+    time.sleep(NODE_LATENCY)
+    item = self.graph_runtime_state.variable_pool.get(["iteration-1", "item"]).value
+    return NodeRunResult(status=WorkflowNodeExecutionStatus.SUCCEEDED, outputs={"output": f"{item} 123"})
+
+
+def _run_iteration(is_parallel: bool, parallel_nums: int) -> list:
+    node_data = {
+        "iterator_selector": ["start", "items"],
+        "output_selector": ["tt", "output"],
+        "output_type": "array[string]",
+        "start_node_id": "tt",
+        "title": "iteration",
+        "type": "iteration",
+        "is_parallel": is_parallel,
+        "parallel_nums": parallel_nums,
+    }
+    graph_config = {
+        "edges": [{"id": "start-source-iteration-1-target", "source": "start", "target": "iteration-1"}],
+        "nodes": [
+            {"data": {"title": "Start", "type": "start", "variables": []}, "id": "start"},
+            {"data": node_data, "id": "iteration-1"},
+            {
+                "data": {
+                    "iteration_id": "iteration-1",
+                    "template": "{{ arg1 }} 123",
+                    "title": "slow node",
+                    "type": "template-transform",
+                    "variables": [{"value_selector": ["iteration-1", "item"], "variable": "arg1"}],
+                },
+                "id": "tt",
+            },
+        ],
+    }
+    pool = VariablePool(system_variables={SystemVariableKey.FILES: []}, user_inputs={}, environment_variables=[])
+    pool.add(["start", "items"], [f"item-{i}" for i in range(ITEM_COUNT)])
+
+    iteration_node = IterationNode(
+        id=str(uuid.uuid4()),
+        graph_init_params=GraphInitParams(
+            tenant_id="1",
+            app_id="1",
+            workflow_type=WorkflowType.WORKFLOW,
+            workflow_id="1",
+            graph_config=graph_config,
+            user_id="1",
+            user_from=UserFrom.ACCOUNT,
+            invoke_from=InvokeFrom.DEBUGGER,
+            call_depth=0,
+        ),
+        graph=Graph.init(graph_config=graph_config),
+        graph_runtime_state=GraphRuntimeState(variable_pool=pool, start_at=time.perf_counter()),
+        config={"data": node_data, "id": "iteration-1"},
+    )
+
+    result = [event for event in iteration_node._run() if isinstance(event, RunCompletedEvent)][-1]
+    assert result.run_result.outputs == {"output": [f"item-{i} 123" for i in range(ITEM_COUNT)]}
+    return result
+
+
+@pytest.mark.parametrize(
+    ("is_parallel", "parallel_nums"),
+    [(False, 1), (True, 1), (True, 5), (True, 10)],
+    ids=["sequential", "parallel-1", "parallel-5", "parallel-10"],
+)
+def test_iteration(benchmark, mocker, is_parallel, parallel_nums):
+    benchmark.group = f"iteration over {ITEM_COUNT} items with a {NODE_LATENCY}s node"
+    mocker.patch.object(TemplateTransformNode, "_run", new=_slow_node_run)
+
+    benchmark.pedantic(_run_iteration, args=(is_parallel, parallel_nums), rounds=3)
@@ -0,0 +1,99 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from core.workflow.graph_engine.graph_engine_scheduler import graph_engine_scheduler
+from core.workflow.graph_engine.parallel_branch_join import ParallelBranchJoin
+
+BRANCH_COUNT = 5
+# steps of the sibling branches, e.g. the chunks of an LLM call
+STEP_COUNT = 50
+STEP_LATENCY = 0.01
+
+
+class _BranchFailedError(Exception):
+    pass
+
+
+def _legacy_join(steps: list[int]) -> None:
+    # join of the branches before the redesign: polling queue, siblings run to completion
+    q: queue.Queue = queue.Queue()
+
+    def branch(index: int):
+        if index == 0:
+            time.sleep(STEP_LATENCY)
+            q.put("failed")
+            return
+
+        for _ in range(STEP_COUNT):
+            time.sleep(STEP_LATENCY)
+            steps[index] += 1
+            q.put("chunk")
+        q.put("succeeded")
+
+    futures = [graph_engine_scheduler.submit("tenant", "legacy", branch, index) for index in range(BRANCH_COUNT)]
+    try:
+        while True:
+            try:
+                event = q.get(timeout=1)
+            except queue.Empty:
+                continue
+            if event == "failed":
+                raise _BranchFailedError()
+    finally:
+        # the siblings are still running, let them finish to count their wasted steps
+        for future in futures:
+            future.result()
+
+
+def _join(steps: list[int]) -> None:
+    join = ParallelBranchJoin(tenant_id="tenant", run_id="join")
+    finished = threading.Barrier(BRANCH_COUNT)
+
+    def branch(index: int):
+        try:
+            if index == 0:
+                time.sleep(STEP_LATENCY)
+                join.put("failed")
+                return
+
+            for _ in range(STEP_COUNT):
+                time.sleep(STEP_LATENCY)
+                steps[index] += 1
+                if not join.put("chunk"):
+                    return
+            join.put("succeeded")
+        finally:
+            finished.wait()
+
+    for index in range(BRANCH_COUNT):
+        join.submit(branch, index=index)
+
+    try:
+        for event in join.events():
+            if event == "failed":
+                raise _BranchFailedError()
+    except _BranchFailedError:
+        join.cancel()
+        finished.wait()
+        raise
+
+
+@pytest.mark.parametrize("join_fn", [_legacy_join, _join], ids=["legacy", "join"])
+def test_failed_branch_fan_out(benchmark, join_fn):
+    benchmark.group = "parallel branch join, one failing branch"
+    wasted_steps = []
+
+    def run():
+        steps = [0] * BRANCH_COUNT
+        with pytest.raises(_BranchFailedError):
+            join_fn(steps)
+        wasted_steps.append(sum(steps))
+
+    benchmark.pedantic(run, rounds=5)
+
+    benchmark.extra_info["wasted_sibling_steps"] = max(wasted_steps)
+    if join_fn is _join:
+        assert max(wasted_steps) < (BRANCH_COUNT - 1) * STEP_COUNT
@@ -0,0 +1,80 @@
+from collections import defaultdict
+
+import pytest
+from pydantic import BaseModel, Field, PrivateAttr
+
+from core.app.segments import Segment, factory
+from core.workflow.entities.variable_pool import VariablePool
+
+NODE_COUNT = 500
+ITEM_COUNT = 10_000
+FORK_COUNT = 100
+
+
+class LegacyVariablePool(BaseModel):
+    # variable pool before the layers: segments built on add, forks copy the mapping of the nodes
+    variable_dictionary: dict[str, dict[int, Segment]] = Field(default=defaultdict(dict))
+    _shared_node_ids: set[str] = PrivateAttr(default_factory=set)
+
+    def add(self, selector, value) -> None:
+        v = value if isinstance(value, Segment) else factory.build_segment(value)
+        node_id = selector[0]
+        if node_id in self._shared_node_ids:
+            self._shared_node_ids.discard(node_id)
+            self.variable_dictionary[node_id] = dict(self.variable_dictionary[node_id])
+        self.variable_dictionary[node_id][hash(tuple(selector[1:]))] = v
+
+    def get(self, selector):
+        return self.variable_dictionary[selector[0]].get(hash(tuple(selector[1:])))
+
+    def fork(self) -> "LegacyVariablePool":
+        node_ids = set(self.variable_dictionary)
+        self._shared_node_ids.update(node_ids)
+        pool = self.model_copy()
+        pool.variable_dictionary = defaultdict(dict, self.variable_dictionary)
+        pool._shared_node_ids = node_ids
+        return pool
+
+
+def _create_pool(pool_cls):
+    if pool_cls is VariablePool:
+        return VariablePool(system_variables={}, user_inputs={}, environment_variables=[])
+    return pool_cls()
+
+
+def _run_nodes(pool_cls) -> None:
+    # each node outputs a large array, only the last one is read
+    pool = _create_pool(pool_cls)
+    items = [{"id": index, "text": f"chunk {index}"} for index in range(ITEM_COUNT)]
+    for index in range(NODE_COUNT):
+        pool.add([f"node-{index}", "output"], items)
+    assert len(pool.get([f"node-{NODE_COUNT - 1}", "output"]).value) == ITEM_COUNT
+
+
+def _create_filled_pool(pool_cls):
+    # a pool holding the outputs of many nodes
+    pool = _create_pool(pool_cls)
+    for index in range(NODE_COUNT):
+        for key in range(10):
+            pool.add([f"node-{index}", f"output-{key}"], key)
+    return (pool,), {}
+
+
+def _fork_pool(pool) -> None:
+    # parallel iteration items forking the pool
+    for index in range(FORK_COUNT):
+        forked_pool = pool.fork()
+        forked_pool.add(["iteration", "index"], index)
+        assert forked_pool.get([f"node-{NODE_COUNT - 1}", "output-9"]).value == 9
+
+
+@pytest.mark.parametrize("pool_cls", [LegacyVariablePool, VariablePool], ids=["legacy", "layered"])
+def test_large_outputs(benchmark, pool_cls):
+    benchmark.group = f"variable pool, {NODE_COUNT} nodes outputting {ITEM_COUNT} items"
+    benchmark.pedantic(_run_nodes, args=(pool_cls,), rounds=5)
+
+
+@pytest.mark.parametrize("pool_cls", [LegacyVariablePool, VariablePool], ids=["legacy", "layered"])
+def test_forks(benchmark, pool_cls):
+    benchmark.group = f"variable pool, {FORK_COUNT} forks of {NODE_COUNT} nodes"
+    benchmark.pedantic(_fork_pool, setup=lambda: _create_filled_pool(pool_cls), rounds=5)
@@ -93,7 +93,7 @@ class MockTcvectordbClass:
         output_fields: Optional[list[str]] = None,
         timeout: Optional[float] = None,
     ) -> list[dict]:
-        return [{"metadata": '{"doc_id":"foo1"}', "text": "text", "doc_id": "foo1", "score": 0.1}]
+        return [{"id": "foo1", "metadata": '{"doc_id":"foo1"}', "text": "text", "doc_id": "foo1", "score": 0.1}]
 
     def collection_delete(
         self,
@@ -108,6 +108,16 @@ class TestOpenSearchVector:
         assert len(ids) == 1
         assert ids[0] == "mock_id"
 
+    def test_get_existing_ids(self):
+        mock_response = {
+            "hits": {"total": {"value": 1}, "hits": [{"_id": "mock_id", "_source": {"metadata": {"doc_id": "doc_1"}}}]}
+        }
+        self.vector._client.search.return_value = mock_response
+
+        assert self.vector.get_existing_ids(["doc_1", "doc_2"]) == {"doc_1"}
+        query = self.vector._client.search.call_args.kwargs["body"]["query"]
+        assert query == {"terms": {"metadata.doc_id": ["doc_1", "doc_2"]}}
+
     def test_add_texts(self):
         self.vector._client.index.return_value = {"result": "created"}
 
@@ -32,6 +32,9 @@ class TencentVectorTest(AbstractVectorTest):
         hits_by_full_text = self.vector.search_by_full_text(query=get_example_text())
         assert len(hits_by_full_text) == 0
 
+    def get_existing_ids(self):
+        assert self.vector.get_existing_ids(["foo1"]) == {"foo1"}
+
 
 def test_tencent_vector(setup_mock_redis, setup_tcvectordb_mock):
     TencentVectorTest().run_all_tests()
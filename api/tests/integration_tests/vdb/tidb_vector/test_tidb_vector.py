@@ -31,6 +31,9 @@ class TiDBVectorTest(AbstractVectorTest):
         exist = self.vector.text_exists(self.example_doc_id)
         assert exist == False
 
+    def get_existing_ids(self):
+        assert self.vector.get_existing_ids([self.example_doc_id]) == set()
+
     def search_by_vector(self):
         hits_by_vector: list[Document] = self.vector.search_by_vector(query_vector=self.example_embedding)
         assert len(hits_by_vector) == 0
@@ -1,6 +1,9 @@
+import uuid
+
 from core.rag.datasource.vdb.weaviate.weaviate_vector import WeaviateConfig, WeaviateVector
 from tests.integration_tests.vdb.test_vector_store import (
     AbstractVectorTest,
+    get_example_document,
     setup_mock_redis,
 )
 
@@ -18,6 +21,17 @@ class WeaviateVectorTest(AbstractVectorTest):
             attributes=self.attributes,
         )
 
+    def get_existing_ids(self):
+        super().get_existing_ids()
+        # ids sharing the tokens of word tokenized text, e.g. their 0000 groups, are matched exactly
+        doc_ids = [str(uuid.UUID(int=i)) for i in range(1, 21)]
+        self.vector.add_texts(
+            documents=[get_example_document(doc_id=doc_id) for doc_id in doc_ids],
+            embeddings=[self.example_embedding] * len(doc_ids),
+        )
+        query_ids = [doc_ids[-1], doc_ids[-2], str(uuid.UUID(int=100))]
+        assert self.vector.get_existing_ids(query_ids) == {doc_ids[-1], doc_ids[-2]}
+
 
 def test_weaviate_vector(setup_mock_redis):
     WeaviateVectorTest().run_all_tests()
@@ -3,6 +3,7 @@ from textwrap import dedent
 
 import pytest
 from flask import Flask
+from pydantic import ValidationError
 from yarl import URL
 
 from configs.app_config import DifyConfig
@@ -56,6 +57,14 @@ def test_dify_config(example_env_file):
     assert config.HTTP_REQUEST_MAX_WRITE_TIMEOUT == 30
 
 
+def test_dify_config_rejects_unknown_gpt2_tokenizer_backend(example_env_file, monkeypatch):
+    assert DifyConfig(_env_file=example_env_file).GPT2_TOKENIZER_BACKEND == "tiktoken"
+
+    monkeypatch.setenv("GPT2_TOKENIZER_BACKEND", "tiktokn")
+    with pytest.raises(ValidationError):
+        DifyConfig(_env_file=example_env_file)
+
+
 # NOTE: If there is a `.env` file in your Workspace, this test might not succeed as expected.
 # This is due to `pymilvus` loading all the variables from the `.env` file into `os.environ`.
 def test_flask_configs(example_env_file):
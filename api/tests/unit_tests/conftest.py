@@ -2,6 +2,11 @@ import os
 
 import pytest
 from flask import Flask
+from sqlalchemy import JSON, MetaData, Table, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from extensions.ext_database import db
+from models.types import StringUUID
 
 # Getting the absolute path of the current file's directory
 ABS_PATH = os.path.dirname(os.path.abspath(__file__))
@@ -22,3 +27,42 @@ def app() -> Flask:
 def _provide_app_context(app: Flask):
     with app.app_context():
         yield
+
+
+@pytest.fixture
+def sqlite_tables() -> list[Table]:
+    """Tables created by the sqlite_db fixture, overridden by the tests using it."""
+    return []
+
+
+@pytest.fixture
+def sqlite_db(mocker, sqlite_tables: list[Table]):
+    """
+    In-memory SQLite database with the sqlite_tables, the postgres column types and server defaults
+    are replaced by their SQLite equivalents.
+    """
+    # StringUUID binds uuid objects on databases other than postgres, the rows of the tests use string ids
+    mocker.patch.object(StringUUID, "process_bind_param", lambda self, value, dialect: value)
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    with app.app_context():
+        metadata = MetaData()
+        tables = [table.to_metadata(metadata) for table in sqlite_tables]
+        for table in tables:
+            for column in table.columns:
+                if isinstance(column.type, JSONB):
+                    column.type = JSON()
+                if column.server_default is None:
+                    continue
+                default = str(column.server_default.arg)
+                if "uuid_generate_v4" in default:
+                    column.server_default = None
+                elif "CURRENT_TIMESTAMP" in default:
+                    column.server_default = db.DefaultClause(text("CURRENT_TIMESTAMP"))
+                elif "::" in default:
+                    column.server_default = db.DefaultClause(text(default.split("::")[0]))
+        metadata.create_all(db.engine)
+        yield db
+        db.session.remove()
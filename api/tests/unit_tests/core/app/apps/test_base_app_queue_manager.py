@@ -0,0 +1,105 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.app.apps.base_app_queue_manager import AppQueueManager, PublishFrom
+from core.app.apps.message_based_app_queue_manager import MessageBasedAppQueueManager
+from core.app.apps.task_stop_subscriber import TaskStopSubscriber
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.entities.queue_entities import QueueStopEvent, QueueTextChunkEvent, QueueWorkflowSucceededEvent
+
+
+@pytest.fixture
+def redis_client(mocker):
+    redis_client = MagicMock()
+    redis_client.get.return_value = None
+    mocker.patch("core.app.apps.base_app_queue_manager.redis_client", redis_client)
+    return redis_client
+
+
+@pytest.fixture
+def subscriber(mocker):
+    subscriber = TaskStopSubscriber()
+    mocker.patch.object(subscriber, "_ensure_started")
+    mocker.patch.object(TaskStopSubscriber, "is_subscribed", True)
+    mocker.patch("core.app.apps.base_app_queue_manager.task_stop_subscriber", subscriber)
+    return subscriber
+
+
+def _create_queue_manager() -> MessageBasedAppQueueManager:
+    return MessageBasedAppQueueManager(
+        task_id="task_id",
+        user_id="user_id",
+        invoke_from=InvokeFrom.WEB_APP,
+        conversation_id="conversation_id",
+        app_mode="chat",
+        message_id="message_id",
+    )
+
+
+def test_stop_flag_checked_once_per_interval(redis_client, subscriber):
+    queue_manager = _create_queue_manager()
+
+    for _ in range(100):
+        queue_manager.publish(QueueTextChunkEvent(text="chunk"), PublishFrom.APPLICATION_MANAGER)
+
+    assert redis_client.get.call_count == 1
+
+
+def test_set_stop_flag_publishes_stop_signal(redis_client):
+    redis_client.get.return_value = b"end-user-user_id"
+
+    AppQueueManager.set_stop_flag("task_id", InvokeFrom.WEB_APP, "user_id")
+
+    redis_client.setex.assert_called_once_with("generate_task_stopped:task_id", 600, 1)
+    redis_client.publish.assert_called_once_with("generate_task_stopped:task_id", 1)
+
+
+def test_stop_signal_wakes_up_listener(redis_client, subscriber):
+    queue_manager = _create_queue_manager()
+    listener = queue_manager.listen()
+    received = []
+
+    def listen():
+        for message in listener:
+            received.append(message.event)
+
+    # daemon, a listener never woken up does not keep the test run alive
+    thread = threading.Thread(target=listen, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while "task_id" not in subscriber._callbacks:
+        if time.monotonic() > deadline:
+            pytest.fail("listener did not subscribe to the stop signal of the task within 5s")
+        time.sleep(0.01)
+    subscriber._dispatch(b"generate_task_stopped:task_id")
+    thread.join(timeout=2)
+
+    assert not thread.is_alive()
+    assert isinstance(received[0], QueueStopEvent)
+    assert received[0].stopped_by == QueueStopEvent.StopBy.USER_MANUAL
+    assert "task_id" not in subscriber._callbacks
+
+
+def test_publish_skips_check_of_events_without_model_fields(redis_client, subscriber, mocker):
+    queue_manager = _create_queue_manager()
+    check_for_sqlalchemy_models = mocker.spy(queue_manager, "_check_for_sqlalchemy_models")
+
+    queue_manager.publish(QueueTextChunkEvent(text="chunk"), PublishFrom.TASK_PIPELINE)
+
+    check_for_sqlalchemy_models.assert_not_called()
+
+
+@pytest.mark.parametrize("deep_check_enabled", [False, True])
+def test_publish_rejects_sqlalchemy_models(redis_client, subscriber, mocker, deep_check_enabled):
+    dify_config = MagicMock(APP_QUEUE_EVENT_DEEP_CHECK_ENABLED=deep_check_enabled)
+    mocker.patch("core.app.apps.base_app_queue_manager.dify_config", dify_config)
+    queue_manager = _create_queue_manager()
+    model = type("Model", (), {"_sa_instance_state": None})()
+
+    with pytest.raises(TypeError):
+        queue_manager.publish(
+            QueueWorkflowSucceededEvent(outputs={"result": [{"model": model}]}), PublishFrom.TASK_PIPELINE
+        )
@@ -0,0 +1,51 @@
+import threading
+import time
+
+from core.helper.adaptive_concurrency import AdaptiveConcurrencyLimiter
+
+
+def test_limit_grows_after_a_window_of_fast_calls():
+    limiter = AdaptiveConcurrencyLimiter(max_limit=4, initial_limit=2)
+
+    for _ in range(2):
+        limiter.on_success(0.1)
+    assert limiter.limit == 3
+
+    for _ in range(20):
+        limiter.on_success(0.1)
+    assert limiter.limit == 4
+    assert limiter.peak_limit == 4
+
+
+def test_limit_shrinks_on_slow_calls_and_rate_limits():
+    limiter = AdaptiveConcurrencyLimiter(max_limit=16, initial_limit=8)
+
+    limiter.on_success(0.1)
+    limiter.on_success(1.0)
+    assert limiter.limit == 7
+
+    limiter.on_rate_limited()
+    assert limiter.limit == 3
+    limiter.on_rate_limited()
+    limiter.on_rate_limited()
+    assert limiter.limit == 1
+    assert limiter.rate_limited_count == 3
+
+
+def test_acquire_waits_for_a_slot():
+    limiter = AdaptiveConcurrencyLimiter(max_limit=2, initial_limit=1)
+    limiter.acquire()
+    acquired = threading.Event()
+
+    def acquire():
+        limiter.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=acquire)
+    thread.start()
+    time.sleep(0.05)
+    assert not acquired.is_set()
+
+    limiter.release()
+    thread.join(timeout=1)
+    assert acquired.is_set()
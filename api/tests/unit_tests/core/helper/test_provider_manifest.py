@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from core.helper.provider_manifest import ProviderManifest
+
+
+def _create_providers(path) -> None:
+    provider_path = path / "provider"
+    provider_path.mkdir()
+    (provider_path / "provider.yaml").write_text("provider: provider")
+    (provider_path / "__pycache__").mkdir()
+
+
+def test_manifest_is_loaded_when_up_to_date(tmp_path):
+    _create_providers(tmp_path)
+    ProviderManifest(str(tmp_path)).save({"provider": {"position": 0}})
+
+    # compiled files are not provider files
+    (tmp_path / "provider" / "__pycache__" / "provider.pyc").write_bytes(b"")
+
+    assert ProviderManifest(str(tmp_path)).load() == {"provider": {"position": 0}}
+
+
+def test_manifest_is_ignored_when_missing_or_outdated(tmp_path):
+    _create_providers(tmp_path)
+    assert ProviderManifest(str(tmp_path)).load() is None
+
+    ProviderManifest(str(tmp_path)).save({"provider": {"position": 0}})
+    (tmp_path / "provider" / "provider.yaml").write_text("provider: changed")
+    assert ProviderManifest(str(tmp_path)).load() is None
+
+    ProviderManifest(str(tmp_path)).save({"provider": {"position": 0}})
+    (tmp_path / "other").mkdir()
+    (tmp_path / "other" / "other.yaml").write_text("provider: other")
+    assert ProviderManifest(str(tmp_path)).load() is None
+
+
+def test_invalid_manifest_is_ignored(tmp_path):
+    _create_providers(tmp_path)
+    manifest = ProviderManifest(str(tmp_path))
+    Path(manifest.path).write_text("{")
+
+    assert manifest.load() is None
@@ -0,0 +1,14 @@
+from core.memory.token_buffer_memory import TokenBufferMemory
+
+
+def test_prompt_message_key_changes_with_the_text():
+    key = TokenBufferMemory._get_prompt_message_key("message-1", "answer", "Hello")
+
+    assert key == TokenBufferMemory._get_prompt_message_key("message-1", "answer", "Hello")
+    # the answer of a message is updated while it is generated
+    assert key != TokenBufferMemory._get_prompt_message_key("message-1", "answer", "Hello, world")
+    assert key != TokenBufferMemory._get_prompt_message_key("message-1", "answer", "Hallo")
+    assert key != TokenBufferMemory._get_prompt_message_key("message-1", "query", "Hello")
+    assert TokenBufferMemory._get_prompt_message_key("message-1", "answer", None) == (
+        TokenBufferMemory._get_prompt_message_key("message-1", "answer", "")
+    )
@@ -0,0 +1,67 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.model_runtime.model_providers.__base.tokenizers import gpt2_tokenzier
+from core.model_runtime.model_providers.__base.tokenizers.gpt2_tokenzier import (
+    GPT2Tokenizer,
+    GPT2TokenizerBackend,
+    TiktokenGPT2TokenizerBackend,
+    TransformersGPT2TokenizerBackend,
+)
+
+
+def _create_texts() -> list[str]:
+    rand = random.Random(0)
+    alphabet = "abcdefghij klmnop\n\t  's're'll ,.;!?中文字符日本語テキスト한국어 émoji😀🚀 12345 <|endoftext|>"
+    texts = ["".join(rand.choices(alphabet, k=rand.randint(0, 200))) for _ in range(300)]
+    return [*texts, "", " ", "<|endoftext|>", "Hello world, it's a  test.\n\n  indented\tcode()"]
+
+
+@pytest.fixture
+def restore_backend():
+    backend_classes = dict(gpt2_tokenzier._backend_classes)
+    backend_name = gpt2_tokenzier._backend_name
+    yield
+    gpt2_tokenzier._backend_classes.clear()
+    gpt2_tokenzier._backend_classes.update(backend_classes)
+    GPT2Tokenizer.set_backend(backend_name)
+
+
+def test_tiktoken_backend_encodes_like_transformers():
+    texts = _create_texts()
+
+    assert TiktokenGPT2TokenizerBackend().encode_batch(texts) == TransformersGPT2TokenizerBackend().encode_batch(texts)
+
+
+def test_get_num_tokens_batch():
+    texts = _create_texts()
+
+    assert GPT2Tokenizer.get_num_tokens_batch(texts) == [GPT2Tokenizer.get_num_tokens(text) for text in texts]
+    assert GPT2Tokenizer.get_num_tokens_batch([]) == []
+    assert GPT2Tokenizer.get_num_tokens("<|endoftext|>") == 1
+
+
+def test_get_num_tokens_from_threads():
+    texts = _create_texts()
+    expected = [GPT2Tokenizer.get_num_tokens(text) for text in texts]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert list(executor.map(GPT2Tokenizer.get_num_tokens, texts)) == expected
+
+
+def test_set_backend(restore_backend):
+    class CharacterBackend(GPT2TokenizerBackend):
+        def encode_batch(self, texts: list[str]) -> list[list[int]]:
+            return [[ord(c) for c in text] for text in texts]
+
+    GPT2Tokenizer.register_backend("characters", CharacterBackend)
+    GPT2Tokenizer.set_backend("characters")
+    GPT2Tokenizer.warm_up()
+
+    assert isinstance(GPT2Tokenizer.get_encoder(), CharacterBackend)
+    assert GPT2Tokenizer.get_num_tokens_batch(["hello", "world!"]) == [5, 6]
+
+    with pytest.raises(ValueError):
+        GPT2Tokenizer.set_backend("unknown")
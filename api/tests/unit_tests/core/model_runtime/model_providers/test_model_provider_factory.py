@@ -0,0 +1,62 @@
+import pytest
+
+from core.model_runtime.entities.model_entities import ModelType
+from core.model_runtime.model_providers.model_provider_factory import ModelProviderFactory
+
+PROVIDER_SCHEMA = {
+    "provider": "fake",
+    "label": {"en_US": "Fake"},
+    "supported_model_types": ["llm", "text-embedding"],
+    "configurate_methods": ["predefined-model"],
+    "models": [
+        {
+            "model": "fake-llm",
+            "label": {"en_US": "Fake LLM"},
+            "model_type": "llm",
+            "fetch_from": "predefined-model",
+            "model_properties": {"mode": "chat", "context_size": 4096},
+        },
+        {
+            "model": "fake-embedding",
+            "label": {"en_US": "Fake Embedding"},
+            "model_type": "text-embedding",
+            "fetch_from": "predefined-model",
+            "model_properties": {"context_size": 512},
+        },
+    ],
+}
+
+
+def test_providers_are_listed_from_manifest_without_loading_them(mocker):
+    factory = ModelProviderFactory()
+    mocker.patch.object(
+        factory.get_manifest(), "load", return_value={"fake": {"position": 0, "provider_schema": PROVIDER_SCHEMA}}
+    )
+    load_provider_instance = mocker.spy(factory, "_load_provider_instance")
+
+    providers = factory.get_providers()
+    models = factory.get_models(model_type=ModelType.TEXT_EMBEDDING)
+    provider_schema = factory.get_provider_schema("fake")
+
+    assert [provider.provider for provider in providers] == ["fake"]
+    assert [model.model for model in providers[0].models] == ["fake-llm", "fake-embedding"]
+    assert [model.model for model in models[0].models] == ["fake-embedding"]
+    assert provider_schema.label.en_US == "Fake"
+    assert provider_schema.models == []
+    assert factory.get_providers()[0].models == providers[0].models
+    load_provider_instance.assert_not_called()
+
+
+def test_provider_instance_is_loaded_on_demand(mocker):
+    factory = ModelProviderFactory()
+    mocker.patch.object(factory.get_manifest(), "load", return_value=None)
+    load_provider_instance = mocker.spy(factory, "_load_provider_instance")
+
+    provider_instance = factory.get_provider_instance("openai")
+
+    assert factory.get_provider_instance("openai") is provider_instance
+    assert factory.get_provider_schema("openai").provider == "openai"
+    load_provider_instance.assert_called_once_with("openai")
+
+    with pytest.raises(Exception, match="Invalid provider"):
+        factory.get_provider_instance("../openai")
@@ -0,0 +1,99 @@
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.model_runtime.entities.message_entities import AssistantPromptMessage, PromptMessage, UserPromptMessage
+from core.prompt.utils.prompt_message_token_counter import PromptMessageTokenCounter
+
+
+def _count_tokens(prompt_messages: list[PromptMessage]) -> int:
+    # words and 3 tokens per message, 3 tokens of reply priming per prompt
+    return sum(len(prompt_message.content.split()) + 3 for prompt_message in prompt_messages) + 3
+
+
+def _count_tokens_with_separators(prompt_messages: list[PromptMessage]) -> int:
+    # a count which is not the sum of the message counts
+    return len(" | ".join(prompt_message.content for prompt_message in prompt_messages).split())
+
+
+def _mock_model_instance(count_tokens) -> MagicMock:
+    model_instance = MagicMock()
+    model_instance.provider = "openai"
+    model_instance.model = str(uuid.uuid4())
+    model_instance.credentials = {}
+    model_instance.get_llm_num_tokens.side_effect = count_tokens
+    return model_instance
+
+
+def _create_history(count: int) -> list[PromptMessage]:
+    prompt_messages = []
+    for index in range(count):
+        prompt_messages.append(UserPromptMessage(content=" ".join(["query"] * (index % 7 + 1))))
+        prompt_messages.append(AssistantPromptMessage(content=" ".join(["answer"] * (index % 11 + 1))))
+    return prompt_messages
+
+
+def _legacy_prune(prompt_messages: list[PromptMessage], max_token_limit: int, count_tokens) -> list[PromptMessage]:
+    prompt_messages = list(prompt_messages)
+    while count_tokens(prompt_messages) > max_token_limit and len(prompt_messages) > 1:
+        prompt_messages.pop(0)
+    return prompt_messages
+
+
+@pytest.mark.parametrize("count_tokens", [_count_tokens, _count_tokens_with_separators])
+@pytest.mark.parametrize("max_token_limit", [0, 10, 100, 500, 100_000])
+def test_prune_keeps_the_same_messages_as_popping_them_one_by_one(count_tokens, max_token_limit):
+    prompt_messages = _create_history(100)
+    counter = PromptMessageTokenCounter(_mock_model_instance(count_tokens))
+
+    assert counter.prune(prompt_messages, max_token_limit) == _legacy_prune(
+        prompt_messages, max_token_limit, count_tokens
+    )
+
+
+def test_prune_counts_the_messages_once():
+    model_instance = _mock_model_instance(_count_tokens)
+    counter = PromptMessageTokenCounter(model_instance)
+    prompt_messages = _create_history(250)
+    keys = [f"message-{index}" for index in range(len(prompt_messages))]
+
+    pruned_messages = counter.prune(prompt_messages, 1000, keys=keys)
+    first_call_count = model_instance.get_llm_num_tokens.call_count
+
+    assert pruned_messages == _legacy_prune(prompt_messages, 1000, _count_tokens)
+    assert first_call_count <= len(prompt_messages) + 4
+
+    # the next turn of the conversation only counts the whole prompt, the new messages, the last pair and the cut
+    next_turn_messages = prompt_messages + _create_history(1)
+    counter.prune(next_turn_messages, 1000, keys=[*keys, "message-500", "message-501"])
+    assert model_instance.get_llm_num_tokens.call_count - first_call_count <= 6
+
+
+def test_prune_counts_histories_within_the_limit_once():
+    model_instance = _mock_model_instance(_count_tokens)
+    counter = PromptMessageTokenCounter(model_instance)
+    prompt_messages = _create_history(5)
+    keys = [f"message-{index}" for index in range(len(prompt_messages))]
+
+    assert counter.prune(prompt_messages, 100_000, keys=keys) == prompt_messages
+    assert counter.prune(prompt_messages, 100_000, keys=keys) == prompt_messages
+    model_instance.get_llm_num_tokens.assert_called_once_with(prompt_messages)
+
+
+def test_prune_empty_history():
+    model_instance = _mock_model_instance(_count_tokens)
+
+    assert PromptMessageTokenCounter(model_instance).prune([], 100) == []
+    model_instance.get_llm_num_tokens.assert_not_called()
+
+
+def test_num_tokens_are_cached_per_model():
+    prompt_messages = [UserPromptMessage(content="hello world")]
+    model_instance = _mock_model_instance(_count_tokens)
+    other_model_instance = _mock_model_instance(lambda prompt_messages: 42)
+
+    assert PromptMessageTokenCounter(model_instance).get_num_tokens(prompt_messages) == 8
+    assert PromptMessageTokenCounter(model_instance).get_num_tokens(prompt_messages) == 8
+    assert PromptMessageTokenCounter(other_model_instance).get_num_tokens(prompt_messages) == 42
+    assert model_instance.get_llm_num_tokens.call_count == 1
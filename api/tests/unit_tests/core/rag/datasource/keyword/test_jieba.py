@@ -0,0 +1,35 @@
+from typing import Optional
+from unittest.mock import MagicMock
+
+from core.rag.datasource.keyword.jieba import jieba as jieba_module
+from core.rag.datasource.keyword.jieba.jieba import Jieba
+
+
+class FakeRedis:
+    def __init__(self):
+        self._data = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._data.get(key)
+
+    def set(self, key: str, value: str, nx: bool = False) -> None:
+        if nx and key in self._data:
+            return
+        self._data[key] = value.encode()
+
+
+def test_cached_keyword_table_invalidated_by_version(mocker):
+    mocker.patch.object(jieba_module, "redis_client", FakeRedis())
+    jieba_module._keyword_table_cache.clear()
+
+    jieba = Jieba(dataset=MagicMock(id="dataset_id"))
+    load_keyword_table = mocker.patch.object(jieba, "_get_dataset_keyword_table", return_value={"a": {"node-1"}})
+
+    assert jieba._get_cached_dataset_keyword_table() == {"a": {"node-1"}}
+    assert jieba._get_cached_dataset_keyword_table() == {"a": {"node-1"}}
+    assert load_keyword_table.call_count == 1
+
+    jieba._bump_keyword_table_version()
+    load_keyword_table.return_value = {"b": {"node-2"}}
+    assert jieba._get_cached_dataset_keyword_table() == {"b": {"node-2"}}
+    assert load_keyword_table.call_count == 2
@@ -0,0 +1,11 @@
+import pytest
+
+from core.rag.datasource.vdb.analyticdb.analyticdb_vector import AnalyticdbVector
+
+
+def test_get_existing_ids_rejects_ids_other_than_uuids():
+    vector = AnalyticdbVector.__new__(AnalyticdbVector)
+
+    assert vector.get_existing_ids([]) == set()
+    with pytest.raises(ValueError, match="a uuid is expected"):
+        vector.get_existing_ids(["e4b1d7c2-3f7a-4f38-9e0b-6f1f8a0d2c55", "x') OR ('1'='1"])
@@ -0,0 +1,81 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from core.rag.datasource.vdb import connection_pool
+from core.rag.datasource.vdb.connection_pool import ConnectionPoolRegistry, create_pooled_engine
+
+
+class _Config(BaseModel):
+    host: str
+    password: str
+
+
+def test_pool_is_created_once_per_config():
+    registry = ConnectionPoolRegistry()
+    factory = MagicMock(side_effect=lambda: object())
+
+    threads = [
+        threading.Thread(target=registry.get_or_create, args=("pgvector", _Config(host="a", password="p"), factory))
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    pool = registry.get_or_create("pgvector", _Config(host="a", password="p"), factory)
+    other_pool = registry.get_or_create("pgvector", _Config(host="b", password="p"), factory)
+
+    assert factory.call_count == 2
+    assert pool is not other_pool
+    assert registry.get_stats()["pgvector"]["pools"] == 2
+
+
+def test_pools_are_not_shared_with_forked_processes(mocker):
+    registry = ConnectionPoolRegistry()
+    config = _Config(host="a", password="p")
+    pool = registry.get_or_create("pgvector", config, object)
+
+    mocker.patch("core.rag.datasource.vdb.connection_pool.os.getpid", return_value=-1)
+
+    assert registry.get_or_create("pgvector", config, object) is not pool
+
+
+def test_checkout_wait_is_recorded():
+    registry = ConnectionPoolRegistry()
+
+    with registry.checkout("oracle"):
+        pass
+    with pytest.raises(TimeoutError), registry.checkout("oracle"):
+        raise TimeoutError()
+
+    stats = registry.get_stats()["oracle"]
+    assert stats["checkouts"] == 2
+    assert stats["failed"] == 1
+    assert stats["wait_seconds"] >= 0
+
+
+def test_pooled_engine_records_checkouts_and_times_out(mocker, tmp_path):
+    registry = ConnectionPoolRegistry()
+    mocker.patch.object(connection_pool, "connection_pool_registry", registry)
+    mocker.patch.object(
+        connection_pool,
+        "dify_config",
+        MagicMock(VECTOR_STORE_CONNECTION_POOL_SIZE=1, VECTOR_STORE_CONNECTION_POOL_TIMEOUT=0.1),
+    )
+    engine = create_pooled_engine("relyt", f"sqlite:///{tmp_path}/vector.db")
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+        with pytest.raises(PoolTimeoutError), engine.connect():
+            pass
+
+    stats = registry.get_stats()["relyt"]
+    assert stats["checkouts"] == 2
+    assert stats["failed"] == 1
+    assert stats["max_wait_seconds"] >= 0.1
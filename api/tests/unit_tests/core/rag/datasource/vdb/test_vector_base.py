@@ -0,0 +1,70 @@
+from typing import Any
+
+from core.rag.datasource.vdb import vector_base
+from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.models.document import Document
+
+
+class _FakeVector(BaseVector):
+    def __init__(self, existing_ids: set[str]):
+        super().__init__("collection")
+        self.existing_ids = existing_ids
+        self.text_exists_calls = 0
+
+    def get_type(self) -> str:
+        return "fake"
+
+    def create(self, texts: list[Document], embeddings: list[list[float]], **kwargs):
+        pass
+
+    def add_texts(self, documents: list[Document], embeddings: list[list[float]], **kwargs):
+        pass
+
+    def text_exists(self, id: str) -> bool:
+        self.text_exists_calls += 1
+        return id in self.existing_ids
+
+    def delete_by_ids(self, ids: list[str]) -> None:
+        pass
+
+    def delete_by_metadata_field(self, key: str, value: str) -> None:
+        pass
+
+    def search_by_vector(self, query_vector: list[float], **kwargs: Any) -> list[Document]:
+        return []
+
+    def search_by_full_text(self, query: str, **kwargs: Any) -> list[Document]:
+        return []
+
+    def delete(self) -> None:
+        pass
+
+
+def _documents(count: int) -> list[Document]:
+    return [Document(page_content=f"text {i}", metadata={"doc_id": f"doc-{i}"}) for i in range(count)]
+
+
+def test_existing_ids_default_to_text_exists():
+    vector = _FakeVector(existing_ids={"doc-1", "doc-3"})
+
+    assert vector.get_existing_ids(["doc-0", "doc-1", "doc-3"]) == {"doc-1", "doc-3"}
+    assert vector.text_exists_calls == 3
+
+
+def test_duplicate_texts_are_filtered_in_batches(mocker):
+    mocker.patch.object(vector_base, "EXISTING_IDS_BATCH_SIZE", 4)
+    vector = _FakeVector(existing_ids={"doc-1", "doc-5", "doc-9"})
+    get_existing_ids_spy = mocker.spy(vector, "get_existing_ids")
+
+    texts = vector._filter_duplicate_texts(_documents(10))
+
+    assert [text.metadata["doc_id"] for text in texts] == [
+        "doc-0",
+        "doc-2",
+        "doc-3",
+        "doc-4",
+        "doc-6",
+        "doc-7",
+        "doc-8",
+    ]
+    assert [len(call.args[0]) for call in get_existing_ids_spy.call_args_list] == [4, 4, 2]
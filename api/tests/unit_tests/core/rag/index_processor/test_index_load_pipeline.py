@@ -0,0 +1,179 @@
+import threading
+
+import pytest
+from flask import Flask
+
+from core.model_runtime.errors.invoke import InvokeRateLimitError
+from core.rag.index_processor.index_load_pipeline import IndexLoadPipeline
+from core.rag.models.document import Document
+
+
+def _create_documents(count: int) -> list[Document]:
+    return [Document(page_content=f"content {i}", metadata={"doc_id": str(i)}) for i in range(count)]
+
+
+def _embed(documents: list[Document]) -> tuple[list[list[float]], int]:
+    return [[float(document.metadata["doc_id"])] for document in documents], len(documents) * 2
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.written: dict[str, list[float]] = {}
+        self.completed: list[str] = []
+        self._lock = threading.Lock()
+
+    def write(self, documents: list[Document], embeddings: list[list[float]]) -> None:
+        with self._lock:
+            self.written.update(
+                {document.metadata["doc_id"]: embedding for document, embedding in zip(documents, embeddings)}
+            )
+
+    def complete(self, documents: list[Document]) -> None:
+        with self._lock:
+            self.completed.extend(document.metadata["doc_id"] for document in documents)
+
+
+def _create_pipeline(embed=_embed, recorder=None, **kwargs) -> IndexLoadPipeline:
+    recorder = recorder or _Recorder()
+    kwargs = {"batch_size": 4, "max_concurrency": 4, "retry_backoff": 0, **kwargs}
+    return IndexLoadPipeline(
+        flask_app=Flask(__name__), embed=embed, write=recorder.write, complete=recorder.complete, **kwargs
+    )
+
+
+def test_run_loads_all_documents():
+    recorder = _Recorder()
+    documents = _create_documents(42)
+    pipeline = _create_pipeline(recorder=recorder)
+
+    assert pipeline.run(documents) == 84
+    assert recorder.written == {str(i): [float(i)] for i in range(42)}
+    assert sorted(recorder.completed, key=int) == [str(i) for i in range(42)]
+
+    stats = pipeline.get_stats()
+    assert stats["batch_size"] == 4
+    assert stats["rate_limited"] == 0
+    assert stats["stages"]["embedding"]["documents"] == 42
+    assert stats["stages"]["embedding"]["tokens"] == 84
+    assert stats["stages"]["vector_store"]["documents"] == 42
+    assert stats["stages"]["segment_status"]["documents"] == 42
+
+
+def test_stages_overlap():
+    # the first batch can only be written once the last one is embedded, which needs the stages to overlap
+    last_batch_embedded = threading.Event()
+    recorder = _Recorder()
+    documents = _create_documents(4)
+
+    def embed(batch):
+        if batch[-1] is documents[-1]:
+            last_batch_embedded.set()
+        return _embed(batch)
+
+    def write(batch, embeddings):
+        assert last_batch_embedded.wait(timeout=5)
+        recorder.write(batch, embeddings)
+
+    pipeline = IndexLoadPipeline(
+        flask_app=Flask(__name__),
+        embed=embed,
+        write=write,
+        complete=recorder.complete,
+        batch_size=1,
+        max_concurrency=2,
+    )
+    pipeline.run(documents)
+
+    assert len(recorder.written) == 4
+
+
+def test_rate_limited_batches_are_retried_with_less_concurrency():
+    calls = {"count": 0}
+    lock = threading.Lock()
+
+    def embed(batch):
+        with lock:
+            calls["count"] += 1
+            rate_limited = calls["count"] <= 2
+        if rate_limited:
+            raise InvokeRateLimitError("rate limited")
+        return _embed(batch)
+
+    recorder = _Recorder()
+    pipeline = _create_pipeline(embed=embed, recorder=recorder, max_concurrency=8)
+    pipeline.run(_create_documents(20))
+
+    stats = pipeline.get_stats()
+    assert len(recorder.written) == 20
+    assert stats["rate_limited"] == 2
+
+
+def test_rate_limit_error_is_raised_after_max_retries():
+    def embed(batch):
+        raise InvokeRateLimitError("rate limited")
+
+    recorder = _Recorder()
+    with pytest.raises(InvokeRateLimitError):
+        _create_pipeline(embed=embed, recorder=recorder, max_retries=2).run(_create_documents(20))
+
+    assert recorder.written == {}
+
+
+def test_stage_error_stops_the_pipeline():
+    def write(batch, embeddings):
+        raise ValueError("vector store is down")
+
+    embedded = []
+
+    def embed(batch):
+        embedded.extend(batch)
+        return _embed(batch)
+
+    pipeline = IndexLoadPipeline(
+        flask_app=Flask(__name__),
+        embed=embed,
+        write=write,
+        complete=lambda documents: None,
+        batch_size=1,
+        max_concurrency=2,
+    )
+    with pytest.raises(ValueError, match="vector store is down"):
+        pipeline.run(_create_documents(200))
+
+    assert len(embedded) < 200
+
+
+def test_before_batch_error_is_raised():
+    class PausedError(Exception):
+        pass
+
+    def before_batch():
+        raise PausedError()
+
+    with pytest.raises(PausedError):
+        _create_pipeline(before_batch=before_batch).run(_create_documents(8))
+
+
+def test_written_batches_are_completed_when_stopped():
+    class PausedError(Exception):
+        pass
+
+    recorder = _Recorder()
+    calls = {"count": 0}
+
+    def before_batch():
+        calls["count"] += 1
+        if calls["count"] > 2:
+            # pause once the first batches are written, they must still be marked completed
+            for _ in range(500):
+                if len(recorder.written) >= 2:
+                    break
+                threading.Event().wait(0.01)
+            raise PausedError()
+
+    pipeline = _create_pipeline(recorder=recorder, batch_size=1, max_concurrency=1, before_batch=before_batch)
+    with pytest.raises(PausedError):
+        pipeline.run(_create_documents(8))
+
+    assert len(recorder.written) >= 2
+    assert sorted(recorder.completed) == sorted(recorder.written)
@@ -0,0 +1,165 @@
+import pytest
+
+from core.rag.index_processor import indexing_checkpoint
+from core.rag.index_processor.indexing_checkpoint import IndexingCheckpoint
+from core.rag.models.document import Document
+
+
+class _Storage:
+    def __init__(self) -> None:
+        self.files: dict[str, bytes] = {}
+
+    def save(self, filename: str, data: bytes) -> None:
+        self.files[filename] = data
+
+    def load_once(self, filename: str) -> bytes:
+        return self.files[filename]
+
+    def exists(self, filename: str) -> bool:
+        return filename in self.files
+
+    def delete(self, filename: str) -> None:
+        self.files.pop(filename, None)
+
+
+class _Redis:
+    def __init__(self) -> None:
+        self.sets: dict[str, set[bytes]] = {}
+        self.sorted_sets: dict[str, dict[bytes, float]] = {}
+
+    def sadd(self, name: str, *values: str) -> None:
+        self.sets.setdefault(name, set()).update(value.encode() for value in values)
+
+    def smembers(self, name: str) -> set[bytes]:
+        return set(self.sets.get(name, set()))
+
+    def expire(self, name: str, seconds: int) -> None:
+        pass
+
+    def delete(self, name: str) -> None:
+        self.sets.pop(name, None)
+
+    def zadd(self, name: str, mapping: dict[str, float]) -> None:
+        self.sorted_sets.setdefault(name, {}).update({key.encode(): score for key, score in mapping.items()})
+
+    def zrem(self, name: str, *values: str) -> None:
+        for value in values:
+            self.sorted_sets.get(name, {}).pop(value.encode(), None)
+
+    def zrangebyscore(self, name: str, min: str, max: float, start: int, num: int) -> list[bytes]:
+        scores = self.sorted_sets.get(name, {})
+        return sorted((key for key, score in scores.items() if score <= max), key=scores.get)[start : start + num]
+
+
+@pytest.fixture
+def storage(monkeypatch) -> _Storage:
+    storage = _Storage()
+    monkeypatch.setattr(indexing_checkpoint, "storage", storage)
+    monkeypatch.setattr(indexing_checkpoint, "redis_client", _Redis())
+    return storage
+
+
+def _create_documents() -> list[Document]:
+    return [
+        Document(page_content="第一段", metadata={"doc_id": "1", "source": "a.txt"}),
+        Document(page_content="second", metadata={"doc_id": "2", "source": "a.txt"}),
+    ]
+
+
+def test_save_and_load(storage):
+    documents = _create_documents()
+    IndexingCheckpoint("tenant", "document").save("extract", "file-hash", {"mode": "automatic"}, documents)
+
+    loaded = IndexingCheckpoint("tenant", "document").load("extract", "file-hash", {"mode": "automatic"})
+    assert [(d.page_content, d.metadata) for d in loaded] == [(d.page_content, d.metadata) for d in documents]
+
+
+def test_load_misses_other_settings_and_tenants(storage):
+    IndexingCheckpoint("tenant", "document").save("extract", "file-hash", {"mode": "automatic"}, _create_documents())
+
+    assert IndexingCheckpoint("tenant", "document").load("extract", "file-hash", {"mode": "custom"}) is None
+    assert IndexingCheckpoint("tenant", "document").load("split", "file-hash", {"mode": "automatic"}) is None
+    assert IndexingCheckpoint("other", "document").load("extract", "file-hash", {"mode": "automatic"}) is None
+
+
+def test_clear_deletes_the_checkpoints_of_the_document(storage):
+    IndexingCheckpoint("tenant", "other-document").save("extract", "other-hash", {}, _create_documents())
+    # left by a former run of the document
+    IndexingCheckpoint("tenant", "document").save("extract", "old-hash", {}, _create_documents())
+    checkpoint = IndexingCheckpoint("tenant", "document")
+    checkpoint.save("extract", "file-hash", {}, _create_documents())
+    checkpoint.load("split", "file-hash", {})
+
+    checkpoint.clear()
+    assert len(storage.files) == 1
+    assert IndexingCheckpoint("tenant", "other-document").load("extract", "other-hash", {}) is not None
+
+
+def test_delete_document_checkpoints(storage):
+    IndexingCheckpoint("tenant", "document").save("extract", "file-hash", {}, _create_documents())
+    # a checkpoint shared with another document is registered by both
+    IndexingCheckpoint("tenant", "other-document").load("extract", "file-hash", {})
+    IndexingCheckpoint("tenant", "other-document").save("extract", "other-hash", {}, _create_documents())
+
+    IndexingCheckpoint.delete_document_checkpoints("document")
+    assert IndexingCheckpoint("tenant", "document").load("extract", "file-hash", {}) is None
+    assert IndexingCheckpoint("tenant", "other-document").load("extract", "other-hash", {}) is not None
+
+    IndexingCheckpoint.delete_document_checkpoints("other-document")
+    assert storage.files == {}
+
+
+def test_delete_expired_checkpoints(storage, mocker):
+    mocker.patch.object(indexing_checkpoint.time, "time", return_value=1000.0)
+    for i in range(5):
+        IndexingCheckpoint("tenant", f"document-{i}").save("extract", f"expired-hash-{i}", {}, _create_documents())
+    mocker.patch.object(indexing_checkpoint.time, "time", return_value=2000.0)
+    IndexingCheckpoint("tenant", "document").save("extract", "file-hash", {}, _create_documents())
+    # used again since, kept
+    IndexingCheckpoint("tenant", "document-0").load("extract", "expired-hash-0", {})
+
+    assert IndexingCheckpoint.delete_expired_checkpoints(1500.0, batch_size=2) == 4
+    assert len(storage.files) == 2
+    assert IndexingCheckpoint("tenant", "document-0").load("extract", "expired-hash-0", {}) is not None
+
+
+def test_disabled_or_unhashed_checkpoints_are_skipped(storage):
+    IndexingCheckpoint("tenant", "document", enabled=False).save("extract", "file-hash", {}, _create_documents())
+    IndexingCheckpoint("tenant", "document").save("extract", None, {}, _create_documents())
+    assert storage.files == {}
+
+    IndexingCheckpoint("tenant", "document").save("extract", "file-hash", {}, _create_documents())
+    assert IndexingCheckpoint("tenant", "document", enabled=False).load("extract", "file-hash", {}) is None
+
+
+def test_storage_and_redis_errors_do_not_fail(storage, monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError("storage is down")
+
+    monkeypatch.setattr(storage, "save", fail)
+    IndexingCheckpoint("tenant", "document").save("extract", "file-hash", {}, _create_documents())
+
+    monkeypatch.setattr(indexing_checkpoint.redis_client, "smembers", fail)
+    monkeypatch.setattr(indexing_checkpoint.redis_client, "zrem", fail)
+    IndexingCheckpoint("tenant", "document").clear()
+    IndexingCheckpoint.delete_document_checkpoints("document")
+
+    storage.files["indexing_checkpoints/broken"] = b"not gzip"
+    monkeypatch.setattr(IndexingCheckpoint, "_get_path", lambda *args: "indexing_checkpoints/broken")
+    assert IndexingCheckpoint("tenant", "document").load("extract", "file-hash", {}) is None
+
+
+def test_checkpoints_are_not_saved_when_they_can_not_be_registered(storage, monkeypatch):
+    def fail(*args, **kwargs):
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(indexing_checkpoint.redis_client, "zadd", fail)
+    IndexingCheckpoint("tenant", "document").save("extract", "file-hash", {}, _create_documents())
+
+    assert storage.files == {}
+
+
+def test_hash_documents():
+    documents = _create_documents()
+    assert IndexingCheckpoint.hash_documents(documents) == IndexingCheckpoint.hash_documents(_create_documents())
+    assert IndexingCheckpoint.hash_documents(documents) != IndexingCheckpoint.hash_documents(documents[:1])
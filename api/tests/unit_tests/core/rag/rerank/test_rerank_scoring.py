@@ -0,0 +1,40 @@
+import math
+
+import pytest
+
+from core.rag.rerank.rerank_scoring import bm25_scores, keyword_scores, tfidf_cosine_scores, vector_cosine_scores
+
+
+def test_tfidf_cosine_scores():
+    documents_keywords = [{"apple", "banana"}, {"apple"}, {"cherry"}, set()]
+    scores = tfidf_cosine_scores({"apple", "durian"}, documents_keywords)
+
+    idf_apple = math.log(5 / 3) + 1
+    idf_banana = math.log(5 / 2) + 1
+    assert scores[0] == pytest.approx(idf_apple / math.sqrt(idf_apple**2 + idf_banana**2))
+    assert scores[1] == pytest.approx(1.0)
+    assert scores[2] == 0.0
+    assert scores[3] == 0.0
+
+
+def test_bm25_scores_are_normalized():
+    documents_keywords = [["apple", "banana", "cherry"], ["apple"], ["cherry"]]
+    scores = bm25_scores(["apple"], documents_keywords)
+
+    assert max(scores) == pytest.approx(1.0)
+    # the shorter document matching the keyword ranks first
+    assert scores[1] > scores[0] > scores[2] == 0.0
+
+
+def test_keyword_scores_without_documents():
+    assert keyword_scores({"apple"}, [], method="tfidf") == []
+    assert keyword_scores({"apple"}, [], method="bm25") == []
+    with pytest.raises(ValueError):
+        keyword_scores({"apple"}, [{"apple"}], method="unknown")
+
+
+def test_vector_cosine_scores():
+    scores = vector_cosine_scores([1.0, 0.0], [[2.0, 0.0], [0.0, 1.0], [1.0, 1.0], [0.0, 0.0]])
+
+    assert scores == pytest.approx([1.0, 0.0, math.sqrt(0.5), 0.0])
+    assert vector_cosine_scores([1.0, 0.0], []) == []
@@ -0,0 +1,33 @@
+from unittest.mock import MagicMock
+
+import pytest
+from pydantic import ValidationError
+
+from core.rag.models.document import Document
+from core.rag.rerank import weight_rerank
+from core.rag.rerank.entity.weight import KeywordSetting
+from core.rag.rerank.weight_rerank import WeightRerankRunner
+
+
+def test_documents_keywords_reuse_segment_keywords_and_cache(mocker):
+    weight_rerank._document_keywords_cache.clear()
+    runner = WeightRerankRunner(tenant_id="tenant_id", weights=MagicMock())
+    mocker.patch.object(runner, "_get_segments_keywords", return_value={"node-1": {"stored"}})
+    extract_keywords = mocker.patch(
+        "core.rag.rerank.weight_rerank.JiebaKeywordTableHandler.extract_keywords", return_value={"extracted"}
+    )
+    documents = [
+        Document(page_content="first", metadata={"doc_id": "node-1", "dataset_id": "dataset_id"}),
+        Document(page_content="second", metadata={"doc_id": "node-2", "dataset_id": "dataset_id"}),
+    ]
+
+    assert runner._get_documents_keywords(documents) == [{"stored"}, {"extracted"}]
+    assert runner._get_documents_keywords(documents) == [{"stored"}, {"extracted"}]
+    extract_keywords.assert_called_once_with("second", 10)
+
+
+def test_keyword_scoring_method_is_validated():
+    assert KeywordSetting(keyword_weight=0.3).keyword_scoring_method == "tfidf"
+    assert KeywordSetting(keyword_weight=0.3, keyword_scoring_method="bm25").keyword_scoring_method == "bm25"
+    with pytest.raises(ValidationError):
+        KeywordSetting(keyword_weight=0.3, keyword_scoring_method="bm2")
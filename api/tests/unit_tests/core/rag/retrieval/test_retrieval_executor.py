@@ -0,0 +1,28 @@
+import threading
+
+from core.rag.retrieval.retrieval_executor import RetrievalExecutor
+
+
+def test_run_returns_futures_in_task_order():
+    executor = RetrievalExecutor("test_retrieval", max_workers=2)
+
+    futures = executor.run([lambda i=i: i * 2 for i in range(5)], timeout=5)
+
+    assert [future.result() for future in futures] == [0, 2, 4, 6, 8]
+    stats = executor.get_stats()
+    assert stats["submitted"] == 5
+    assert stats["completed"] == 5
+    assert stats["timed_out"] == 0
+
+
+def test_run_cancels_queued_tasks_at_deadline():
+    executor = RetrievalExecutor("test_retrieval", max_workers=1)
+    release = threading.Event()
+
+    futures = executor.run([lambda: release.wait(5), lambda: "queued"], timeout=0.05)
+    release.set()
+
+    assert futures[1].cancelled()
+    stats = executor.get_stats()
+    assert stats["timed_out"] == 2
+    assert stats["cancelled"] == 1
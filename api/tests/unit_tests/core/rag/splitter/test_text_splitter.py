@@ -0,0 +1,54 @@
+from unittest.mock import MagicMock
+
+from core.rag.splitter.fixed_text_splitter import FixedRecursiveCharacterTextSplitter
+
+TEXT = "\n\n".join(
+    "\n".join(" ".join(f"word{(paragraph + line + word) % 13}" for word in range(line + 3)) for line in range(8))
+    for paragraph in range(20)
+)
+
+
+def _length_function(text: str) -> int:
+    return len(text.split())
+
+
+def _create_splitter(**kwargs) -> FixedRecursiveCharacterTextSplitter:
+    return FixedRecursiveCharacterTextSplitter(
+        chunk_size=20, chunk_overlap=5, fixed_separator="\n\n", separators=["\n", " ", ""], **kwargs
+    )
+
+
+def test_batch_length_function_splits_like_length_function():
+    length_function = MagicMock(side_effect=_length_function)
+    batch_length_function = MagicMock(side_effect=lambda texts: [_length_function(text) for text in texts])
+
+    chunks = _create_splitter(length_function=length_function).split_text(TEXT)
+    batched_chunks = _create_splitter(
+        length_function=_length_function, batch_length_function=batch_length_function
+    ).split_text(TEXT)
+
+    assert batched_chunks == chunks
+    assert len(chunks) > 20
+    # the splits of a text are measured together, each distinct fragment once
+    measured_texts = [text for call in batch_length_function.call_args_list for text in call.args[0]]
+    assert len(measured_texts) == len(set(measured_texts))
+    assert batch_length_function.call_count < length_function.call_count
+
+
+def test_from_encoder_measures_splits_in_batches():
+    model_instance = MagicMock()
+    model_instance.get_text_embedding_num_tokens_per_text.side_effect = lambda texts: [
+        _length_function(text) for text in texts
+    ]
+    splitter = FixedRecursiveCharacterTextSplitter.from_encoder(
+        embedding_model_instance=model_instance,
+        chunk_size=20,
+        chunk_overlap=5,
+        fixed_separator="\n\n",
+        separators=["\n", " ", ""],
+    )
+
+    assert splitter.split_text(TEXT) == _create_splitter(length_function=_length_function).split_text(TEXT)
+    model_instance.get_text_embedding_num_tokens.assert_not_called()
+    for call in model_instance.get_text_embedding_num_tokens_per_text.call_args_list:
+        assert "" not in call.kwargs["texts"]
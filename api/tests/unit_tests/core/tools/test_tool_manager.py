@@ -0,0 +1,36 @@
+from core.tools.entities.common_entities import I18nObject
+from core.tools.tool_manager import ToolManager
+
+
+def _reset_builtin_providers(mocker, manifest=None):
+    mocker.patch.object(ToolManager, "_builtin_providers", {})
+    mocker.patch.object(ToolManager, "_builtin_providers_loaded", False)
+    mocker.patch.object(ToolManager, "_builtin_provider_names", None)
+    mocker.patch.object(ToolManager, "_builtin_tools_labels", {})
+    mocker.patch.object(ToolManager, "_builtin_tools_labels_loaded", False)
+    mocker.patch.object(ToolManager.get_builtin_providers_manifest(), "load", return_value=manifest)
+
+
+def test_builtin_provider_is_loaded_on_demand(mocker):
+    _reset_builtin_providers(mocker)
+
+    provider = ToolManager.get_builtin_provider("time")
+
+    assert provider.identity.name == "time"
+    assert list(ToolManager._builtin_providers) == ["time"]
+    assert ToolManager.get_builtin_provider("time") is provider
+    assert ToolManager.get_builtin_provider_icon("time")[0].endswith("time/_assets/icon.svg")
+
+
+def test_builtin_tool_label_and_icon_are_read_from_manifest(mocker):
+    _reset_builtin_providers(
+        mocker,
+        manifest={
+            "time": {"icon": "icon.svg", "tool_labels": {"current_time": {"en_US": "Current Time", "zh_Hans": "时间"}}}
+        },
+    )
+
+    assert ToolManager.get_tool_label("current_time") == I18nObject(en_US="Current Time", zh_Hans="时间")
+    assert ToolManager.get_tool_label("unknown") is None
+    assert ToolManager.get_builtin_provider_icon("time")[1] == "image/svg+xml"
+    assert ToolManager._builtin_providers == {}
@@ -0,0 +1,136 @@
+from core.app.segments import ArrayAnySegment, factory
+from core.workflow.entities.variable_pool import MAX_LAYER_DEPTH, VariablePool
+from core.workflow.enums import SystemVariableKey
+
+
+def _create_variable_pool() -> VariablePool:
+    variable_pool = VariablePool(
+        system_variables={SystemVariableKey.USER_ID: "user-id"},
+        user_inputs={},
+        environment_variables=[],
+    )
+    variable_pool.add(["node", "output"], "parent")
+    return variable_pool
+
+
+def test_fork_shares_variables():
+    variable_pool = _create_variable_pool()
+
+    forked_pool = variable_pool.fork()
+
+    assert forked_pool.get(["node", "output"]) is variable_pool.get(["node", "output"])
+    assert forked_pool.get(["sys", "user_id"]).value == "user-id"
+
+
+def test_fork_is_isolated_from_parent():
+    variable_pool = _create_variable_pool()
+    forked_pool = variable_pool.fork()
+
+    forked_pool.add(["node", "output"], "fork")
+    forked_pool.add(["node", "other"], "fork")
+    forked_pool.add(["another_node", "output"], "fork")
+    forked_pool.remove(["sys", "user_id"])
+
+    assert variable_pool.get(["node", "output"]).value == "parent"
+    assert variable_pool.get(["node", "other"]) is None
+    assert variable_pool.get(["another_node", "output"]) is None
+    assert variable_pool.get(["sys", "user_id"]).value == "user-id"
+
+
+def test_parent_is_isolated_from_fork():
+    variable_pool = _create_variable_pool()
+    forked_pool = variable_pool.fork()
+
+    variable_pool.add(["node", "output"], "changed")
+    variable_pool.remove_node("sys")
+
+    assert forked_pool.get(["node", "output"]).value == "parent"
+    assert forked_pool.get(["sys", "user_id"]).value == "user-id"
+
+
+def test_fork_takes_constant_time_and_does_not_copy_variables():
+    variable_pool = _create_variable_pool()
+
+    forked_pool = variable_pool.fork()
+    forked_again_pool = variable_pool.fork()
+
+    # the variables of the parent are frozen once, forks without changes in between share the same layers
+    assert forked_pool.variable_layers._frozen_layers == forked_again_pool.variable_layers._frozen_layers
+    assert forked_pool.variable_layers._frozen_layers[0] is variable_pool.variable_layers._frozen_layers[0]
+    assert variable_pool.variable_layers._layer == {}
+
+
+def test_forks_of_forks_are_isolated():
+    variable_pool = _create_variable_pool()
+    forked_pool = variable_pool.fork()
+    forked_pool.add(["node", "output"], "fork")
+    forked_forked_pool = forked_pool.fork()
+
+    forked_forked_pool.remove_node("node")
+    forked_pool.add(["node", "other"], "fork")
+
+    assert forked_forked_pool.get(["node", "output"]) is None
+    assert forked_forked_pool.get(["node", "other"]) is None
+    assert forked_pool.get(["node", "output"]).value == "fork"
+    assert variable_pool.get(["node", "output"]).value == "parent"
+
+    forked_forked_pool.add(["node", "other"], "fork of fork")
+    assert forked_forked_pool.get(["node", "other"]).value == "fork of fork"
+    assert forked_forked_pool.get(["node", "output"]) is None
+
+
+def test_layers_are_merged_past_max_depth():
+    variable_pool = _create_variable_pool()
+    for index in range(MAX_LAYER_DEPTH + 1):
+        variable_pool.add(["node", str(index)], index)
+        variable_pool.fork()
+    variable_pool.remove(["node", "0"])
+    variable_pool.fork()
+
+    assert len(variable_pool.variable_layers._frozen_layers) <= MAX_LAYER_DEPTH
+    assert variable_pool.get(["node", "0"]) is None
+    assert variable_pool.get(["node", str(MAX_LAYER_DEPTH)]).value == MAX_LAYER_DEPTH
+    assert variable_pool.get(["node", "output"]).value == "parent"
+
+
+def test_large_values_are_built_into_segments_on_first_read(mocker):
+    variable_pool = _create_variable_pool()
+    build_segment_spy = mocker.spy(factory, "build_segment")
+
+    variable_pool.add(["node", "items"], list(range(1000)))
+    forked_pool = variable_pool.fork()
+    assert build_segment_spy.call_count == 0
+
+    segment = forked_pool.get(["node", "items"])
+
+    assert isinstance(segment, ArrayAnySegment)
+    assert segment.value == list(range(1000))
+    assert variable_pool.get(["node", "items"]) is segment
+    assert build_segment_spy.call_count == 1
+
+
+def test_added_values_are_not_changed_by_the_caller():
+    variable_pool = _create_variable_pool()
+    items = [1, 2]
+    outputs = {"text": "parent"}
+
+    variable_pool.add(["node", "items"], items)
+    variable_pool.add(["node", "outputs"], outputs)
+    forked_pool = variable_pool.fork()
+    items.append(3)
+    outputs["text"] = "changed"
+
+    assert variable_pool.get(["node", "items"]).value == [1, 2]
+    assert forked_pool.get(["node", "outputs"]).value == {"text": "parent"}
+    assert variable_pool.get(["node", "outputs"]).value == {"text": "parent"}
+
+
+def test_memory_usage_is_shared_by_forks():
+    variable_pool = _create_variable_pool()
+    usage = variable_pool.get_memory_usage()
+    forked_pool = variable_pool.fork()
+
+    forked_pool.add(["node", "items"], list(range(1000)))
+
+    assert variable_pool.get_memory_usage()["variables"] == usage["variables"] + 1
+    assert variable_pool.get_memory_usage()["bytes"] > usage["bytes"] + 1000
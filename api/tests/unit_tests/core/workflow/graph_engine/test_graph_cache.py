@@ -0,0 +1,78 @@
+import pytest
+
+from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.entities.graph_cache import GraphCache
+
+
+def _graph_config(answer: str = "1") -> dict:
+    return {
+        "edges": [
+            {"id": "start-source-llm-target", "source": "start", "target": "llm"},
+            {"id": "llm-source-answer-target", "source": "llm", "target": "answer"},
+            {"id": "code-source-end-target", "source": "code", "target": "end"},
+        ],
+        "nodes": [
+            {"data": {"type": "start"}, "id": "start"},
+            {"data": {"type": "llm"}, "id": "llm"},
+            {"data": {"type": "answer", "title": "answer", "answer": answer}, "id": "answer"},
+            {"data": {"type": "code"}, "id": "code"},
+            {"data": {"type": "end", "title": "end", "outputs": []}, "id": "end"},
+        ],
+    }
+
+
+def test_graph_is_compiled_once_per_workflow_version(mocker):
+    init_spy = mocker.spy(Graph, "init")
+    cache = GraphCache(max_size=10)
+
+    graph = cache.get_or_init(workflow_id="workflow", graph_config=_graph_config())
+
+    assert cache.get_or_init(workflow_id="workflow", graph_config=_graph_config()) is graph
+    assert init_spy.call_count == 1
+    assert graph.node_ids == ["start", "llm", "answer"]
+
+    # an edited draft is compiled again
+    edited_graph = cache.get_or_init(workflow_id="workflow", graph_config=_graph_config(answer="2"))
+    assert edited_graph is not graph
+    # the root node is part of the key
+    code_graph = cache.get_or_init(workflow_id="workflow", graph_config=_graph_config(), root_node_id="code")
+    assert code_graph.node_ids == ["code", "end"]
+
+    assert init_spy.call_count == 3
+    assert cache.get_stats() == {"max_size": 10, "size": 3, "hits": 1, "misses": 3}
+
+
+def test_cached_graph_is_read_only():
+    cache = GraphCache(max_size=10)
+    graph_config = _graph_config()
+
+    graph = cache.get_or_init(workflow_id="workflow", graph_config=graph_config)
+
+    with pytest.raises(ValueError):
+        graph.add_extra_edge(source_node_id="answer", target_node_id="start")
+
+    # the node configs of the cached graph do not change with the config of the caller
+    graph_config["nodes"][2]["data"]["answer"] = "2"
+    assert graph.node_id_config_mapping["answer"]["data"]["answer"] == "1"
+
+
+def test_least_recently_used_graph_is_evicted():
+    cache = GraphCache(max_size=1)
+
+    cache.get_or_init(workflow_id="workflow-1", graph_config=_graph_config())
+    cache.get_or_init(workflow_id="workflow-2", graph_config=_graph_config())
+    cache.get_or_init(workflow_id="workflow-1", graph_config=_graph_config())
+
+    assert cache.get_stats()["size"] == 1
+    assert cache.get_stats()["misses"] == 3
+
+
+def test_cache_disabled(mocker):
+    init_spy = mocker.spy(Graph, "init")
+    cache = GraphCache(max_size=0)
+
+    graph = cache.get_or_init(workflow_id="workflow", graph_config=_graph_config())
+
+    assert cache.get_or_init(workflow_id="workflow", graph_config=_graph_config()) is not graph
+    assert init_spy.call_count == 2
+    graph.add_extra_edge(source_node_id="answer", target_node_id="start")
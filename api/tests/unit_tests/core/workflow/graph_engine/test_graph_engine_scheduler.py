@@ -0,0 +1,118 @@
+import threading
+import time
+
+from core.workflow.graph_engine.graph_engine_scheduler import GraphEngineScheduler
+
+
+def _create_scheduler(**kwargs) -> GraphEngineScheduler:
+    params = {"max_workers": 4, "max_workers_per_tenant": 4, "max_workers_per_run": 4, "max_queued_per_run": 100}
+    params.update(kwargs)
+    return GraphEngineScheduler(**params)
+
+
+class _Concurrency:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.current = 0
+        self.max = 0
+
+    def run(self, duration: float = 0.02):
+        with self._lock:
+            self.current += 1
+            self.max = max(self.max, self.current)
+        time.sleep(duration)
+        with self._lock:
+            self.current -= 1
+
+
+def test_run_quota():
+    scheduler = _create_scheduler(max_workers_per_run=2)
+    concurrency = _Concurrency()
+
+    futures = [scheduler.submit("tenant", "run", concurrency.run) for _ in range(8)]
+
+    for future in futures:
+        future.result(timeout=5)
+    assert concurrency.max == 2
+    assert scheduler.get_stats()["completed"] == 8
+
+
+def test_tenant_quota():
+    scheduler = _create_scheduler(max_workers_per_tenant=3)
+    concurrency = _Concurrency()
+
+    futures = [scheduler.submit("tenant", f"run-{i % 4}", concurrency.run) for i in range(12)]
+
+    for future in futures:
+        future.result(timeout=5)
+    assert concurrency.max == 3
+
+
+def test_burst_on_warm_pool_runs_in_parallel():
+    scheduler = _create_scheduler()
+    concurrency = _Concurrency()
+
+    # leave a single idle worker
+    scheduler.submit("tenant", "run", time.sleep, 0).result(timeout=5)
+    deadline = time.monotonic() + 5
+    while scheduler.get_stats()["running"]:
+        assert time.monotonic() < deadline, "worker did not go idle within 5s"
+        time.sleep(0.01)
+    assert scheduler.get_stats()["threads"] == 1
+
+    futures = [scheduler.submit("tenant", "run", concurrency.run, 0.2) for _ in range(4)]
+
+    for future in futures:
+        future.result(timeout=5)
+    assert concurrency.max == 4
+
+
+def test_fair_share_between_runs():
+    scheduler = _create_scheduler(max_workers=1)
+    started = []
+
+    futures = [scheduler.submit("tenant", "run-a", started.append, "a") for _ in range(5)]
+    futures += [scheduler.submit("tenant", "run-b", started.append, "b")]
+
+    for future in futures:
+        future.result(timeout=5)
+    # the single branch of run b does not wait for all the branches of run a
+    assert started.index("b") < 3
+
+
+def test_nested_branches_do_not_deadlock():
+    scheduler = _create_scheduler(max_workers=1)
+
+    def branch(depth: int) -> int:
+        if depth == 0:
+            return 1
+
+        futures = [scheduler.submit("tenant", "run", branch, depth - 1) for _ in range(2)]
+        with scheduler.blocking():
+            return sum(future.result(timeout=5) for future in futures)
+
+    assert scheduler.submit("tenant", "run", branch, 3).result(timeout=10) == 8
+
+
+def test_submit_waits_for_room_in_queue():
+    scheduler = _create_scheduler(max_workers=1, max_queued_per_run=1)
+    concurrency = _Concurrency()
+
+    futures = [scheduler.submit("tenant", "run", concurrency.run, 0.01) for _ in range(5)]
+
+    for future in futures:
+        future.result(timeout=5)
+    assert scheduler.get_stats()["throttled"] > 0
+
+
+def test_cancel_queued_branch():
+    scheduler = _create_scheduler(max_workers=1)
+    release = threading.Event()
+
+    running = scheduler.submit("tenant", "run", release.wait, 5)
+    queued = scheduler.submit("tenant", "run", time.sleep, 0)
+    assert queued.cancel()
+    release.set()
+
+    running.result(timeout=5)
+    assert queued.cancelled()
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from core.workflow.graph_engine.parallel_branch_join import ParallelBranchCancelledError, ParallelBranchJoin
+
+
+def test_events_are_yielded_until_all_branches_are_done():
+    join = ParallelBranchJoin(tenant_id="tenant", run_id="run")
+
+    def branch(name: str):
+        join.put(f"{name}-started")
+        join.put(f"{name}-succeeded")
+
+    for name in ("a", "b", "c"):
+        join.submit(branch, name=name)
+
+    events = list(join.events())
+
+    assert sorted(events) == sorted(f"{name}-{state}" for name in ("a", "b", "c") for state in ("started", "succeeded"))
+
+
+def test_branch_raising_does_not_hang_the_join():
+    join = ParallelBranchJoin(tenant_id="tenant", run_id="run")
+
+    def branch():
+        raise ValueError("unexpected")
+
+    join.submit(branch)
+
+    assert list(join.events()) == []
+
+
+def test_join_wakes_up_without_polling():
+    join = ParallelBranchJoin(tenant_id="tenant", run_id="run")
+
+    def branch():
+        time.sleep(0.05)
+        join.put("done")
+
+    join.submit(branch)
+
+    start_at = time.perf_counter()
+    assert list(join.events()) == ["done"]
+    assert time.perf_counter() - start_at < 0.5
+
+
+def test_cancel_stops_running_and_queued_branches():
+    join = ParallelBranchJoin(tenant_id="tenant", run_id="cancel-run")
+    started = threading.Event()
+    put_results = []
+
+    def slow_branch():
+        started.set()
+        while True:
+            if not join.put("chunk"):
+                put_results.append(False)
+                return
+            time.sleep(0.01)
+
+    future = join.submit(slow_branch)
+    started.wait(timeout=5)
+    join.cancel()
+    future.result(timeout=5)
+
+    assert join.cancelled
+    assert put_results == [False]
+    with pytest.raises(ParallelBranchCancelledError):
+        list(join.events())
+
+    never_started = join.submit(lambda: None)
+    assert never_started.cancelled()
+
+
+def test_cancel_propagates_to_nested_joins():
+    parent = ParallelBranchJoin(tenant_id="tenant", run_id="nested-run")
+    child_started = threading.Event()
+    result = {}
+
+    def inner_branch(child: ParallelBranchJoin):
+        child_started.set()
+        while child.put("inner"):
+            time.sleep(0.01)
+
+    def outer_branch():
+        child = ParallelBranchJoin(tenant_id="tenant", run_id="nested-run", parent=ParallelBranchJoin.current())
+        child.submit(inner_branch, child=child)
+        try:
+            for _ in child.events():
+                pass
+        except ParallelBranchCancelledError:
+            result["cancelled"] = child.cancelled
+
+    future = parent.submit(outer_branch)
+    child_started.wait(timeout=5)
+    parent.cancel()
+    future.result(timeout=5)
+
+    assert result == {"cancelled": True}
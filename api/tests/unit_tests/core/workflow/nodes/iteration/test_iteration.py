@@ -1,11 +1,23 @@
+import random
 import time
 import uuid
+from typing import Optional
 from unittest.mock import patch
 
+import pytest
+from flask import Flask
+
 from core.app.entities.app_invoke_entities import InvokeFrom
-from core.workflow.entities.node_entities import NodeRunResult, UserFrom
+from core.workflow.entities.node_entities import NodeRunMetadataKey, NodeRunResult, UserFrom
 from core.workflow.entities.variable_pool import VariablePool
 from core.workflow.enums import SystemVariableKey
+from core.workflow.graph_engine.entities.event import (
+    IterationRunFailedEvent,
+    IterationRunNextEvent,
+    IterationRunSucceededEvent,
+    NodeRunStartedEvent,
+    NodeRunSucceededEvent,
+)
 from core.workflow.graph_engine.entities.graph import Graph
 from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
 from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
@@ -418,3 +430,168 @@ def test_run_parallel():
                 assert item.run_result.outputs == {"output": ["dify 123", "dify 123"]}
 
         assert count == 32
+
+
+def _init_parallel_iteration_node(
+    node_data: dict, edges: Optional[list[dict]] = None, nodes: Optional[list[dict]] = None
+) -> IterationNode:
+    graph_config = {
+        "edges": [
+            {
+                "id": "start-source-iteration-1-target",
+                "source": "start",
+                "target": "iteration-1",
+            },
+            *(edges or []),
+        ],
+        "nodes": [
+            {"data": {"title": "Start", "type": "start", "variables": []}, "id": "start"},
+            {"data": node_data, "id": "iteration-1"},
+            {
+                "data": {
+                    "iteration_id": "iteration-1",
+                    "template": "{{ arg1 }} 123",
+                    "title": "template transform",
+                    "type": "template-transform",
+                    "variables": [{"value_selector": ["iteration-1", "item"], "variable": "arg1"}],
+                },
+                "id": "tt",
+            },
+            *(nodes or []),
+        ],
+    }
+
+    graph = Graph.init(graph_config=graph_config)
+
+    init_params = GraphInitParams(
+        tenant_id="1",
+        app_id="1",
+        workflow_type=WorkflowType.WORKFLOW,
+        workflow_id="1",
+        graph_config=graph_config,
+        user_id="1",
+        user_from=UserFrom.ACCOUNT,
+        invoke_from=InvokeFrom.DEBUGGER,
+        call_depth=0,
+    )
+
+    pool = VariablePool(
+        system_variables={SystemVariableKey.FILES: [], SystemVariableKey.USER_ID: "1"},
+        user_inputs={},
+        environment_variables=[],
+    )
+    pool.add(["start", "items"], [f"dify-{i}" for i in range(10)])
+
+    return IterationNode(
+        id=str(uuid.uuid4()),
+        graph_init_params=init_params,
+        graph=graph,
+        graph_runtime_state=GraphRuntimeState(variable_pool=pool, start_at=time.perf_counter()),
+        config={"data": node_data, "id": "iteration-1"},
+    )
+
+
+def _tt_generator(self):
+    item = self.graph_runtime_state.variable_pool.get(["iteration-1", "item"]).value
+    # finish the items out of order
+    time.sleep(random.uniform(0, 0.05))
+    if item == "dify-3":
+        raise ValueError("item 3 failed")
+
+    return NodeRunResult(
+        status=WorkflowNodeExecutionStatus.SUCCEEDED,
+        inputs={"arg1": item},
+        outputs={"output": f"{item} 123"},
+    )
+
+
+def _parallel_iteration_node_data(error_handle_mode: str) -> dict:
+    return {
+        "iterator_selector": ["start", "items"],
+        "output_selector": ["tt", "output"],
+        "output_type": "array[string]",
+        "start_node_id": "tt",
+        "title": "iteration",
+        "type": "iteration",
+        "is_parallel": True,
+        "parallel_nums": 4,
+        "error_handle_mode": error_handle_mode,
+    }
+
+
+def _run_parallel_iteration(error_handle_mode: str) -> list:
+    iteration_node = _init_parallel_iteration_node(_parallel_iteration_node_data(error_handle_mode))
+
+    with Flask(__name__).app_context(), patch.object(TemplateTransformNode, "_run", new=_tt_generator):
+        events = list(iteration_node._run())
+
+    # the iteration variables are only added to the forked variable pools
+    assert iteration_node.graph_runtime_state.variable_pool.get(["iteration-1", "item"]) is None
+    assert iteration_node.graph_runtime_state.variable_pool.get(["tt", "output"]) is None
+
+    return events
+
+
+def test_run_in_parallel_continue_on_error():
+    events = _run_parallel_iteration("continue-on-error")
+
+    result = events[-1]
+    assert isinstance(result, RunCompletedEvent)
+    assert result.run_result.status == WorkflowNodeExecutionStatus.SUCCEEDED
+    assert result.run_result.outputs == {
+        "output": [None if i == 3 else f"dify-{i} 123" for i in range(10)],
+    }
+
+    succeeded_event = events[-2]
+    assert isinstance(succeeded_event, IterationRunSucceededEvent)
+    assert succeeded_event.metadata["errors"] == [{"index": 3, "error": "item 3 failed"}]
+
+    # the first event starts the iteration, the others report the completed items
+    next_events = [event for event in events if isinstance(event, IterationRunNextEvent)]
+    assert next_events[0].index == 0
+    assert sorted(event.index for event in next_events[1:]) == list(range(10))
+    for event in next_events[1:]:
+        assert event.pre_iteration_output == (None if event.index == 3 else f"dify-{event.index} 123")
+
+    # the events of the items interleave, each one carries the index of its item
+    started_events = [event for event in events if isinstance(event, NodeRunStartedEvent)]
+    assert sorted(event.in_iteration_index for event in started_events) == list(range(10))
+    succeeded_events = [event for event in events if isinstance(event, NodeRunSucceededEvent)]
+    assert len(succeeded_events) == 9
+    for event in succeeded_events:
+        node_run_result = event.route_node_state.node_run_result
+        assert node_run_result.inputs == {"arg1": f"dify-{event.in_iteration_index}"}
+        assert node_run_result.metadata[NodeRunMetadataKey.ITERATION_INDEX] == event.in_iteration_index
+
+
+def test_run_in_parallel_terminated_on_error():
+    events = _run_parallel_iteration("terminated")
+
+    result = events[-1]
+    assert isinstance(result, RunCompletedEvent)
+    assert result.run_result.status == WorkflowNodeExecutionStatus.FAILED
+    assert result.run_result.error == "item 3 failed"
+    assert isinstance(events[-2], IterationRunFailedEvent)
+
+
+def test_run_in_parallel_rejects_variable_assigner():
+    iteration_node = _init_parallel_iteration_node(
+        _parallel_iteration_node_data("terminated"),
+        edges=[{"id": "tt-source-assigner-target", "source": "tt", "target": "assigner"}],
+        nodes=[
+            {
+                "data": {
+                    "iteration_id": "iteration-1",
+                    "assigned_variable_selector": ["conversation", "outputs"],
+                    "input_variable_selector": ["tt", "output"],
+                    "title": "variable assigner",
+                    "type": "assigner",
+                    "write_mode": "append",
+                },
+                "id": "assigner",
+            },
+        ],
+    )
+
+    with pytest.raises(ValueError, match="variable assigner node assigner is not supported in parallel iteration"):
+        list(iteration_node._run())
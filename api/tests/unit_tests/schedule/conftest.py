@@ -0,0 +1,36 @@
+import importlib
+import sys
+import types
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import Table
+
+from models.dataset import Dataset, DatasetQuery, Document, Embedding
+
+TABLES = [Dataset, DatasetQuery, Document, Embedding]
+
+
+@pytest.fixture
+def sqlite_tables() -> list[Table]:
+    return [model.__table__ for model in TABLES]
+
+
+@pytest.fixture
+def import_schedule_task(mocker, monkeypatch):
+    """
+    Import a schedule task module without the celery app of app.py, the tasks are called directly
+    with the given config.
+    """
+    celery_app = types.ModuleType("app")
+    celery_app.celery = MagicMock()
+    celery_app.celery.task = lambda **kwargs: lambda func: func
+    monkeypatch.setitem(sys.modules, "app", celery_app)
+
+    def import_task(name: str, **config) -> types.ModuleType:
+        monkeypatch.delitem(sys.modules, f"schedule.{name}", raising=False)
+        module = importlib.import_module(f"schedule.{name}")
+        mocker.patch.object(module, "dify_config", MagicMock(CLEAN_DAY_SETTING=30, CLEAN_BATCH_INTERVAL=0, **config))
+        return module
+
+    return import_task
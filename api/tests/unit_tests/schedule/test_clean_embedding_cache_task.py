@@ -0,0 +1,41 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import Delete
+
+from extensions.ext_database import db
+from models.dataset import Embedding
+
+
+def _create_embeddings(count: int, days_ago: int) -> list[str]:
+    created_at = datetime.now() - timedelta(days=days_ago)
+    embeddings = [
+        Embedding(
+            id=str(uuid.uuid4()),
+            model_name="text-embedding-3-small",
+            provider_name="openai",
+            hash=str(uuid.uuid4()),
+            embedding=b"embedding",
+            # expired rows share timestamps, the pages continue after the ids of the same timestamp
+            created_at=created_at - timedelta(seconds=i // 2),
+        )
+        for i in range(count)
+    ]
+    db.session.add_all(embeddings)
+    db.session.commit()
+    return [embedding.id for embedding in embeddings]
+
+
+@pytest.mark.parametrize("expired_count", [0, 3, 4, 5])
+def test_expired_embeddings_are_deleted_in_batches(sqlite_db, import_schedule_task, mocker, expired_count):
+    module = import_schedule_task("clean_embedding_cache_task", CLEAN_EMBEDDING_CACHE_BATCH_SIZE=2)
+    _create_embeddings(expired_count, days_ago=31)
+    kept_ids = _create_embeddings(3, days_ago=29)
+    execute_spy = mocker.spy(db.session, "execute")
+
+    module.clean_embedding_cache_task()
+
+    assert {embedding.id for embedding in db.session.query(Embedding).all()} == set(kept_ids)
+    deletes = [call for call in execute_spy.call_args_list if isinstance(call.args[0], Delete)]
+    assert len(deletes) == (expired_count + 1) // 2
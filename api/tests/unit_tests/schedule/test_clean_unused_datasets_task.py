@@ -0,0 +1,112 @@
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from extensions.ext_database import db
+from models.dataset import Dataset, DatasetQuery, Document
+
+
+def _days_ago(days: int) -> datetime:
+    return datetime.now() - timedelta(days=days)
+
+
+def _create_dataset(days_ago: int = 60, documents_days_ago: tuple[int, ...] = (40,)) -> str:
+    dataset = Dataset(
+        id=str(uuid.uuid4()),
+        tenant_id=str(uuid.uuid4()),
+        name="dataset",
+        created_by=str(uuid.uuid4()),
+        created_at=_days_ago(days_ago),
+        updated_at=_days_ago(days_ago),
+    )
+    db.session.add(dataset)
+    for position, document_days_ago in enumerate(documents_days_ago):
+        db.session.add(
+            Document(
+                id=str(uuid.uuid4()),
+                tenant_id=dataset.tenant_id,
+                dataset_id=dataset.id,
+                position=position,
+                data_source_type="upload_file",
+                batch="batch",
+                name="document",
+                created_from="web",
+                created_by=dataset.created_by,
+                indexing_status="completed",
+                created_at=_days_ago(document_days_ago),
+                updated_at=_days_ago(document_days_ago),
+            )
+        )
+    db.session.commit()
+    return dataset.id
+
+
+def _query_dataset(dataset_id: str, days_ago: int) -> None:
+    db.session.add(
+        DatasetQuery(
+            id=str(uuid.uuid4()),
+            dataset_id=dataset_id,
+            content="query",
+            source="app",
+            created_by_role="account",
+            created_by=str(uuid.uuid4()),
+            created_at=_days_ago(days_ago),
+        )
+    )
+    db.session.commit()
+
+
+def _get_enabled_dataset_ids() -> set[str]:
+    return {document.dataset_id for document in db.session.query(Document).filter(Document.enabled == True).all()}
+
+
+def _run_task(import_schedule_task, mocker, batch_size: int = 2, failed_dataset_ids: frozenset[str] = frozenset()):
+    module = import_schedule_task("clean_unused_datasets_task", CLEAN_UNUSED_DATASETS_BATCH_SIZE=batch_size)
+    cleaned_dataset_ids = []
+
+    def clean(dataset, node_ids):
+        if dataset.id in failed_dataset_ids:
+            raise ValueError("vector store is down")
+        cleaned_dataset_ids.append(dataset.id)
+
+    index_processor_factory = mocker.patch.object(module, "IndexProcessorFactory")
+    index_processor_factory.return_value.init_index_processor.return_value = MagicMock(clean=clean)
+    module.clean_unused_datasets_task()
+    return cleaned_dataset_ids
+
+
+def test_unused_datasets_are_cleaned_in_batches(sqlite_db, import_schedule_task, mocker):
+    unused_dataset_ids = [_create_dataset(days_ago=60 + i) for i in range(5)]
+
+    cleaned_dataset_ids = _run_task(import_schedule_task, mocker, batch_size=2)
+
+    assert sorted(cleaned_dataset_ids) == sorted(unused_dataset_ids)
+    assert _get_enabled_dataset_ids() == set()
+
+
+def test_used_datasets_are_kept(sqlite_db, import_schedule_task, mocker):
+    unused_dataset_id = _create_dataset()
+    recently_queried_dataset_id = _create_dataset()
+    _query_dataset(recently_queried_dataset_id, days_ago=1)
+    old_queried_dataset_id = _create_dataset()
+    _query_dataset(old_queried_dataset_id, days_ago=40)
+    new_document_dataset_id = _create_dataset(documents_days_ago=(40, 1))
+    new_dataset_id = _create_dataset(days_ago=10, documents_days_ago=(10,))
+    empty_dataset_id = _create_dataset(documents_days_ago=())
+
+    cleaned_dataset_ids = _run_task(import_schedule_task, mocker)
+
+    assert sorted(cleaned_dataset_ids) == sorted([unused_dataset_id, old_queried_dataset_id])
+    assert _get_enabled_dataset_ids() == {recently_queried_dataset_id, new_document_dataset_id, new_dataset_id}
+    assert db.session.get(Dataset, empty_dataset_id) is not None
+
+
+def test_failed_datasets_keep_their_documents_and_paging_continues(sqlite_db, import_schedule_task, mocker):
+    # datasets are paged newest first, the failed ones fill the first pages
+    failed_dataset_ids = frozenset(_create_dataset(days_ago=60 + i) for i in range(3))
+    unused_dataset_ids = [_create_dataset(days_ago=70 + i) for i in range(2)]
+
+    cleaned_dataset_ids = _run_task(import_schedule_task, mocker, batch_size=1, failed_dataset_ids=failed_dataset_ids)
+
+    assert sorted(cleaned_dataset_ids) == sorted(unused_dataset_ids)
+    assert _get_enabled_dataset_ids() == failed_dataset_ids
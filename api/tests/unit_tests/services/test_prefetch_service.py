@@ -0,0 +1,249 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from flask_restful import marshal
+from sqlalchemy import Table, event
+
+from extensions.ext_database import db
+from models.account import Account
+from models.model import (
+    AppAnnotationHitHistory,
+    AppModelConfig,
+    Conversation,
+    EndUser,
+    Message,
+    MessageAgentThought,
+    MessageAnnotation,
+    MessageFeedback,
+    MessageFile,
+    UploadFile,
+)
+from services.prefetch_service import PrefetchService
+
+TABLES = [
+    Account,
+    AppModelConfig,
+    EndUser,
+    Conversation,
+    Message,
+    MessageFeedback,
+    MessageAnnotation,
+    AppAnnotationHitHistory,
+    MessageAgentThought,
+    MessageFile,
+    UploadFile,
+]
+
+
+@pytest.fixture
+def sqlite_tables() -> list[Table]:
+    return [model.__table__ for model in TABLES] + [db.metadata.tables["app_annotation_settings"]]
+
+
+def _id() -> str:
+    return str(uuid.uuid4())
+
+
+def _create_app() -> str:
+    account = Account(id=_id(), name="admin", email="admin@example.com")
+    app_model_config = AppModelConfig(
+        id=_id(), app_id=_id(), created_by=account.id, model='{"name": "gpt-4"}', pre_prompt="prompt"
+    )
+    db.session.add_all([account, app_model_config])
+    db.session.commit()
+    return app_model_config.id
+
+
+def _create_conversations(app_model_config_id: str, count: int) -> None:
+    app_model_config = db.session.get(AppModelConfig, app_model_config_id)
+    app_id = app_model_config.app_id
+    account = db.session.get(Account, app_model_config.created_by)
+    created_at = datetime(2024, 1, 1)
+    for index in range(count):
+        end_user = EndUser(id=_id(), tenant_id=_id(), app_id=app_id, type="browser", session_id=f"session-{index}")
+        conversation = Conversation(
+            id=_id(),
+            app_id=app_id,
+            app_model_config_id=app_model_config.id,
+            mode="chat",
+            name=f"conversation {index}",
+            status="normal",
+            from_source="api",
+            from_end_user_id=end_user.id,
+            created_at=created_at,
+            updated_at=created_at,
+        )
+        db.session.add_all([end_user, conversation])
+        for position in range(2):
+            message = Message(
+                id=_id(),
+                app_id=app_id,
+                conversation_id=conversation.id,
+                query=f"query {index}-{position}",
+                message=[{"role": "user", "text": "query"}],
+                answer="answer",
+                message_unit_price=0,
+                answer_unit_price=0,
+                currency="USD",
+                from_source="api",
+                from_end_user_id=end_user.id,
+                created_at=created_at + timedelta(minutes=position),
+                updated_at=created_at,
+            )
+            annotation = MessageAnnotation(
+                id=_id(),
+                app_id=app_id,
+                conversation_id=conversation.id,
+                message_id=message.id,
+                question="question",
+                content="content",
+                account_id=account.id,
+                created_at=created_at + timedelta(minutes=position),
+                updated_at=created_at,
+            )
+            db.session.add_all(
+                [
+                    message,
+                    annotation,
+                    MessageFeedback(
+                        id=_id(),
+                        app_id=app_id,
+                        conversation_id=conversation.id,
+                        message_id=message.id,
+                        rating="like",
+                        from_source="user",
+                        from_end_user_id=end_user.id,
+                        created_at=created_at,
+                        updated_at=created_at,
+                    ),
+                    MessageFeedback(
+                        id=_id(),
+                        app_id=app_id,
+                        conversation_id=conversation.id,
+                        message_id=message.id,
+                        rating="dislike",
+                        from_source="admin",
+                        from_account_id=account.id,
+                        created_at=created_at,
+                        updated_at=created_at,
+                    ),
+                    AppAnnotationHitHistory(
+                        id=_id(),
+                        app_id=app_id,
+                        annotation_id=annotation.id,
+                        source="api",
+                        question="question",
+                        account_id=account.id,
+                        message_id=message.id,
+                        annotation_question="question",
+                        annotation_content="content",
+                        created_at=created_at,
+                    ),
+                    MessageAgentThought(
+                        id=_id(),
+                        message_id=message.id,
+                        position=1,
+                        thought="thought",
+                        created_by_role="end_user",
+                        created_by=end_user.id,
+                        created_at=created_at,
+                    ),
+                    MessageFile(
+                        id=_id(),
+                        message_id=message.id,
+                        type="image",
+                        transfer_method="remote_url",
+                        url="https://example.com/image.png",
+                        created_by_role="end_user",
+                        created_by=end_user.id,
+                        created_at=created_at,
+                    ),
+                ]
+            )
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def _count_queries(fn) -> int:
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        queries.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+    return len(queries)
+
+
+def _get_fields(name: str) -> dict:
+    # imported after the models, fields and models import each other
+    from fields import conversation_fields
+
+    return getattr(conversation_fields, name)
+
+
+def _list_conversations(fields: dict, prefetch: bool) -> list[dict]:
+    db.session.expunge_all()
+    conversations = db.session.query(Conversation).order_by(Conversation.name).all()
+    if prefetch:
+        PrefetchService.prefetch_conversations(conversations)
+    return marshal(conversations, fields)
+
+
+def _list_messages(prefetch: bool) -> list[dict]:
+    db.session.expunge_all()
+    messages = db.session.query(Message).order_by(Message.query).all()
+    if prefetch:
+        PrefetchService.prefetch_messages(messages)
+    return marshal(messages, _get_fields("message_detail_fields"))
+
+
+@pytest.mark.parametrize("fields_name", ["conversation_fields", "conversation_with_summary_fields"])
+def test_prefetched_conversations_are_serialized_with_a_fixed_number_of_queries(sqlite_db, fields_name):
+    fields = _get_fields(fields_name)
+    app_model_config_id = _create_app()
+    _create_conversations(app_model_config_id, count=2)
+    small_page_queries = _count_queries(lambda: _list_conversations(fields, prefetch=True))
+    _create_conversations(app_model_config_id, count=10)
+    queries = _count_queries(lambda: _list_conversations(fields, prefetch=True))
+    legacy_queries = _count_queries(lambda: _list_conversations(fields, prefetch=False))
+
+    assert queries == small_page_queries
+    assert queries <= 10
+    assert legacy_queries > 12 * 5
+    assert _list_conversations(fields, prefetch=True) == _list_conversations(fields, prefetch=False)
+
+
+def test_prefetched_messages_are_serialized_with_a_fixed_number_of_queries(sqlite_db):
+    app_model_config_id = _create_app()
+    _create_conversations(app_model_config_id, count=1)
+    small_page_queries = _count_queries(lambda: _list_messages(prefetch=True))
+    _create_conversations(app_model_config_id, count=10)
+    queries = _count_queries(lambda: _list_messages(prefetch=True))
+    legacy_queries = _count_queries(lambda: _list_messages(prefetch=False))
+
+    assert queries == small_page_queries
+    assert queries <= 10
+    assert legacy_queries > 22 * 5
+    assert _list_messages(prefetch=True) == _list_messages(prefetch=False)
+
+
+def test_prefetched_conversation_without_rows(sqlite_db):
+    _create_conversations(_create_app(), count=1)
+    conversation = db.session.query(Conversation).first()
+    db.session.query(Message).delete()
+    db.session.query(MessageAnnotation).delete()
+    db.session.query(MessageFeedback).delete()
+    db.session.commit()
+
+    PrefetchService.prefetch_conversations([conversation])
+
+    assert conversation.message_count == 0
+    assert conversation.first_message is None
+    assert conversation.annotated is False
+    assert conversation.user_feedback_stats == {"like": 0, "dislike": 0}
+    assert conversation.summary_or_query == ""
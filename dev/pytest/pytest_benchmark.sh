@@ -0,0 +1,7 @@
+#!/bin/bash
+set -x
+
+# Benchmarks are run manually and are not part of CI or pytest_all_tests.sh,
+# the database benchmarks need the Postgres and Redis of docker/docker-compose.middleware.yaml
+# migrated to the latest version, configured in api/tests/integration_tests/.env
+pytest api/tests/benchmark_tests